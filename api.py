@@ -1,11 +1,23 @@
 """FastAPI REST API for TV Series Chatbot with multi-series support."""
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, validator
 from typing import Optional, List, Dict
 from src.core.multi_series_service import MultiSeriesService
+from src.core.batch import BatchQueryRunner
+from src.core.registry import registry
+from src.core.rewrite_cache import rewrite_cache
+from src.core.scheduler import admission, AdmissionRejected, PRIORITY_EVALUATE
+from src.prompts.rewrite_prompt import get_rewriter_chain
+from src.utils.concurrency import run_blocking
+from src.vector_store import get_embeddings
 from src.utils.logging import setup_logging, get_logger
 from src.utils.validators import validate_query
+from config.constants import BATCH_MAX_ITEMS, WARMUP_ON_STARTUP
 from dotenv import load_dotenv
 import os
 import json
@@ -15,11 +27,39 @@ load_dotenv()
 setup_logging()
 logger = get_logger(__name__)
 multi_series_service = MultiSeriesService()
+batch_runner = BatchQueryRunner(multi_series_service)
+warmup_state = {"status": "pending", "seconds": None, "components": {}}
+
+
+def _warmup():
+    """Initialize backends, rewriter chain and series stores (runs off the event loop)."""
+    warmup_state["status"] = "running"
+    start = time.perf_counter()
+    try:
+        warmup_state["components"] = registry.warmup(multi_series_service.AVAILABLE_SERIES)
+        get_rewriter_chain()
+        warmup_state["status"] = "ready"
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Warmup failed: %s", e, exc_info=True)
+        warmup_state["status"] = "failed"
+    warmup_state["seconds"] = round(time.perf_counter() - start, 3)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Start serving immediately and warm backends in the background; requests that
+    arrive first simply initialize what they need on demand."""
+    warmup_task = asyncio.create_task(run_blocking(_warmup)) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+
 
 app = FastAPI(
     title="Series Chatbot API",
     description="RAG-based chatbot for TV series content",
-    version="1.2"
+    version="1.2",
+    lifespan=lifespan
 )
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -42,6 +82,17 @@ except (ImportError, ValueError, FileNotFoundError, OSError) as e:
     logger.error("Failed to initialize API: %s", e, exc_info=True)
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(_: Request, exc: AdmissionRejected):
+    """Fast 429 (queue full) / 503 (wait timeout) with Retry-After."""
+    logger.warning("Rejected request: %s", exc)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"status": "error", "message": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 class QueryRequest(BaseModel):
     """Request model for /ask endpoint."""
     query: str
@@ -69,36 +120,110 @@ async def ask_question(request: QueryRequest):
     logger.info("Processing query: %s... (series: %s, local: %s)", 
                request.query[:50], request.series, request.use_local)
     
-    if request.series == "all":
-        return multi_series_service.query_all_series(
-            query=request.query,
-            season=request.season,
-            episode=request.episode,
-            use_local=request.use_local
-        )
-    
-    result = multi_series_service.query_single_series(
-        series_name=request.series,
+    return await multi_series_service.aask(
         query=request.query,
+        series=request.series,
         season=request.season,
         episode=request.episode,
         use_local=request.use_local
     )
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for /ask/batch endpoint."""
+    items: List[QueryRequest]
+    stream: bool = False
+    
+    @validator('items')
+    def validate_items_field(cls, v):  # pylint: disable=no-self-argument
+        if not v:
+            raise ValueError("Batch must contain at least one item")
+        if len(v) > BATCH_MAX_ITEMS:
+            raise ValueError(f"Batch must not exceed {BATCH_MAX_ITEMS} items")
+        return v
+
+
+@app.post("/ask/batch")
+async def ask_batch(request: BatchQueryRequest):
+    """Answer many queries in one call; results in input order, or JSON lines as they complete."""
+    logger.info("Processing batch: %d items (stream: %s)", len(request.items), request.stream)
+    items = [item.dict() for item in request.items]
     
+    if request.stream:
+        async def line_stream():
+            async for index, response in batch_runner.aiter_results(items):
+                yield json.dumps({"index": index, **response}, ensure_ascii=False) + "\n"
+        return StreamingResponse(line_stream(), media_type="application/x-ndjson")
+    
+    results = await batch_runner.run(items)
+    return {"status": "success", "count": len(results), "results": results}
+
+
+def _format_sse(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QueryRequest):
+    """Stream answer as SSE: 'metadata' (query + sources), 'token' chunks, then 'done'.
+    
+    Multi-series queries stream every series concurrently and also emit a 'partial'
+    event carrying the merged response each time a series completes.
+    """
+    logger.info("Streaming query: %s... (series: %s, local: %s)", 
+               request.query[:50], request.series, request.use_local)
+    admission.limiter(request.use_local).check_capacity()
+    
+    async def event_stream():
+        try:
+            async for event, data in multi_series_service.astream_query(
+                query=request.query,
+                series=request.series,
+                season=request.season,
+                episode=request.episode,
+                use_local=request.use_local
+            ):
+                yield _format_sse(event, data)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Streaming failed: %s", e, exc_info=True)
+            yield _format_sse("error", {"message": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class InvalidateRequest(BaseModel):
+    """Request model for /admin/invalidate endpoint."""
+    series: Optional[str] = None
+
+
+@app.post("/admin/invalidate")
+async def invalidate_registry(request: InvalidateRequest):
+    """Drop warm vector stores and chains after an index rebuild (all series if omitted)."""
+    registry.invalidate(request.series)
+    return {"status": "success", "invalidated": request.series or "all"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Cache and scheduling counters."""
     return {
-        "status": "success",
-        "original_query": request.query,
-        "optimized_query": result.optimized_query,
-        "answer": result.answer,
-        "sources": result.sources,
-        "source_count": len(result.sources)
+        "rewrite_cache": rewrite_cache.stats(),
+        "answer_cache": multi_series_service.answer_cache.stats(),
+        "embedding_cache": get_embeddings().stats(),
+        "coalescing": multi_series_service.singleflight.stats(),
+        "admission": admission.stats()
     }
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "Series Chatbot API"}
+    """Health check endpoint. Healthy as soon as the app serves; warmup progress is informational."""
+    return {"status": "healthy", "service": "Series Chatbot API", "warmup": warmup_state}
 
 
 @app.get("/")
@@ -109,7 +234,11 @@ async def root():
         "version": "1.2",
         "endpoints": {
             "/ask": "POST - Query the chatbot",
+            "/ask/stream": "POST - Query the chatbot, answer streamed as Server-Sent Events",
+            "/ask/batch": "POST - Answer a list of queries (optionally streamed as JSON lines)",
             "/evaluate": "POST - Run RAGAS evaluation on test set",
+            "/admin/invalidate": "POST - Drop cached indexes/chains after a rebuild",
+            "/metrics": "GET - Cache and scheduling counters",
             "/health": "GET - Health check",
             "/docs": "GET - API documentation (Swagger UI)"
         },
@@ -133,8 +262,17 @@ async def run_evaluation(request: EvaluationRequest):
         # Lazy import to avoid loading RAGAS on every API startup
         from scripts.evaluate_ragas import RAGASEvaluator
         
-        evaluator = RAGASEvaluator(test_set_path=request.test_set_path)
-        results = evaluator.evaluate_test_set(use_local=request.use_local)
+        # Each evaluation query takes its own low-priority slot, so interactive traffic
+        # is admitted between them instead of waiting out the whole run
+        loop = asyncio.get_running_loop()
+        evaluator = RAGASEvaluator(
+            test_set_path=request.test_set_path,
+            llm_slot=lambda: admission.blocking_slot(loop, request.use_local, PRIORITY_EVALUATE)
+        )
+        try:
+            results = await run_blocking(evaluator.evaluate_test_set, use_local=request.use_local)
+        finally:
+            evaluator.close()
         
         if request.save_results:
             output_path = evaluator.save_results(results)
@@ -151,6 +289,8 @@ async def run_evaluation(request: EvaluationRequest):
             },
             "saved_to": output_path if request.save_results else None
         }
+    except AdmissionRejected:
+        raise
     except FileNotFoundError as e:
         logger.error("Test set not found: %s", e)
         return {
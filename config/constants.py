@@ -5,14 +5,72 @@ COLLECTION_NAME = SERIES_FOLDER_NAME
 
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
+# Chunks per embed + Chroma add call during ingestion; the manifest is checkpointed after each batch
+VECTOR_UPSERT_BATCH_SIZE = 512
+# Chunk batches prepared ahead of the embedder before the chunking thread blocks (backpressure)
+INGEST_PREFETCH_BATCHES = 2
+
+# Vector store: "chroma" (HNSW, persisted by Chroma) or "numpy" (exact in-process search, see
+# src/flat_vector_store.py); switching re-indexes each series on its next --process
+VECTOR_BACKEND = "chroma"
+# NumPy backend vector storage: "none" (float32) or "int8" (~4x less resident memory; the best
+# k * QUANTIZATION_RESCORE_FACTOR candidates are rescored in float32). Per-series overrides below.
+# Codes are only searched once the store is compacted into one segment (--process does this);
+# a store with several segments or tombstones falls back to exact float32 search until then
+VECTOR_QUANTIZATION = "none"
+VECTOR_QUANTIZATION_BY_SERIES = {}
+QUANTIZATION_RESCORE_FACTOR = 4
 
 RETRIEVAL_K = 5
 RETRIEVAL_SEARCH_TYPE = "similarity"
 
+# Retrieval mode: "vector" (Chroma only), "lexical" (BM25 only) or "hybrid" (reciprocal rank fusion)
+RETRIEVAL_MODE = "hybrid"
+HYBRID_FETCH_K = 20
+# Season/episode-filtered dense queries search a per-series partition index (exact) instead of
+# Chroma's metadata post-filter; built by --process, unfiltered queries still use Chroma.
+# Only used with the Chroma backend: the NumPy backend masks by season/episode itself
+PARTITIONED_RETRIEVAL = True
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Names that are also function words ("Will", "Max") are deliberately not stopwords
+BM25_STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "did", "do", "does", "for", "from",
+    "had", "has", "have", "he", "her", "him", "his", "i", "if", "in", "into", "is", "it", "its",
+    "me", "my", "no", "not", "of", "on", "or", "our", "she", "so", "that", "the", "their", "them",
+    "then", "there", "they", "this", "to", "was", "we", "were", "what", "when", "where", "which",
+    "who", "why", "with", "you", "your"
+])
+
+# Context packing: prompt token budget for retrieved context per LLM backend
+CONTEXT_TOKEN_BUDGET = {"local": 1500, "google": 4000}
+CHARS_PER_TOKEN = 4
+
 LLM_TEMPERATURE = 0.2
 LLM_MAX_TOKENS = 8000
 USE_LOCAL_LLM = False
 
+# Build LLM backend, chains and series stores in the background at API startup
+WARMUP_ON_STARTUP = True
+
+# Worker threads for blocking backend calls (Chroma, LLM init) made from async handlers
+BLOCKING_EXECUTOR_WORKERS = 8
+
+# Multi-series scatter-gather: each series gets its own deadline so one slow series can't hold up the rest
+SERIES_QUERY_TIMEOUT_SECONDS = 60
+MAX_SERIES_WORKERS = 4
+
+# Admission control per LLM backend: concurrent calls, waiting requests, max wait before 503
+ADMISSION_LIMITS = {
+    "local": {"max_concurrency": 2, "max_queue": 32, "max_wait_seconds": 30},
+    "google": {"max_concurrency": 16, "max_queue": 128, "max_wait_seconds": 15}
+}
+
+# Batch queries (/ask/batch)
+BATCH_MAX_ITEMS = 5000
+BATCH_MAX_CONCURRENCY = 8
+
 LOCAL_MODEL_NAME = "qwen2.5:7b"
 GOOGLE_MODEL_NAME = "gemini-3-flash-preview"
 
@@ -21,9 +79,54 @@ ACTION_DURATION_MS = 3000
 
 NGRAM_SIZE = 3
 TIME_WINDOW_MS = 1000
+# Merger duplicate search: dialogues starting within this many TIME_WINDOW_MS buckets of an action
+MERGE_SEARCH_BUCKETS = 120
+
+# Processed scene files: "json" (indented JSON) or "columnar" (memory-mapped .scenes files, see src/scene_store.py)
+SCENE_STORE_FORMAT = "json"
+
+# Query Rewrite Cache (persistent, keyed on normalized question + rewriter model)
+REWRITE_CACHE_ENABLED = True
+REWRITE_CACHE_MAX_ENTRIES = 10000
+REWRITE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Semantic Answer Cache (near-duplicate questions, in memory)
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_ENTRIES = 2048
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+ANSWER_CACHE_EVICTION = "lru"  # "lru" or "lfu"
+
+# Rule-based query fast path (when confident, the LLM only translates and expands search terms)
+FAST_PATH_ENABLED = True
+FAST_PATH_MIN_CONFIDENCE = 0.8
+GAZETTEER_MIN_COUNT = 5
+GAZETTEER_MAX_TERMS = 500
+# Matching is case-insensitive, so no seed may be a common word or a name shared across
+# series ("Will", "Max", "Mike"): one hit is enough to skip the LLM
+SERIES_GAZETTEER_SEEDS = {
+    "stranger_things": [
+        "Will Byers", "Eleven", "Mike Wheeler", "Dustin", "Lucas", "Joyce", "Hopper", "Jim Hopper",
+        "Nancy", "Steve", "Max Mayfield", "Demogorgon", "Hawkins", "Vecna", "Upside Down",
+        "Starcourt", "Mind Flayer"
+    ],
+    "breaking_bad": [
+        "Walter", "Walter White", "Walt", "Jesse", "Jesse Pinkman", "Pinkman", "Hank", "Skyler",
+        "Saul", "Saul Goodman", "Gus", "Gus Fring", "Heisenberg", "Mike Ehrmantraut", "DEA",
+        "Los Pollos Hermanos", "Albuquerque", "Tuco"
+    ]
+}
 
 # Embedding Configuration
+# Backend: "google" (remote API), "onnx" (local sentence-embedding model) or "hashing" (deterministic, for tests)
+EMBEDDING_BACKEND = "google"
 EMBEDDING_MODEL = "models/text-embedding-004"
+# ONNX model directory under data/models/ with model.onnx and tokenizer.json
+ONNX_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+ONNX_EMBEDDING_MAX_LENGTH = 256
+HASHING_EMBEDDING_DIM = 384
+# Local backends: texts per inference batch and CPU threads per batch
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_THREADS = 4
 
 # Excel Filtering Constants
 MIN_ACTION_WORDS = 5
@@ -6,6 +6,12 @@ DATA = ROOT / "data"
 DATA_RAW = DATA / "raw"
 DATA_PROCESSED = DATA / "processed"
 CHROMA_DB = DATA / "chroma_db"
+LEXICAL_INDEX = DATA / "lexical_index"
+PARTITION_INDEX = DATA / "partition_index"
+EMBEDDING_MODELS = DATA / "models"
+CACHE = DATA / "cache"
+REWRITE_CACHE_DB = CACHE / "rewrite_cache.sqlite3"
+EMBEDDING_CACHE_DB = CACHE / "embedding_cache.sqlite3"
 
 def get_series_paths(series_name):
     """Return raw, processed, and ChromaDB paths for series."""
@@ -1,7 +1,7 @@
 
 """Main CLI for processing subtitles."""
 import argparse
-from src.core.data_processor import process_series
+import os
 from src.utils.logging import setup_logging, get_logger
 
 
@@ -25,7 +25,18 @@ def main():
         '--series',
         type=str,
         default='stranger_things',
-        help='Series name to process (default: stranger_things)'
+        help='Series to process: a name, a comma-separated list or "all" (default: stranger_things)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-process every episode and rebuild the indexes, even if sources are unchanged'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help=f'Processes for parsing and merging episodes in parallel (default: 1, this machine: {os.cpu_count()})'
     )
     
     args = parser.parse_args()
@@ -33,11 +44,40 @@ def main():
     if not args.process:
         parser.error("Must specify --process flag")
     
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    # Imported here so --help and argument errors don't load pandas, pysubs2 and LangChain
+    from concurrent.futures import ProcessPoolExecutor
+    from config.paths import DATA_RAW
+    from src.core.data_processor import process_series
+    
+    if args.series == "all":
+        series_names = sorted(p.name for p in DATA_RAW.iterdir() if p.is_dir())
+    else:
+        series_names = [name.strip() for name in args.series.split(",") if name.strip()]
+    
+    # One pool shared by every series, so workers start once per run
+    executor = ProcessPoolExecutor(max_workers=args.workers, initializer=setup_logging) if args.workers > 1 else None
+    reports = {}
     try:
-        process_series(args.series)
+        for series_name in series_names:
+            reports[series_name] = process_series(series_name, force=args.force, executor=executor)
     except (ValueError, FileNotFoundError, OSError) as e:
         logger.error("Error: %s", e, exc_info=True)
         raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    failed = {f"{name}/{key}": error for name, report in reports.items() for key, error in report["failed"].items()}
+    logger.info("Processed %d series with %d worker(s): %d episodes processed, %d failed in %.1fs",
+                len(reports), args.workers, sum(r["processed"] for r in reports.values()),
+                len(failed), sum(r["seconds"] for r in reports.values()))
+    for key, error in failed.items():
+        logger.error("Failed: %s: %s", key, error)
+    if failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+"""Startup benchmark: per-module import time and time to first successful /health.
+
+Every measurement runs in a fresh interpreter so module caches from earlier runs don't hide
+cold-start cost.
+
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 5 --port 8765 --wait-warmup
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "config.constants",
+    "src.core.llm_engine",
+    "src.vector_store",
+    "src.core.registry",
+    "src.prompts.rewrite_prompt",
+    "src.core.multi_series_service",
+    "src.core.data_processor",
+    "main",
+    "api",
+]
+
+
+def measure_import(module: str) -> dict:
+    """Import module in a fresh interpreter; return cumulative import time and process wall time."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=False
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1].strip())
+    return {
+        "import_seconds": cumulative_us / 1e6 if cumulative_us is not None else None,
+        "process_seconds": wall
+    }
+
+
+def _get_json(url: str, timeout: float = 1.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, json.loads(response.read().decode("utf-8"))
+
+
+def measure_health(port: int, timeout: float, wait_warmup: bool) -> dict:
+    """Start uvicorn and poll /health until it answers 200 (and optionally until warmup ends)."""
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {"first_health_seconds": None, "warmup": None}
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                result["error"] = f"server exited with code {server.returncode}"
+                return result
+            try:
+                status, body = _get_json(url)
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.05)
+                continue
+            if status != 200:
+                time.sleep(0.05)
+                continue
+            if result["first_health_seconds"] is None:
+                result["first_health_seconds"] = time.perf_counter() - start
+            warmup = body.get("warmup") or {}
+            if not wait_warmup or warmup.get("status") in ("ready", "failed"):
+                result["warmup"] = warmup
+                result["total_seconds"] = time.perf_counter() - start
+                return result
+            time.sleep(0.1)
+        result["error"] = f"timed out after {timeout}s"
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def main():
+    """Run the startup benchmark and print a JSON report."""
+    parser = argparse.ArgumentParser(description="Measure import and API cold-start times")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter runs per measurement")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the temporary API server")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for /health")
+    parser.add_argument("--wait-warmup", action="store_true", help="Also wait for background warmup")
+    parser.add_argument("--skip-health", action="store_true", help="Only measure imports")
+    args = parser.parse_args()
+
+    report = {"imports": {}, "health": None}
+    for module in args.modules:
+        runs = [measure_import(module) for _ in range(args.runs)]
+        errors = [r["error"] for r in runs if "error" in r]
+        report["imports"][module] = {"error": errors[0]} if errors else {
+            "import_seconds": _median([r["import_seconds"] for r in runs]),
+            "process_seconds": _median([r["process_seconds"] for r in runs]),
+        }
+        print(f"{module:35s} {json.dumps(report['imports'][module])}", file=sys.stderr)
+
+    if not args.skip_health:
+        runs = [measure_health(args.port, args.timeout, args.wait_warmup) for _ in range(args.runs)]
+        report["health"] = {
+            "first_health_seconds": _median([r["first_health_seconds"] for r in runs]),
+            "total_seconds": _median([r.get("total_seconds") for r in runs]),
+            "warmup": runs[-1].get("warmup"),
+            "errors": [r["error"] for r in runs if "error" in r]
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Compare the Chroma and NumPy flat vector backends on query latency and recall@k.
+
+Copies a series' stored vectors out of Chroma into a temporary flat store (nothing is
+re-embedded), then runs the same query vectors through both, one query at a time, without
+a filter and with a season filter. It also runs the flat store's batched search and, if
+the series has one, the partition index for the filtered queries. Recall@k is measured
+against brute-force exact search over the same vectors.
+
+Queries are stored vectors of randomly chosen chunks plus Gaussian noise, or the embedded
+lines of --questions (filtered runs then use a random season).
+
+    python scripts/benchmark_vector_backends.py --series stranger_things
+    python scripts/benchmark_vector_backends.py --series breaking_bad --queries 500 --k 20
+    python scripts/benchmark_vector_backends.py --series stranger_things --questions questions.txt
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.constants import VECTOR_UPSERT_BATCH_SIZE  # pylint: disable=wrong-import-position
+from config.paths import CHROMA_DB, PARTITION_INDEX  # pylint: disable=wrong-import-position
+from src.flat_vector_store import FlatVectorStore  # pylint: disable=wrong-import-position
+from src.partition_index import PartitionIndex  # pylint: disable=wrong-import-position
+from src.vector_store import get_embeddings, open_vector_db  # pylint: disable=wrong-import-position
+
+
+def copy_to_flat(chroma, flat, page_size=VECTOR_UPSERT_BATCH_SIZE):
+    """Copy every stored chunk (vector, text, metadata) from Chroma into the flat store."""
+    offset = 0
+    while True:
+        page = chroma.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        flat.add_embeddings(page["documents"], page["embeddings"], page["metadatas"], page["ids"])
+        offset += len(page["ids"])
+    flat.compact()
+
+
+def _chunk_ids(docs):
+    return [doc.metadata.get("chunk_id") for doc in docs]
+
+
+def _latency(seconds):
+    ms = np.asarray(seconds) * 1000.0
+    return {"mean_ms": round(float(ms.mean()), 3), "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+
+
+def _recall(results, truths):
+    return round(float(np.mean([len(set(r) & set(t)) / max(len(t), 1) for r, t in zip(results, truths)])), 4)
+
+
+def run(search, queries, truths):
+    """Time search(query_vector, filter) per query; returns latency and recall."""
+    seconds, results = [], []
+    for vector, metadata_filter in queries:
+        start = time.perf_counter()
+        results.append(search(vector, metadata_filter))
+        seconds.append(time.perf_counter() - start)
+    return {**_latency(seconds), "recall": _recall(results, truths)}
+
+
+def main():
+    """Benchmark both backends on one series and print a JSON report."""
+    parser = argparse.ArgumentParser(description="Benchmark Chroma against the NumPy flat vector store")
+    parser.add_argument("--series", required=True)
+    parser.add_argument("--queries", type=int, default=200, help="Sampled chunk queries")
+    parser.add_argument("--questions", help="File with one natural-language question per line")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.5, help="Noise scale relative to vector spread")
+    parser.add_argument("--batch-size", type=int, default=32, help="Queries per batched flat search")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embedder = get_embeddings()
+    chroma = open_vector_db(embedder, args.series, CHROMA_DB / args.series, backend="chroma")
+
+    with tempfile.TemporaryDirectory() as flat_dir:
+        start = time.perf_counter()
+        flat = FlatVectorStore(embedding_function=embedder, persist_dir=flat_dir)
+        copy_to_flat(chroma, flat)
+        copy_seconds = time.perf_counter() - start
+
+        stored = flat.get(include=["embeddings", "metadatas"])
+        if not stored["ids"]:
+            sys.exit(f"No vectors stored for {args.series}")
+        matrix = np.asarray(stored["embeddings"], dtype=np.float64)
+        chunk_ids = np.array([metadata.get("chunk_id") for metadata in stored["metadatas"]], dtype=object)
+        seasons = np.array([metadata.get("season") if metadata.get("season") is not None else -1
+                            for metadata in stored["metadatas"]])
+        known_seasons = sorted(set(seasons.tolist()) - {-1})
+
+        if args.questions:
+            with open(args.questions, "r", encoding="utf-8") as f:
+                questions = [line.strip() for line in f if line.strip()]
+            vectors = np.asarray(embedder.embed_queries(questions), dtype=np.float64)
+            query_seasons = rng.choice(known_seasons, size=len(vectors)) if known_seasons else [-1] * len(vectors)
+        else:
+            rows = rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)
+            spread = float(matrix.std())
+            vectors = matrix[rows] + rng.normal(scale=args.noise * spread, size=(len(rows), matrix.shape[1]))
+            query_seasons = seasons[rows]
+
+        def exact(vector, season):
+            distances = ((matrix - vector) ** 2).sum(axis=1)
+            if season is not None:
+                distances[seasons != season] = np.inf
+            top = np.argsort(distances, kind="stable")[:args.k]
+            return [chunk_ids[i] for i in top if np.isfinite(distances[i])]
+
+        unfiltered = [(vector.tolist(), None) for vector in vectors]
+        filtered = [(vector.tolist(), {"season": {"$eq": int(season)}})
+                    for vector, season in zip(vectors, query_seasons) if season >= 0]
+        truths = [exact(np.asarray(v), None) for v, _ in unfiltered]
+        filtered_truths = [exact(np.asarray(v), f["season"]["$eq"]) for v, f in filtered]
+
+        def search_with(store):
+            return lambda vector, metadata_filter: _chunk_ids(
+                store.similarity_search_by_vector(vector, k=args.k, filter=metadata_filter))
+
+        report = {
+            "series": args.series,
+            "chunks": len(matrix),
+            "dimension": int(matrix.shape[1]),
+            "k": args.k,
+            "queries": len(unfiltered),
+            "filtered_queries": len(filtered),
+            "flat_copy_seconds": round(copy_seconds, 2),
+            "chroma": {"unfiltered": run(search_with(chroma), unfiltered, truths),
+                       "season_filter": run(search_with(chroma), filtered, filtered_truths)},
+            "flat": {"unfiltered": run(search_with(flat), unfiltered, truths),
+                     "season_filter": run(search_with(flat), filtered, filtered_truths)},
+        }
+
+        seconds, results = 0.0, []
+        for i in range(0, len(unfiltered), args.batch_size):
+            batch = [vector for vector, _ in unfiltered[i:i + args.batch_size]]
+            start = time.perf_counter()
+            results += [_chunk_ids(docs) for docs in flat.similarity_search_by_vectors(batch, k=args.k)]
+            seconds += time.perf_counter() - start
+        report["flat"]["batched_unfiltered"] = {
+            "batch_size": args.batch_size,
+            "per_query_ms": round(seconds * 1000.0 / max(len(unfiltered), 1), 3),
+            "recall": _recall(results, truths)
+        }
+
+        partition_dir = PARTITION_INDEX / args.series
+        if PartitionIndex.exists(partition_dir):
+            partition_index = PartitionIndex(partition_dir)
+            report["partition_index"] = {"season_filter": run(
+                lambda vector, metadata_filter: [chunk for chunk, _ in partition_index.search(
+                    vector, args.k, season=metadata_filter["season"]["$eq"])],
+                filtered, filtered_truths
+            )}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
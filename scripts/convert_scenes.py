@@ -0,0 +1,91 @@
+"""Convert a series' processed scene files between JSON and the columnar .scenes format.
+
+Rewrites the dialogue, audio-description and merged files, points the ingest manifest at the
+new files and deletes the old ones, so the next incremental run neither re-parses nor
+re-embeds anything. Set SCENE_STORE_FORMAT to the same format so new episodes match.
+Prints disk footprint and load time before and after.
+
+    python scripts/convert_scenes.py --series stranger_things --to columnar
+    python scripts/convert_scenes.py --series all --to json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.paths import DATA_PROCESSED, get_series_subtitle_files_paths  # pylint: disable=wrong-import-position
+from src.core.ingest_manifest import IngestManifest, MANIFEST_FILE  # pylint: disable=wrong-import-position
+from src.scene_store import iter_scene_files, read_scenes, scene_suffix, write_scenes  # pylint: disable=wrong-import-position
+
+
+def _timed_read(path):
+    start = time.perf_counter()
+    records = read_scenes(path)
+    return records, time.perf_counter() - start
+
+
+def convert_series(series_name: str, store_format: str) -> dict:
+    """Convert every processed scene file of a series to store_format; returns size and timing totals."""
+    suffix = scene_suffix(store_format)
+    _, _, proc_ad_files_path, proc_cs_files_path, merged_dir = get_series_subtitle_files_paths(series_name)
+    processed_dir = merged_dir.parent
+    report = {"files": 0, "bytes_before": 0, "bytes_after": 0, "load_seconds_before": 0.0, "load_seconds_after": 0.0}
+
+    renamed = {}
+    for directory in (proc_cs_files_path, proc_ad_files_path, merged_dir):
+        for path in iter_scene_files(directory):
+            if path.suffix == suffix:
+                continue
+            target = path.with_suffix(suffix)
+            records, seconds_before = _timed_read(path)
+            write_scenes(target, records)
+            converted, seconds_after = _timed_read(target)
+            if converted != records:
+                target.unlink()
+                raise ValueError(f"Round trip changed scenes in {path}")
+
+            report["files"] += 1
+            report["bytes_before"] += path.stat().st_size
+            report["bytes_after"] += target.stat().st_size
+            report["load_seconds_before"] += seconds_before
+            report["load_seconds_after"] += seconds_after
+            renamed[path.relative_to(processed_dir).as_posix()] = target.relative_to(processed_dir).as_posix()
+
+    # Manifest first, so an interrupted run never records outputs that were already deleted
+    manifest = IngestManifest.load(processed_dir / MANIFEST_FILE)
+    for record in manifest.episodes.values():
+        record["outputs"] = [renamed.get(output, output) for output in record["outputs"]]
+    manifest.save()
+    for old_path in renamed:
+        (processed_dir / old_path).unlink()
+    return report
+
+
+def main():
+    """Convert the requested series and print a JSON report."""
+    parser = argparse.ArgumentParser(description="Convert processed scene files between JSON and columnar")
+    parser.add_argument("--series", required=True, help='Series name, comma-separated list or "all"')
+    parser.add_argument("--to", dest="store_format", choices=["columnar", "json"], default="columnar")
+    args = parser.parse_args()
+
+    if args.series == "all":
+        series_names = sorted(p.name for p in DATA_PROCESSED.iterdir() if p.is_dir())
+    else:
+        series_names = [name.strip() for name in args.series.split(",") if name.strip()]
+
+    reports = {}
+    for series_name in series_names:
+        report = convert_series(series_name, args.store_format)
+        if report["bytes_after"]:
+            report["size_ratio"] = round(report["bytes_before"] / report["bytes_after"], 2)
+        if report["load_seconds_after"]:
+            report["load_speedup"] = round(report["load_seconds_before"] / report["load_seconds_after"], 2)
+        reports[series_name] = report
+        print(f"{series_name:30s} {json.dumps(report)}", file=sys.stderr)
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,9 @@ import os
 import sys
 import json
 import math
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, ContextManager, Dict, List, Optional
 
 # 1. Standart ve Üçüncü Parti Importlar (Pylint C0413 hatasını önlemek için en üstte)
 from dotenv import load_dotenv
@@ -35,8 +36,11 @@ logger = get_logger(__name__)
 class RAGASEvaluator:
     """Evaluate RAG system using RAGAS metrics and Gemini API."""
     
-    def __init__(self, test_set_path: str = "data/test/test_set.json"):
+    def __init__(self, test_set_path: str = "data/test/test_set.json",
+                 llm_slot: Callable[[], ContextManager] = nullcontext):
         self.test_set_path = test_set_path
+        # Held around each RAG query; the API passes a low-priority admission slot
+        self.llm_slot = llm_slot
         self.service = MultiSeriesService()
         self.results_dir = "data/test/results"
         os.makedirs(self.results_dir, exist_ok=True)
@@ -64,38 +68,41 @@ class RAGASEvaluator:
             data = json.load(f)
         return data['test_cases']
 
-    def run_query(self, test_case: Dict) -> Dict:
+    def run_query(self, test_case: Dict, use_local: Optional[bool] = None) -> Dict:
         """Run a single query through the RAG system."""
         question = test_case['question']
         series = test_case.get('series', 'stranger_things')
         
         logger.info(f"Processing: {question[:50]}...")
         
-        try:
-            result = self.service.query_single_series(
-                series_name=series,
-                query=question
-            )
-            # Sources listesinden content'leri çıkar
-            contexts = [src.get('content', '') if isinstance(src, dict) else getattr(src, 'content', '') 
-                        for src in result.sources]
-            
-            return {
-                'question': question,
-                'answer': result.answer,
-                'contexts': contexts,
-                'ground_truth': test_case['ground_truth']
-            }
-        except Exception as e:
-            logger.error(f"Error processing question: {e}")
-            return {
-                'question': question,
-                'answer': f"Error: {str(e)}",
-                'contexts': [],
-                'ground_truth': test_case['ground_truth']
-            }
+        # Taken outside the try: an admission rejection fails the run rather than one answer
+        with self.llm_slot():
+            try:
+                result = self.service.query_single_series(
+                    series_name=series,
+                    query=question,
+                    use_local=use_local
+                )
+                # Sources listesinden content'leri çıkar
+                contexts = [src.get('content', '') if isinstance(src, dict) else getattr(src, 'content', '') 
+                            for src in result.sources]
+                
+                return {
+                    'question': question,
+                    'answer': result.answer,
+                    'contexts': contexts,
+                    'ground_truth': test_case['ground_truth']
+                }
+            except Exception as e:
+                logger.error(f"Error processing question: {e}")
+                return {
+                    'question': question,
+                    'answer': f"Error: {str(e)}",
+                    'contexts': [],
+                    'ground_truth': test_case['ground_truth']
+                }
 
-    def evaluate_test_set(self) -> Dict:
+    def evaluate_test_set(self, use_local: Optional[bool] = None) -> Dict:
         """Evaluate entire test set using Gemini-backed RAGAS metrics."""
         test_cases = self.load_test_set()
         logger.info(f"Loaded {len(test_cases)} test cases")
@@ -103,7 +110,7 @@ class RAGASEvaluator:
         eval_data = []
         for i, test_case in enumerate(test_cases, 1):
             logger.info(f"[{i}/{len(test_cases)}] Running query...")
-            eval_data.append(self.run_query(test_case))
+            eval_data.append(self.run_query(test_case, use_local=use_local))
         
         # RAGAS Formatına Dönüştür
         dataset = Dataset.from_dict({
@@ -181,6 +188,10 @@ class RAGASEvaluator:
         logger.info(f"Results saved to: {output_path}")
         return output_path
 
+    def close(self):
+        """Release the RAG service's registry listener."""
+        self.service.close()
+
     def print_summary(self, results: Dict):
         """Print evaluation summary."""
         ragas_result = results['ragas_scores']
@@ -222,6 +233,8 @@ def main():
     except Exception as e:
         logger.error(f"Evaluation failed: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        evaluator.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Report memory saved and recall@k lost by int8 vector quantization on held-out queries.
+
+Reads a series' stored chunks from its configured vector store, holds out a random
+sample as queries, and indexes the rest twice in temporary NumPy flat stores: float32
+and int8. Recall@k is the overlap of the int8 store's top k with the float32 store's
+(exact) top k, for each rescoring factor, unfiltered and with the query chunk's season
+as filter. Memory is the bytes each store's search keeps resident.
+
+    python scripts/quantization_report.py --series stranger_things
+    python scripts/quantization_report.py --series breaking_bad --holdout 500 --k 5,20 --factors 1,4,8
+    python scripts/quantization_report.py --series stranger_things --questions questions.txt
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.paths import CHROMA_DB  # pylint: disable=wrong-import-position
+from src.flat_vector_store import FlatVectorStore  # pylint: disable=wrong-import-position
+from src.quantization import quantized_nbytes  # pylint: disable=wrong-import-position
+from src.vector_store import get_embeddings, open_vector_db  # pylint: disable=wrong-import-position
+
+
+def _build_store(directory, quantization, stored, rows):
+    store = FlatVectorStore(embedding_function=None, persist_dir=directory, quantization=quantization)
+    store.add_embeddings([stored["documents"][i] for i in rows], [stored["embeddings"][i] for i in rows],
+                         [stored["metadatas"][i] for i in rows], [stored["ids"][i] for i in rows])
+    store.compact()
+    return FlatVectorStore(embedding_function=None, persist_dir=directory, quantization=quantization)
+
+
+def _search(store, queries, k, filters, batch_size):
+    """Chunk IDs of the top k per query; queries sharing a filter are searched in batches."""
+    results, seconds = [None] * len(queries), 0.0
+    groups = {}
+    for i, metadata_filter in enumerate(filters):
+        groups.setdefault(json.dumps(metadata_filter, sort_keys=True), []).append(i)
+    for signature, indices in groups.items():
+        metadata_filter = json.loads(signature)
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            begin = time.perf_counter()
+            hits = store.similarity_search_by_vectors(queries[batch], k=k, filter=metadata_filter)
+            seconds += time.perf_counter() - begin
+            for i, docs in zip(batch, hits):
+                results[i] = [doc.metadata.get("chunk_id") for doc in docs]
+    return results, seconds * 1000.0 / max(len(queries), 1)
+
+
+def _recall(results, truths):
+    return round(float(np.mean([len(set(r) & set(t)) / max(len(t), 1) for r, t in zip(results, truths)])), 4)
+
+
+def main():
+    """Build float32 and int8 stores for one series and print a JSON report."""
+    parser = argparse.ArgumentParser(description="Measure int8 quantization memory savings and recall loss")
+    parser.add_argument("--series", required=True)
+    parser.add_argument("--holdout", type=int, default=200, help="Chunks held out of the index as queries")
+    parser.add_argument("--questions", help="File with one natural-language question per line, used as queries")
+    parser.add_argument("--k", default="5,20", help="Comma-separated k values")
+    parser.add_argument("--factors", default="1,2,4,8,16", help="Comma-separated rescoring factors")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    ks = [int(k) for k in args.k.split(",")]
+    factors = [int(factor) for factor in args.factors.split(",")]
+
+    rng = np.random.default_rng(args.seed)
+    embedder = get_embeddings()
+    stored = open_vector_db(embedder, args.series, CHROMA_DB / args.series).get(
+        include=["embeddings", "documents", "metadatas"])
+    if not stored["ids"]:
+        sys.exit(f"No vectors stored for {args.series}")
+    for i, chunk in enumerate(stored["ids"]):
+        stored["metadatas"][i] = {**(stored["metadatas"][i] or {}), "chunk_id": chunk}
+
+    order = rng.permutation(len(stored["ids"]))
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        queries = np.asarray(embedder.embed_queries(questions), dtype=np.float32)
+        index_rows = order.tolist()
+        seasons = sorted({m.get("season") for m in stored["metadatas"] if m.get("season") is not None})
+        query_seasons = [seasons[i % len(seasons)] if seasons else None for i in range(len(queries))]
+    else:
+        held_out, index_rows = order[:args.holdout], order[args.holdout:].tolist()
+        queries = np.asarray([stored["embeddings"][i] for i in held_out], dtype=np.float32)
+        query_seasons = [stored["metadatas"][i].get("season") for i in held_out]
+    unfiltered = [None] * len(queries)
+    season_filters = [{"season": {"$eq": season}} if season is not None else None for season in query_seasons]
+
+    with tempfile.TemporaryDirectory() as float_dir, tempfile.TemporaryDirectory() as int8_dir:
+        exact_store = _build_store(float_dir, "none", stored, index_rows)
+        int8_store = _build_store(int8_dir, "int8", stored, index_rows)
+        exact_view = exact_store._live_view()  # pylint: disable=protected-access
+        float_bytes = int(exact_view["vectors"].nbytes + exact_view["sq_norms"].nbytes)
+        int8_bytes = quantized_nbytes(int8_store._live_view()["quantized"])  # pylint: disable=protected-access
+
+        report = {
+            "series": args.series,
+            "indexed_chunks": len(index_rows),
+            "queries": len(queries),
+            "dimension": int(queries.shape[1]),
+            "memory": {"float32_bytes": float_bytes, "int8_bytes": int8_bytes,
+                       "reduction": round(float_bytes / max(int8_bytes, 1), 2)},
+            "results": []
+        }
+        for k in ks:
+            for label, filters in (("unfiltered", unfiltered), ("season_filter", season_filters)):
+                truths, exact_ms = _search(exact_store, queries, k, filters, args.batch_size)
+                for factor in factors:
+                    int8_store.rescore_factor = factor
+                    results, int8_ms = _search(int8_store, queries, k, filters, args.batch_size)
+                    recall = _recall(results, truths)
+                    report["results"].append({
+                        "k": k, "filter": label, "rescore_factor": factor, "recall": recall,
+                        "recall_lost": round(1.0 - recall, 4),
+                        "float32_ms_per_query": round(exact_ms, 3), "int8_ms_per_query": round(int8_ms, 3)
+                    })
+                    print(f"k={k:<3d} {label:14s} factor={factor:<3d} recall={recall:.4f} "
+                          f"float32 {exact_ms:.2f}ms int8 {int8_ms:.2f}ms", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Semantic answer cache for near-duplicate questions."""
+import copy
+import re
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from config.constants import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_EVICTION
+)
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def numeric_signature(query: str) -> str:
+    """Numbers in the question (season/episode mentions) that a cached answer must share."""
+    return ",".join(_NUMBER_PATTERN.findall(query))
+
+
+class SemanticAnswerCache:
+    """Fixed-capacity cache of API responses looked up by question-embedding similarity.
+    
+    Question embeddings live in one preallocated float32 matrix, so a lookup is a single
+    matrix-vector product masked by the request constraints (series, season, episode,
+    backend, numbers mentioned in the question). When full, the least recently used
+    ("lru") or least frequently used ("lfu") entry is replaced.
+    """
+    
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                 eviction: str = ANSWER_CACHE_EVICTION):
+        if eviction not in ("lru", "lfu"):
+            raise ValueError("eviction must be 'lru' or 'lfu'")
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.eviction = eviction
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._last_access = np.zeros(max_entries, dtype=np.float64)
+        self._hit_counts = np.zeros(max_entries, dtype=np.int64)
+        self._constraint_ids = np.full(max_entries, -1, dtype=np.int64)
+        # Only constraint tuples of live entries are indexed, so the index is bounded by max_entries
+        self._constraint_index = {}
+        self._constraint_refs = {}
+        self._next_constraint_id = 0
+        self._constraints = [None] * max_entries
+        self._series_sets = [frozenset()] * max_entries
+        self._payloads = [None] * max_entries
+        self._counters = {"hits": 0, "misses": 0, "inserts": 0, "evictions": 0, "invalidations": 0}
+    
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+    
+    def lookup(self, vector: Sequence[float], constraints: Tuple) -> Optional[Dict]:
+        """Return a copy of the most similar cached response matching constraints, if above threshold."""
+        query_vec = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None or not self._valid.any():
+                self._counters["misses"] += 1
+                return None
+            constraint_id = self._constraint_index.get(constraints)
+            if constraint_id is None:
+                self._counters["misses"] += 1
+                return None
+            mask = self._valid & (self._constraint_ids == constraint_id)
+            if not mask.any():
+                self._counters["misses"] += 1
+                return None
+            
+            sims = self._vectors @ query_vec
+            sims[~mask] = -np.inf
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self._counters["misses"] += 1
+                return None
+            
+            self._last_access[best] = time.monotonic()
+            self._hit_counts[best] += 1
+            self._counters["hits"] += 1
+            logger.info("Answer cache hit (similarity %.3f)", sims[best])
+            return copy.deepcopy(self._payloads[best])
+    
+    def insert(self, vector: Sequence[float], constraints: Tuple, payload: Dict) -> None:
+        """Store a response; series_queried in the payload drives index invalidation."""
+        vec = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            if vec.shape[0] != self._vectors.shape[1]:
+                logger.warning("Embedding dimension changed, clearing answer cache")
+                for i in np.flatnonzero(self._valid):
+                    self._release(int(i))
+                self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            
+            free = np.flatnonzero(~self._valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = self._victim()
+                self._release(slot)
+                self._counters["evictions"] += 1
+            
+            self._vectors[slot] = vec
+            self._valid[slot] = True
+            self._last_access[slot] = time.monotonic()
+            self._hit_counts[slot] = 0
+            if constraints not in self._constraint_index:
+                self._constraint_index[constraints] = self._next_constraint_id
+                self._next_constraint_id += 1
+            self._constraint_refs[constraints] = self._constraint_refs.get(constraints, 0) + 1
+            self._constraint_ids[slot] = self._constraint_index[constraints]
+            self._constraints[slot] = constraints
+            self._series_sets[slot] = frozenset(payload.get("series_queried", [])) | {constraints[0]}
+            self._payloads[slot] = copy.deepcopy(payload)
+            self._counters["inserts"] += 1
+    
+    def _release(self, slot: int) -> None:
+        """Invalidate a live slot; its constraint tuple is forgotten with the last entry using it."""
+        constraints = self._constraints[slot]
+        self._valid[slot] = False
+        self._payloads[slot] = None
+        self._constraints[slot] = None
+        self._constraint_ids[slot] = -1
+        self._constraint_refs[constraints] -= 1
+        if not self._constraint_refs[constraints]:
+            del self._constraint_refs[constraints]
+            del self._constraint_index[constraints]
+    
+    def _victim(self) -> int:
+        if self.eviction == "lfu":
+            return int(np.lexsort((self._last_access, self._hit_counts))[0])
+        return int(np.argmin(self._last_access))
+    
+    def invalidate_series(self, series_name: Optional[str] = None) -> None:
+        """Drop entries that used the series' index (everything if series_name is None)."""
+        with self._lock:
+            dropped = 0
+            for i in np.flatnonzero(self._valid):
+                if series_name is None or series_name in self._series_sets[i]:
+                    self._release(int(i))
+                    dropped += 1
+            self._counters["invalidations"] += dropped
+        if dropped:
+            logger.info("Answer cache: dropped %d entries for %s", dropped, series_name or "all series")
+    
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = int(self._valid.sum())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["capacity"] = self.max_entries
+        return stats
@@ -0,0 +1,250 @@
+"""Bulk query execution with deduplication, batched embedding and grouped retrieval."""
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple
+from config.constants import RETRIEVAL_K, RETRIEVAL_MODE, HYBRID_FETCH_K, BATCH_MAX_CONCURRENCY
+from src.core.hybrid_retriever import fuse_with_lexical, lexical_search
+from src.core.partition_retriever import partition_search
+from src.flat_vector_store import FlatVectorStore
+from src.core.pipeline import build_metadata_filter, parse_filter_values
+from src.core.context_packer import pack_documents, token_budget_for
+from src.core.registry import registry
+from src.core.scheduler import admission, current_priority, PRIORITY_BATCH
+from src.prompts.rewrite_prompt import arewrite_query
+from src.vector_store import get_embeddings
+from src.utils.concurrency import run_blocking
+from src.utils.text_processing import normalize_query, split_search_query
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BatchQueryRunner:
+    """Run many /ask-style requests as one job.
+    
+    Identical requests are answered once. All rewritten queries are embedded in a
+    single embed_queries call, retrievals are grouped by (series, metadata filter)
+    so each group resolves its store and filter once, and generations run with at most
+    BATCH_MAX_CONCURRENCY in flight. LLM calls are admitted at batch priority, behind
+    interactive /ask traffic.
+    """
+    
+    def __init__(self, service, max_concurrency: int = BATCH_MAX_CONCURRENCY):
+        self.service = service
+        self.max_concurrency = max_concurrency
+    
+    @staticmethod
+    def _request_key(item: Dict) -> Tuple:
+        return (normalize_query(item["query"]), item.get("series", "stranger_things"),
+                item.get("season"), item.get("episode"), registry.backend(item.get("use_local")))
+    
+    async def _rewrite_all(self, queries: List[str]) -> Tuple[Dict, Dict]:
+        """Return (rewrites, errors), both keyed by query; a failed rewrite fails only its own items."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        rewrites, errors = {}, {}
+        
+        async def rewrite(query):
+            try:
+                async with semaphore:
+                    rewrites[query] = await arewrite_query(query)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Batch rewrite failed for %r: %s", query[:50], e)
+                errors[query] = str(e)
+        
+        await asyncio.gather(*(rewrite(q) for q in queries))
+        return rewrites, errors
+    
+    def _plan(self, unique_items: Dict[Tuple, Dict], rewrites: Dict) -> List[Dict]:
+        """Expand each unique request into per-series units."""
+        units = []
+        for key, item in unique_items.items():
+            rewrite = rewrites[item["query"]]
+            series = item.get("series", "stranger_things")
+            auto_detected = False
+            target_series = [series]
+            if series == "all":
+                detected = self.service.detect_target_series(item["query"], rewrite)
+                auto_detected = detected is not None
+                target_series = [detected] if auto_detected else list(self.service.AVAILABLE_SERIES)
+            item["auto_detected"] = auto_detected
+            item["target_series"] = target_series
+            filters = rewrite.filters_for(item.get("season"), item.get("episode"))
+            for series_name in target_series:
+                units.append({
+                    "key": key,
+                    "series": series_name,
+                    "rewrite": rewrite,
+                    "metadata_filter": build_metadata_filter(filters),
+                    "filter_values": parse_filter_values(filters),
+                    "use_local": item.get("use_local")
+                })
+        return units
+    
+    async def _retrieve_all(self, units: List[Dict]) -> None:
+        """Embed all rewritten queries at once, then search each (series, filter) group.
+        
+        Retrieval follows RETRIEVAL_MODE like the interactive path: with a lexical index,
+        hybrid mode embeds only the question and fuses it with BM25 over the search terms.
+        Season/episode-filtered dense searches use the series' partition index when it has one;
+        on the NumPy backend each group's dense searches run as one batched search.
+        """
+        series_names = {u["series"] for u in units}
+        lexical_indexes = {}
+        if RETRIEVAL_MODE != "vector":
+            lexical_indexes = {name: await run_blocking(registry.get_lexical_index, name)
+                               for name in series_names}
+        partition_indexes = {}
+        if any(u["filter_values"] for u in units):
+            partition_indexes = {name: await run_blocking(registry.get_partition_index, name)
+                                 for name in series_names}
+        for unit in units:
+            query = unit["rewrite"].optimized_query
+            unit["dense_query"] = split_search_query(query)[0] if lexical_indexes.get(unit["series"]) else query
+        
+        texts = list(dict.fromkeys(u["dense_query"] for u in units
+                                   if not (RETRIEVAL_MODE == "lexical" and lexical_indexes.get(u["series"]))))
+        vectors = dict(zip(texts, await run_blocking(get_embeddings().embed_queries, texts))) if texts else {}
+        logger.info("Batch: embedded %d distinct queries for %d retrievals", len(texts), len(units))
+        
+        groups = {}
+        for unit in units:
+            group_key = (unit["series"], registry.filter_signature(unit["metadata_filter"]))
+            groups.setdefault(group_key, []).append(unit)
+        
+        def search_group(group_units):
+            series_name = group_units[0]["series"]
+            try:
+                vector_store = registry.get_vector_store(series_name)
+                lexical_index = lexical_indexes.get(series_name)
+                partition_index = partition_indexes.get(series_name)
+                metadata_filter = group_units[0]["metadata_filter"]
+                
+                lexical_only = lexical_index is not None and RETRIEVAL_MODE == "lexical"
+                batched = {}
+                if isinstance(vector_store, FlatVectorStore) and not lexical_only:
+                    dense_queries = list(dict.fromkeys(u["dense_query"] for u in group_units))
+                    hits = vector_store.similarity_search_by_vectors(
+                        [vectors[q] for q in dense_queries],
+                        k=RETRIEVAL_K if lexical_index is None else HYBRID_FETCH_K,
+                        filter=metadata_filter
+                    )
+                    batched = dict(zip(dense_queries, hits))
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Batch retrieval failed for %s: %s", series_name, e)
+                return
+            
+            def dense_search(unit, k):
+                if unit["dense_query"] in batched:
+                    return batched[unit["dense_query"]]
+                if partition_index is not None and unit["filter_values"]:
+                    return partition_search(partition_index, vector_store, vectors[unit["dense_query"]],
+                                            unit["filter_values"], k)
+                return vector_store.similarity_search_by_vector(vectors[unit["dense_query"]], k=k,
+                                                                filter=metadata_filter)
+            
+            for unit in group_units:
+                query = unit["rewrite"].optimized_query
+                # One failing unit leaves the rest of its group searchable
+                try:
+                    if lexical_only:
+                        docs = lexical_search(lexical_index, query, unit["filter_values"])[:RETRIEVAL_K]
+                    elif lexical_index is not None:
+                        dense_docs = dense_search(unit, HYBRID_FETCH_K)
+                        docs = fuse_with_lexical(lexical_index, query, dense_docs, unit["filter_values"])
+                    else:
+                        docs = dense_search(unit, RETRIEVAL_K)
+                    unit["docs"] = pack_documents(docs, token_budget_for(unit["use_local"]))
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error("Batch retrieval failed for %s (%r): %s", series_name, query[:50], e)
+        
+        await asyncio.gather(*(run_blocking(search_group, g) for g in groups.values()))
+    
+    async def _generate(self, unit: Dict, semaphore: asyncio.Semaphore) -> None:
+        if "docs" not in unit:
+            return
+        async with semaphore:
+            answer_chain = await run_blocking(registry.get_answer_chain, unit["use_local"])
+            async with admission.slot(unit["use_local"]):
+                unit["answer"] = await answer_chain.ainvoke({
+                    "input": unit["rewrite"].optimized_query,
+                    "context": unit["docs"]
+                })
+    
+    def _build_response(self, item: Dict, units: List[Dict]) -> Dict:
+        # pylint: disable=protected-access
+        results = [
+            self.service._build_result(u["series"], {"answer": u["answer"], "context": u["docs"]},
+                                       u["rewrite"].optimized_query)
+            for u in units if "answer" in u
+        ]
+        if not results:
+            return {"status": "error", "message": "No series could be queried"}
+        if item.get("series", "stranger_things") != "all":
+            result = results[0]
+            return {
+                "status": "success",
+                "original_query": item["query"],
+                "optimized_query": result.optimized_query,
+                "answer": result.answer,
+                "sources": result.sources,
+                "source_count": len(result.sources)
+            }
+        if item["auto_detected"]:
+            return self.service._format_single_series_response(results[0], auto_detected=True)
+        return self.service._merge_series_results(item["query"], results)
+    
+    async def aiter_results(self, items: List[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        """Yield (input_index, response) pairs as each distinct request completes."""
+        priority_token = current_priority.set(PRIORITY_BATCH)
+        try:
+            async for index, response in self._aiter_results(items):
+                yield index, response
+        finally:
+            current_priority.reset(priority_token)
+    
+    async def _aiter_results(self, items: List[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        positions = {}
+        unique_items = {}
+        for index, item in enumerate(items):
+            key = self._request_key(item)
+            positions.setdefault(key, []).append(index)
+            unique_items.setdefault(key, dict(item))
+        logger.info("Batch: %d requests, %d distinct", len(items), len(unique_items))
+        
+        rewrites, errors = await self._rewrite_all(list(dict.fromkeys(i["query"] for i in unique_items.values())))
+        failed = {key: item for key, item in unique_items.items() if item["query"] in errors}
+        for key, item in failed.items():
+            for index in positions[key]:
+                yield index, {"status": "error", "message": f"Query rewrite failed: {errors[item['query']]}"}
+        units = self._plan({k: v for k, v in unique_items.items() if k not in failed}, rewrites)
+        await self._retrieve_all(units)
+        
+        units_by_key = {}
+        for unit in units:
+            units_by_key.setdefault(unit["key"], []).append(unit)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def answer(key):
+            try:
+                await asyncio.gather(*(self._generate(u, semaphore) for u in units_by_key[key]))
+                return key, self._build_response(unique_items[key], units_by_key[key])
+            except Exception as e:  # pylint: disable=broad-except
+                # One failed item must not sink the rest of the batch
+                logger.error("Batch item failed: %s", e)
+                return key, {"status": "error", "message": str(e)}
+        
+        tasks = [asyncio.ensure_future(answer(key)) for key in units_by_key]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, response = await next_done
+                for index in positions[key]:
+                    yield index, response
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def run(self, items: List[Dict]) -> List[Dict]:
+        """Return responses in input order."""
+        responses = [None] * len(items)
+        async for index, response in self.aiter_results(items):
+            responses[index] = response
+        return responses
@@ -0,0 +1,92 @@
+"""Context packing between retrieval and generation."""
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from config.constants import CONTEXT_TOKEN_BUDGET, CHARS_PER_TOKEN, USE_LOCAL_LLM
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (characters / CHARS_PER_TOKEN)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def token_budget_for(use_local: Optional[bool] = None) -> int:
+    """Prompt context budget for the backend."""
+    is_local = use_local if use_local is not None else USE_LOCAL_LLM
+    return CONTEXT_TOKEN_BUDGET["local" if is_local else "google"]
+
+
+def _scene_key(doc: Document) -> tuple:
+    meta = doc.metadata
+    return (meta.get("series"), meta.get("episode"), meta.get("scene_id"))
+
+
+def _chronological_key(span: Dict) -> tuple:
+    meta = span["metadata"]
+    return (meta.get("season") or 0, meta.get("episode_num") or 0, str(meta.get("episode")),
+            meta.get("scene_id") or 0, span["start"])
+
+
+def _merge_scene_chunks(chunks: List[tuple]) -> List[Dict]:
+    """Merge (rank, doc) chunks of one scene into non-overlapping spans using start_index."""
+    chunks = sorted(chunks, key=lambda c: c[1].metadata.get("start_index", 0))
+    spans = []
+    for rank, doc in chunks:
+        start = doc.metadata.get("start_index", 0)
+        text = doc.page_content
+        if spans and start <= spans[-1]["end"]:
+            span = spans[-1]
+            overlap = span["end"] - start
+            if overlap < len(text):
+                span["text"] += text[overlap:]
+                span["end"] = start + len(text)
+            span["rank"] = min(span["rank"], rank)
+            continue
+        spans.append({"rank": rank, "start": start, "end": start + len(text),
+                      "text": text, "metadata": dict(doc.metadata)})
+    return spans
+
+
+def pack_documents(docs: List[Document], token_budget: int) -> List[Document]:
+    """Merge overlapping chunks of the same scene, keep best-ranked spans within budget, order by time.
+    
+    Chunks from text_splitter overlap by CHUNK_OVERLAP characters; merging them by
+    start_index removes the repeated text. Spans are admitted in retrieval rank order
+    until token_budget is used, then emitted chronologically (season, episode, scene).
+    """
+    if not docs:
+        return []
+    
+    by_scene = {}
+    for rank, doc in enumerate(docs):
+        by_scene.setdefault(_scene_key(doc), []).append((rank, doc))
+    
+    spans = [span for chunks in by_scene.values() for span in _merge_scene_chunks(chunks)]
+    spans.sort(key=lambda s: s["rank"])
+    
+    selected = []
+    used = 0
+    for span in spans:
+        cost = estimate_tokens(span["text"])
+        if used + cost > token_budget:
+            if selected:
+                continue
+            # Always keep the best span, truncated to the budget
+            span["text"] = span["text"][:token_budget * CHARS_PER_TOKEN]
+            cost = estimate_tokens(span["text"])
+        selected.append(span)
+        used += cost
+    
+    selected.sort(key=_chronological_key)
+    input_tokens = sum(estimate_tokens(d.page_content) for d in docs)
+    logger.info("Packed %d chunks into %d spans: ~%d → ~%d tokens (budget %d)",
+                len(docs), len(selected), input_tokens, used, token_budget)
+    
+    packed = []
+    for span in selected:
+        metadata = span["metadata"]
+        metadata["start_index"] = span["start"]
+        packed.append(Document(page_content=span["text"], metadata=metadata))
+    return packed
@@ -1,67 +1,337 @@
 """Data processing module for creating vector databases from raw subtitle files."""
-from src.preprocessing.srt_parser import save_srt_scenes_to_json
-from src.preprocessing.excel_parser import save_excel_scenes_to_json
-from src.vector_store import embeddings, text_splitter, get_or_create_vector_db
-from config.paths import get_series_paths, get_series_subtitle_files_paths
-from src.utils.data_loader import load_scenes_as_documents
+from src.preprocessing.srt_parser import save_srt_file_to_json
+from src.preprocessing.excel_parser import save_excel_file_to_json
+from src.vector_store import (
+    get_embeddings, get_text_splitter, open_vector_db, upsert_chunks, compact_vector_db,
+    vector_db_needs_compaction, mark_index_rebuilt
+)
+from config.constants import (
+    CHUNK_SIZE, CHUNK_OVERLAP, VECTOR_UPSERT_BATCH_SIZE, INGEST_PREFETCH_BATCHES, PARTITIONED_RETRIEVAL,
+    VECTOR_BACKEND
+)
+from config.paths import get_series_paths, get_series_subtitle_files_paths, LEXICAL_INDEX, PARTITION_INDEX
+from src.utils.data_loader import load_scene_file_as_documents, extract_season_episode
 from src.preprocessing.merger import merge_json_files
+from src.core.ingest_manifest import IngestManifest, MANIFEST_FILE, chunk_id
+from src.core.query_analyzer import build_gazetteer
+from src.lexical_index import BM25Index, build_lexical_index
+from src.partition_index import PartitionIndex, build_partition_index
+from src.utils.concurrency import bounded_prefetch
+from src.utils.file_io import copy_file_atomic
 from src.utils.logging import get_logger
-import shutil
+from concurrent.futures import as_completed
+import os
+import time
 
 logger = get_logger(__name__)
 
 
-def process_series(series_name):
-    """Process raw SRT and Excel files to create merged JSON files."""
-    logger.info("Processing series: %s", series_name)
-    
-    _, _, chroma_db_dir = get_series_paths(series_name)
-    raw_ad_files_path, raw_cs_files_path, proc_ad_files_path, proc_cs_files_path, proc_merged_path = get_series_subtitle_files_paths(series_name)
+def _discover_episodes(raw_cs_files_path, raw_ad_files_path):
+    """Map episode key ("<season dir>/<stem>") to its raw dialogue SRT and optional action Excel."""
+    episodes = {}
+    for srt_path in sorted(raw_cs_files_path.rglob("*.srt")):
+        relative_path = srt_path.relative_to(raw_cs_files_path)
+        episodes[(relative_path.parent / relative_path.stem).as_posix()] = {"dialogue": srt_path}
+    for excel_path in sorted(raw_ad_files_path.rglob("*.xlsx")):
+        relative_path = excel_path.relative_to(raw_ad_files_path)
+        key = (relative_path.parent / relative_path.stem.replace("_audio_description", "")).as_posix()
+        if key in episodes:
+            episodes[key]["action"] = excel_path
+        else:
+            logger.warning("Audio description without subtitles, skipping: %s", excel_path.name)
+    return episodes
 
-    # Process SRT files
-    logger.info("Processing SRT files...")
-    save_srt_scenes_to_json(raw_cs_files_path, proc_cs_files_path)
+
+def _process_episode(episode, paths):
+    """Re-parse and re-merge one episode.
     
-    # Process Excel files if they exist
-    action_files_dict = {}
-    if any(raw_ad_files_path.rglob("*.xlsx")):
-        logger.info("Processing audio descriptions...")
-        save_excel_scenes_to_json(raw_ad_files_path, proc_ad_files_path, is_action=True)
-        
-        # Build action files dictionary
-        for action_file in proc_ad_files_path.rglob("*.json"):
-            relative_path = action_file.relative_to(proc_ad_files_path)
-            base_name = action_file.stem.replace("_audio_description", "")
-            action_files_dict[(relative_path.parent, base_name)] = action_file
-    
-    # Merge or copy dialogue files
-    logger.info("Creating merged files...")
-    for dialogue_file in proc_cs_files_path.rglob("*.json"):
-        relative_path = dialogue_file.relative_to(proc_cs_files_path)
-        output_file = proc_merged_path / relative_path.parent / (dialogue_file.stem + "_merged.json")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+    Returns (processed-relative output paths with the merged file last, per-stage seconds).
+    """
+    raw_ad_files_path, raw_cs_files_path, proc_ad_files_path, proc_cs_files_path, proc_merged_path = paths
+    processed_dir = proc_merged_path.parent
+    timings = {}
+    
+    start = time.perf_counter()
+    dialogue_file = save_srt_file_to_json(episode["dialogue"], raw_cs_files_path, proc_cs_files_path, force=True)
+    timings["srt"] = time.perf_counter() - start
+    relative_path = dialogue_file.relative_to(proc_cs_files_path)
+    output_file = proc_merged_path / relative_path.parent / (dialogue_file.stem + "_merged" + dialogue_file.suffix)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    outputs = [dialogue_file]
+    
+    if "action" in episode:
+        start = time.perf_counter()
+        action_file = save_excel_file_to_json(episode["action"], raw_ad_files_path, proc_ad_files_path,
+                                              is_action=True, force=True)
+        timings["excel"] = time.perf_counter() - start
+        outputs.append(action_file)
         
-        action_file = action_files_dict.get((relative_path.parent, dialogue_file.stem))
-        if action_file:
-            merge_json_files(str(dialogue_file), str(action_file), str(output_file))
+        start = time.perf_counter()
+        # Merge beside the target and swap it in only on success, so a failed re-merge keeps
+        # the previous merged file that the manifest still points to
+        merging_file = output_file.with_name(f".{output_file.stem}.{os.getpid()}.merging{output_file.suffix}")
+        try:
+            merge_json_files(str(dialogue_file), str(action_file), str(merging_file))
+            if not merging_file.exists():
+                raise OSError(f"Merge produced no output for {dialogue_file.name}")
+            copy_file_atomic(merging_file, output_file)
+        finally:
+            merging_file.unlink(missing_ok=True)
+        timings["merge"] = time.perf_counter() - start
+    else:
+        copy_file_atomic(dialogue_file, output_file)
+    outputs.append(output_file)
+    
+    return [p.relative_to(processed_dir).as_posix() for p in outputs], timings
+
+
+def _process_episode_task(key, episode, paths):
+    """Pool task for one episode. Never raises, so one bad file cannot stop the run."""
+    start = time.perf_counter()
+    try:
+        outputs, timings = _process_episode(episode, paths)
+        error = None
+    except Exception as e:  # pylint: disable=broad-except
+        outputs, timings, error = None, {}, f"{type(e).__name__}: {e}"
+    return {"key": key, "outputs": outputs, "timings": timings,
+            "seconds": time.perf_counter() - start, "error": error}
+
+
+def _process_episodes(keys, episodes, paths, executor=None):
+    """Process episodes inline or fanned out over executor; returns results keyed by episode."""
+    if executor is None:
+        results = (_process_episode_task(key, episodes[key], paths) for key in keys)
+    else:
+        futures = {executor.submit(_process_episode_task, key, episodes[key], paths): key for key in keys}
+        results = (
+            future.result() if future.exception() is None else
+            {"key": futures[future], "outputs": None, "timings": {}, "seconds": 0.0,
+             "error": f"{type(future.exception()).__name__}: {future.exception()}"}
+            for future in as_completed(futures)
+        )
+    
+    by_key = {}
+    for result in results:
+        by_key[result["key"]] = result
+        if result["error"]:
+            logger.error("Failed to process %s: %s", result["key"], result["error"])
         else:
-            shutil.copy(str(dialogue_file), str(output_file))
-
-    logger.info("Loading merged data...")
-    clean_data = load_scenes_as_documents(proc_merged_path, series_name)
-
-    logger.info("Splitting documents into chunks...")
-    docs = []
-    if clean_data:
-        docs = text_splitter.split_documents(clean_data)
-    logger.info("Created %d document chunks", len(docs))
-
-    logger.info("Creating/updating vector database...")
-    get_or_create_vector_db(
-        docs=docs, 
-        embedder=embeddings, 
-        collection_name=series_name,
-        persist_dir=chroma_db_dir
+            stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["timings"].items())
+            logger.info("Processed %s in %.2fs (%s)", result["key"], result["seconds"], stages)
+    
+    slowest = sorted(by_key.values(), key=lambda r: r["seconds"], reverse=True)[:5]
+    if slowest:
+        logger.info("Slowest episodes: %s", ", ".join(f"{r['key']} {r['seconds']:.2f}s" for r in slowest))
+    return by_key
+
+
+def _chunk_episode(merged_file, series_name):
+    """Split one merged episode into chunks with deterministic IDs (also stored as metadata)."""
+    docs = get_text_splitter().split_documents(load_scene_file_as_documents(merged_file, series_name))
+    for doc in docs:
+        doc.metadata["chunk_id"] = chunk_id(doc)
+    return docs
+
+
+def _iter_chunk_batches(keys, outputs, previous_ids, processed_dir, series_name, batch_size):
+    """Stream episodes -> chunks -> batches of at most batch_size chunks not yet stored.
+    
+    Yields (docs, finished): finished lists (key, chunk_ids, stale_ids) for episodes whose
+    new chunks are all in this batch or an earlier one, so they can be checkpointed once
+    the batch is stored. Only one episode's chunks and one batch are held at a time.
+    """
+    batch, finished = [], []
+    for key in keys:
+        docs = _chunk_episode(processed_dir / outputs[key][-1], series_name)
+        chunk_ids = [doc.metadata["chunk_id"] for doc in docs]
+        previous = previous_ids.get(key, set())
+        for doc in docs:
+            if doc.metadata["chunk_id"] in previous:
+                continue
+            batch.append(doc)
+            if len(batch) == batch_size:
+                yield batch, finished
+                batch, finished = [], []
+        finished.append((key, chunk_ids, previous - set(chunk_ids)))
+    if batch or finished:
+        yield batch, finished
+
+
+def _index_episodes(vector_store, manifest, keys, outputs, fingerprints, processed_dir, series_name,
+                    batch_size=VECTOR_UPSERT_BATCH_SIZE):
+    """Embed and store the episodes' chunks batch by batch, checkpointing the manifest after each.
+    
+    Chunking runs in a background thread at most INGEST_PREFETCH_BATCHES ahead of embedding.
+    If a batch fails, everything stored before it is already recorded and a re-run resumes
+    there; chunk IDs are deterministic, so re-adding part of an episode is harmless.
+    """
+    previous_ids = {key: set(manifest.episodes.get(key, {}).get("chunk_ids", [])) for key in keys}
+    batches = bounded_prefetch(
+        _iter_chunk_batches(keys, outputs, previous_ids, processed_dir, series_name, batch_size),
+        INGEST_PREFETCH_BATCHES
     )
+    logger.info("Indexing %d episodes in batches of %d chunks...", len(keys), batch_size)
+    
+    start = time.perf_counter()
+    added, removed, episodes_done = 0, 0, 0
+    try:
+        for batch_number, (docs, finished) in enumerate(batches, start=1):
+            if docs:
+                vector_store.add_documents(docs, ids=[doc.metadata["chunk_id"] for doc in docs])
+            stale_ids = [chunk for _, _, stale in finished for chunk in stale]
+            for i in range(0, len(stale_ids), batch_size):
+                vector_store.delete(ids=stale_ids[i:i + batch_size])
+            for key, chunk_ids, _ in finished:
+                manifest.update(key, fingerprints[key], outputs[key], chunk_ids)
+            manifest.save()
+            
+            added += len(docs)
+            removed += len(stale_ids)
+            episodes_done += len(finished)
+            elapsed = time.perf_counter() - start
+            logger.info("Batch %d: %d chunks stored (%.1f chunks/s), %d/%d episodes indexed",
+                        batch_number, added, added / max(elapsed, 1e-9), episodes_done, len(keys))
+    except Exception:
+        logger.error("Indexing stopped after %d chunks with %d/%d episodes checkpointed; re-run to resume",
+                     added, episodes_done, len(keys))
+        raise
+    finally:
+        # Stop the prefetch thread now rather than when the traceback releases the generator
+        batches.close()
+    
+    logger.info("Vector store updated: %d chunks added, %d removed", added, removed)
+
+
+def _indexable_records(manifest, processed_dir, failed):
+    """Manifest records the lexical and partition indexes are rebuilt from.
+    
+    Episodes that failed this run still hold their previous record; they and episodes whose
+    merged file is missing are left out, so one bad episode cannot fail the rebuild.
+    """
+    records = {}
+    for key, record in manifest.episodes.items():
+        if key in failed:
+            continue
+        if not record.get("outputs") or not (processed_dir / record["outputs"][-1]).exists():
+            logger.warning("No merged file for %s, leaving it out of the indexes", key)
+            continue
+        records[key] = record
+    return records
+
+
+def _rebuild_lexical_index(records, processed_dir, series_name, index_dir):
+    """Rebuild the BM25 index over the merged files of the given manifest records."""
+    merged_files = sorted(processed_dir / record["outputs"][-1] for record in records.values())
+    logger.info("Building BM25 lexical index over %d episodes...", len(merged_files))
+    return build_lexical_index(
+        (doc for merged_file in merged_files for doc in _chunk_episode(merged_file, series_name)), index_dir
+    )
+
+
+def process_series(series_name, force=False, executor=None):
+    """Bring processed JSON, vector store, lexical and partition indexes up to date with the raw files.
+    
+    A per-series manifest records source hashes, outputs and chunk IDs, so only episodes
+    whose sources changed are re-parsed, re-merged and upserted; removed episodes are
+    deleted. force re-processes everything. Changing the embedding model or chunking
+    re-embeds every episode (from the existing merged files, without re-parsing).
+    
+    With an executor (a process pool), per-episode parse and merge tasks run in parallel.
+    Chunks stream to the vector store in fixed-size batches with the manifest checkpointed
+    after each, so memory stays bounded and an interrupted run resumes where it stopped.
+    Returns {"episodes", "processed", "failed": {episode: error}, "seconds"}.
+    """
+    run_start = time.perf_counter()
+    logger.info("Processing series: %s", series_name)
+    
+    raw_dir, processed_dir, chroma_db_dir = get_series_paths(series_name)
+    paths = get_series_subtitle_files_paths(series_name)
+    raw_ad_files_path, raw_cs_files_path, _, _, _ = paths
+    manifest = IngestManifest.load(processed_dir / MANIFEST_FILE)
+    embedder = get_embeddings()
+    
+    index_config = {"embedding_model": embedder.model_id, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+    if VECTOR_BACKEND != "chroma":
+        index_config["vector_backend"] = VECTOR_BACKEND
+    build_partitions = PARTITIONED_RETRIEVAL and VECTOR_BACKEND == "chroma"
+    reset_index = force or manifest.index_config != index_config or not os.listdir(chroma_db_dir)
+    if reset_index:
+        logger.info("Vector index will be rebuilt (forced, new index settings or no index yet)")
+    
+    episodes = _discover_episodes(raw_cs_files_path, raw_ad_files_path)
+    fingerprints = {
+        key: manifest.fingerprint_sources(key, {
+            path.relative_to(raw_dir).as_posix(): path
+            for path in (episode["dialogue"], episode.get("action")) if path is not None
+        })
+        for key, episode in episodes.items()
+    }
+    changed = [key for key in episodes
+               if force or manifest.is_changed(key, fingerprints[key], processed_dir)]
+    removed = [key for key in manifest.episodes if key not in episodes]
+    pending = [key for key in episodes if reset_index or key in changed or not manifest.is_indexed(key)]
+    logger.info("Episodes: %d total, %d changed, %d removed, %d to index",
+                len(episodes), len(changed), len(removed), len(pending))
+    
+    report = {"episodes": len(episodes), "processed": 0, "failed": {}, "seconds": 0.0}
+    indexes_built = BM25Index.exists(LEXICAL_INDEX / series_name) and (
+        not build_partitions or PartitionIndex.exists(PARTITION_INDEX / series_name))
+    # A quantization change only needs the NumPy store compacted, not re-embedded
+    if not (pending or removed) and indexes_built and not vector_db_needs_compaction(
+            embedder, series_name, chroma_db_dir):
+        logger.info("Everything up to date, nothing to do")
+        return report
+    
+    outputs = {key: manifest.episodes.get(key, {}).get("outputs", []) for key in episodes}
+    for key, result in _process_episodes(changed, episodes, paths, executor).items():
+        outputs[key] = result["outputs"]
+        if result["error"]:
+            report["failed"][key] = result["error"]
+        else:
+            report["processed"] += 1
+            # Outputs the episode no longer produces, e.g. JSON files after a SCENE_STORE_FORMAT switch
+            for stale in set(manifest.episodes.get(key, {}).get("outputs", [])) - set(result["outputs"]):
+                (processed_dir / stale).unlink(missing_ok=True)
+    
+    vector_store = open_vector_db(embedder, series_name, chroma_db_dir, reset=reset_index)
+    if reset_index:
+        manifest.reset_index(index_config)
+    
+    delete_ids = []
+    for key in removed:
+        record = manifest.remove(key)
+        if not reset_index:
+            delete_ids.extend(record.get("chunk_ids", []))
+        for output in record.get("outputs", []):
+            (processed_dir / output).unlink(missing_ok=True)
+        logger.info("Removed episode: %s", key)
+    if delete_ids:
+        upsert_chunks(vector_store, [], [], delete_ids)
+    manifest.save()
+    
+    to_index = [key for key in pending if outputs[key]]
+    _index_episodes(vector_store, manifest, to_index, outputs, fingerprints, processed_dir, series_name)
+    compact_vector_db(vector_store)
+    
+    # The lexical index and gazetteer are cheap CPU passes over the merged files; rebuild whole
+    indexed = _indexable_records(manifest, processed_dir, report["failed"])
+    _rebuild_lexical_index(indexed, processed_dir, series_name, LEXICAL_INDEX / series_name)
+    
+    if build_partitions:
+        logger.info("Building season/episode partition index...")
+        build_partition_index(
+            vector_store,
+            ((*extract_season_episode((processed_dir / record["outputs"][-1]).stem), record.get("chunk_ids", []))
+             for record in indexed.values()),
+            PARTITION_INDEX / series_name,
+            embedding_model=embedder.model_id
+        )
+    
+    logger.info("Building gazetteer...")
+    build_gazetteer(series_name, paths[4], processed_dir)
     
-    logger.info("Processing complete!")
+    mark_index_rebuilt(chroma_db_dir)
+    report["seconds"] = time.perf_counter() - run_start
+    logger.info("Processing complete! %d processed, %d failed in %.1fs",
+                report["processed"], len(report["failed"]), report["seconds"])
+    return report
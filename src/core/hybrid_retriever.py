@@ -0,0 +1,79 @@
+"""Hybrid retrieval: BM25 over search terms fused with vector search via reciprocal rank fusion."""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from config.constants import RETRIEVAL_K, HYBRID_FETCH_K, RRF_K
+from src.utils.concurrency import run_blocking
+from src.utils.text_processing import split_search_query
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _doc_key(doc: Document) -> tuple:
+    """Identify a chunk across stores: both indexes are built from the same split documents."""
+    metadata = doc.metadata
+    return (metadata.get("source"), metadata.get("scene_id"), metadata.get("start_index"))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int, rrf_k: int = RRF_K) -> List[Document]:
+    """Fuse ranked lists by sum of 1 / (rrf_k + rank); ties keep first-seen order."""
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered[:k]]
+
+
+def lexical_search(lexical_index, query: str, filters: Dict, k: int = HYBRID_FETCH_K) -> List[Document]:
+    """BM25 search over the question and the rewriter's search terms within the filters."""
+    question, terms = split_search_query(query)
+    hits = lexical_index.search([question, *terms], k,
+                                season=filters.get("season"), episode=filters.get("episode"))
+    return [doc for doc, _ in hits]
+
+
+def fuse_with_lexical(lexical_index, query: str, dense_docs: List[Document], filters: Dict,
+                      k: int = RETRIEVAL_K) -> List[Document]:
+    """Fuse already-retrieved vector results with BM25 results for the same query."""
+    return reciprocal_rank_fusion([dense_docs, lexical_search(lexical_index, query, filters)], k)
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever for rewritten queries ("question | TERMS: a, b, ...").
+
+    The dense retriever embeds only the question; the search terms go to BM25, where exact
+    name matches are cheap and precise. filters holds integer season/episode values, applied
+    by the dense retriever (metadata filter or partition index) and by the lexical index in its postings.
+    mode "lexical" skips the dense side entirely.
+    """
+
+    dense_retriever: Optional[BaseRetriever] = None
+    lexical_index: Any = None
+    filters: Dict = {}
+    mode: str = "hybrid"
+    k: int = RETRIEVAL_K
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        lexical_docs = lexical_search(self.lexical_index, query, self.filters)
+        if self.mode == "lexical":
+            return lexical_docs[:self.k]
+        question, _ = split_search_query(query)
+        dense_docs = self.dense_retriever.invoke(question, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([dense_docs, lexical_docs], self.k)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        lexical = run_blocking(lexical_search, self.lexical_index, query, self.filters)
+        if self.mode == "lexical":
+            return (await lexical)[:self.k]
+        question, _ = split_search_query(query)
+        dense = self.dense_retriever.ainvoke(question, config={"callbacks": run_manager.get_child()})
+        dense_docs, lexical_docs = await asyncio.gather(dense, lexical)
+        return reciprocal_rank_fusion([dense_docs, lexical_docs], self.k)
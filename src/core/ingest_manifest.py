@@ -0,0 +1,127 @@
+"""Per-series ingestion manifest: source file hashes -> processed JSON -> chunk IDs.
+
+Stored as data/processed/<series>/manifest.json:
+
+    {
+      "version": 1,
+      "index_config": {"embedding_model": ..., "chunk_size": ..., "chunk_overlap": ...},
+      "episodes": {
+        "<season dir>/<episode stem>": {
+          "sources": {"<raw-relative path>": {"sha256": ..., "size": ..., "mtime_ns": ...}},
+          "outputs": ["<processed-relative path>", ...],
+          "chunk_ids": ["<chunk id>", ...]    # absent until the episode's chunks are all stored
+        }
+      }
+    }
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List
+from src.utils.file_io import write_json_atomic
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(doc) -> str:
+    """Deterministic chunk ID: same series, file, scene, offset and text always give the same ID."""
+    metadata = doc.metadata
+    key = "|".join(str(part) for part in (
+        metadata.get("series"), metadata.get("source"), metadata.get("scene_id"),
+        metadata.get("start_index"), doc.page_content
+    ))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class IngestManifest:
+    """Tracks what has been ingested so process_series only redoes what changed."""
+    
+    def __init__(self, path: Path, data: Dict = None):
+        self.path = Path(path)
+        self.data = data or {"version": MANIFEST_VERSION, "index_config": {}, "episodes": {}}
+    
+    @classmethod
+    def load(cls, path: Path) -> "IngestManifest":
+        """Load the manifest; a missing, unreadable or outdated file yields an empty one."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                return cls(path, data)
+            logger.warning("Manifest version changed, ignoring %s", path)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not read manifest %s: %s", path, e)
+        return cls(path)
+    
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a truncated manifest."""
+        write_json_atomic(self.path, self.data, indent=2)
+    
+    @property
+    def episodes(self) -> Dict[str, Dict]:
+        """Episode key -> recorded sources, outputs and chunk IDs."""
+        return self.data["episodes"]
+    
+    @property
+    def index_config(self) -> Dict:
+        """Settings the stored vectors depend on; a change forces re-embedding everything."""
+        return self.data["index_config"]
+    
+    def fingerprint_sources(self, episode_key: str, sources: Dict[str, Path]) -> Dict[str, Dict]:
+        """Hash an episode's source files, reusing recorded hashes when size and mtime are unchanged."""
+        recorded = self.episodes.get(episode_key, {}).get("sources", {})
+        fingerprints = {}
+        for rel_path, path in sources.items():
+            stat = path.stat()
+            previous = recorded.get(rel_path)
+            if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+                fingerprints[rel_path] = previous
+            else:
+                fingerprints[rel_path] = {"sha256": file_hash(path), "size": stat.st_size,
+                                          "mtime_ns": stat.st_mtime_ns}
+        return fingerprints
+    
+    def is_changed(self, episode_key: str, fingerprints: Dict[str, Dict], processed_dir: Path) -> bool:
+        """True if the episode is new, its sources differ or any recorded output is missing."""
+        record = self.episodes.get(episode_key)
+        if record is None:
+            return True
+        recorded = {p: f["sha256"] for p, f in record["sources"].items()}
+        if recorded != {p: f["sha256"] for p, f in fingerprints.items()}:
+            return True
+        return not all((processed_dir / output).exists() for output in record["outputs"])
+    
+    def update(self, episode_key: str, fingerprints: Dict[str, Dict], outputs: List[str],
+               chunk_ids: List[str]) -> None:
+        """Record an episode as ingested."""
+        self.episodes[episode_key] = {"sources": fingerprints, "outputs": outputs, "chunk_ids": chunk_ids}
+    
+    def is_indexed(self, episode_key: str) -> bool:
+        """True if every chunk of the episode's recorded outputs is in the vector store."""
+        return "chunk_ids" in self.episodes.get(episode_key, {})
+    
+    def reset_index(self, index_config: Dict) -> None:
+        """Record a vector store reset: new settings, and no episode indexed yet."""
+        self.data["index_config"] = index_config
+        for record in self.episodes.values():
+            record.pop("chunk_ids", None)
+    
+    def remove(self, episode_key: str) -> Dict:
+        """Forget an episode and return its last record."""
+        return self.episodes.pop(episode_key, {})
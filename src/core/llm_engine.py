@@ -1,6 +1,8 @@
-"""LLM Engine using Google Generative AI."""
-from langchain_ollama import OllamaLLM
-from langchain_google_genai import GoogleGenerativeAI
+"""LLM Engine using Google Generative AI.
+
+Backend client libraries are imported inside get_llm so importing this module stays cheap;
+callers obtain instances through the registry, which builds each backend once.
+"""
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 from config.constants import (
@@ -15,6 +17,10 @@ from src.utils.logging import get_logger
 load_dotenv()
 logger = get_logger(__name__)
 
+def get_model_name(is_local=USE_LOCAL_LLM):
+    """Return model identifier for the backend (used in cache keys)."""
+    return LOCAL_MODEL_NAME if is_local else GOOGLE_MODEL_NAME
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_fixed(2),
@@ -26,14 +32,14 @@ logger = get_logger(__name__)
 def get_llm(is_local=USE_LOCAL_LLM):
     """Get LLM instance (local Ollama or Google API) with retry logic."""
     if is_local:
+        from langchain_ollama import OllamaLLM
         logger.info("Initializing local LLM: %s", LOCAL_MODEL_NAME)
         return OllamaLLM(model=LOCAL_MODEL_NAME, temperature=LLM_TEMPERATURE)
     else:
+        from langchain_google_genai import GoogleGenerativeAI
         logger.info("Initializing Google LLM: %s", GOOGLE_MODEL_NAME)
         return GoogleGenerativeAI(
             model=GOOGLE_MODEL_NAME,
             temperature=LLM_TEMPERATURE,
             max_tokens=LLM_MAX_TOKENS
         )
-
-llm = get_llm()
@@ -1,10 +1,29 @@
 """Multi-series query service."""
-from typing import Dict, List, Optional
-from src.core.pipeline import build_rag_pipeline, create_filtered_rag_chain
-from src.prompts.rewrite_prompt import optimized_rag_ask
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from config.constants import (
+    SERIES_QUERY_TIMEOUT_SECONDS,
+    MAX_SERIES_WORKERS,
+    ANSWER_CACHE_ENABLED,
+    FAST_PATH_ENABLED,
+    FAST_PATH_MIN_CONFIDENCE
+)
+from src.core.answer_cache import SemanticAnswerCache, numeric_signature
+from src.core.context_packer import pack_documents, token_budget_for
+from src.core.query_analyzer import query_analyzer
+from src.core.registry import registry
+from src.core.scheduler import admission
+from src.core.singleflight import SingleFlight
+from src.vector_store import get_embeddings
+from src.prompts.rewrite_prompt import QueryRewrite, rewrite_query, arewrite_query
+from src.utils.concurrency import run_blocking
+from src.utils.text_processing import normalize_query
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
+# One gazetteer per process, so it is reloaded once per invalidation however many services exist
+registry.add_invalidation_listener(query_analyzer.reload)
 
 
 class SeriesQueryResult:
@@ -16,75 +35,404 @@ class SeriesQueryResult:
         self.optimized_query = optimized_query
 
 
+class SeriesResultMerger:
+    """Incrementally merge per-series results into the multi-series API response."""
+    def __init__(self, original_query: str, series_order: Optional[List[str]] = None):
+        self.original_query = original_query
+        self.series_order = series_order
+        self.results = []
+    
+    def add(self, result: SeriesQueryResult) -> Dict:
+        """Add a completed series result and return the merged response so far."""
+        self.results.append(result)
+        return self.response()
+    
+    def response(self) -> Dict:
+        """Build merged response from the results added so far."""
+        results = self.results
+        if self.series_order:
+            rank = {name: i for i, name in enumerate(self.series_order)}
+            results = sorted(results, key=lambda r: rank.get(r.series_name, len(rank)))
+        
+        all_sources = []
+        answers = []
+        series_queried = []
+        
+        for result in results:
+            for source in result.sources:
+                source["series"] = result.series_name
+            all_sources.extend(result.sources)
+            answers.append(f"[{result.series_name.upper()}]: {result.answer}")
+            series_queried.append(result.series_name)
+        
+        return {
+            "status": "success",
+            "original_query": self.original_query,
+            "optimized_query": results[0].optimized_query if results else self.original_query,
+            "answer": "\n\n".join(answers),
+            "sources": all_sources,
+            "source_count": len(all_sources),
+            "series_queried": series_queried,
+            "auto_detected": False
+        }
+
+
 class MultiSeriesService:
     """Handle multi-series queries with auto-detection."""
     AVAILABLE_SERIES = ["stranger_things", "breaking_bad"]
     
     def __init__(self):
         self.logger = logger
+        self.answer_cache = SemanticAnswerCache()
+        self.singleflight = SingleFlight()
+        registry.add_invalidation_listener(self.answer_cache.invalidate_series)
+    
+    def close(self) -> None:
+        """Detach from registry invalidations so a short-lived service and its cache can be freed."""
+        registry.remove_invalidation_listener(self.answer_cache.invalidate_series)
+    
+    async def aask(self, query: str, series: str,
+                   season: Optional[int] = None,
+                   episode: Optional[int] = None,
+                   use_local: Optional[bool] = None) -> Dict:
+        """Answer an /ask request; identical requests already in flight share one execution."""
+        key = (normalize_query(query), series, season, episode, registry.backend(use_local))
+        return await self.singleflight.do(
+            key, lambda: self._aask_cached(query, series, season, episode, use_local)
+        )
     
-    def detect_target_series(self, query: str) -> Optional[str]:
-        """Detect which series the query is about."""
+    async def _aask_cached(self, query: str, series: str, season: Optional[int],
+                           episode: Optional[int], use_local: Optional[bool]) -> Dict:
+        """Serve near-duplicate questions from the semantic answer cache, else run the pipeline."""
+        if not ANSWER_CACHE_ENABLED:
+            return await self._aanswer(query, series, season, episode, use_local)
+        
+        # Index version checks stat files on disk, so they run on the executor
+        await asyncio.gather(*(run_blocking(registry.ensure_fresh, series_name)
+                               for series_name in (self.AVAILABLE_SERIES if series == "all" else [series])))
+        constraints = self._cache_constraints(query, series, season, episode, use_local)
+        
+        query_vector = None
         try:
-            _, _, detected_series = optimized_rag_ask(query)
-            if detected_series and detected_series in self.AVAILABLE_SERIES:
-                self.logger.info("Auto-detected: %s", detected_series)
-                return detected_series
+            query_vector = await get_embeddings().aembed_query(query)
+            cached = self.answer_cache.lookup(query_vector, constraints)
+            if cached is not None:
+                cached["original_query"] = query
+                cached["cached"] = True
+                return cached
+        except Exception as e:  # pylint: disable=broad-except
+            # The cache is an optimization: any embedding or lookup failure means a normal answer
+            self.logger.warning("Answer cache lookup failed: %s", e)
+        
+        response = await self._aanswer(query, series, season, episode, use_local)
+        if query_vector is not None and response.get("source_count") and self._is_complete(response):
+            try:
+                self.answer_cache.insert(query_vector, constraints, response)
+            except Exception as e:  # pylint: disable=broad-except
+                self.logger.warning("Answer cache insert failed: %s", e)
+        return response
+    
+    @staticmethod
+    def _cache_constraints(query: str, series: str, season: Optional[int],
+                           episode: Optional[int], use_local: Optional[bool]) -> Tuple:
+        """Request attributes a cached answer must share; "ikinci sezon" and "üçüncü sezon" differ.
+        
+        Season/episode come from the request or, failing that, from the rule-based analysis of
+        the question (spelled-out ordinals included); other numbers in the question must match too.
+        """
+        filters = QueryRewrite(query, query, query_analyzer.analyze(query).filters, "").filters_for(season, episode)
+        return (series, filters["season"], filters["episode"], registry.backend(use_local),
+                numeric_signature(query))
+    
+    def _is_complete(self, response: Dict) -> bool:
+        """False for an "all" answer missing a series that failed or timed out (not worth caching)."""
+        queried = response.get("series_queried")
+        return queried is None or response.get("auto_detected") or set(queried) >= set(self.AVAILABLE_SERIES)
+    
+    async def _aanswer(self, query: str, series: str, season: Optional[int],
+                       episode: Optional[int], use_local: Optional[bool]) -> Dict:
+        """Run the full rewrite → retrieve → generate pipeline for an /ask request."""
+        if series == "all":
+            return await self.aquery_all_series(query, season, episode, use_local)
+        
+        result = await self.aquery_single_series(series, query, season, episode, use_local)
+        return {
+            "status": "success",
+            "original_query": query,
+            "optimized_query": result.optimized_query,
+            "answer": result.answer,
+            "sources": result.sources,
+            "source_count": len(result.sources)
+        }
+    
+    def detect_target_series(self, query: str, rewrite: Optional[QueryRewrite] = None) -> Optional[str]:
+        """Detect which series the query is about; gazetteer matches skip the LLM entirely."""
+        if FAST_PATH_ENABLED:
+            analysis = query_analyzer.analyze(query)
+            if (analysis.detected_series in self.AVAILABLE_SERIES
+                    and analysis.entity_confidence() >= FAST_PATH_MIN_CONFIDENCE):
+                self.logger.info("Auto-detected (fast path): %s", analysis.detected_series)
+                return analysis.detected_series
+        try:
+            rewrite = rewrite or rewrite_query(query, "all")
+            if rewrite.detected_series and rewrite.detected_series in self.AVAILABLE_SERIES:
+                self.logger.info("Auto-detected: %s", rewrite.detected_series)
+                return rewrite.detected_series
         except (ValueError, KeyError, TypeError) as e:
             self.logger.warning("Detection failed: %s", e)
         return None
     
+    async def adetect_target_series(self, query: str, rewrite: Optional[QueryRewrite] = None) -> Optional[str]:
+        """Async variant of detect_target_series."""
+        if rewrite is None:
+            rewrite = await arewrite_query(query, "all")
+        return self.detect_target_series(query, rewrite)
+    
     def query_single_series(self, series_name: str, query: str, 
                            season: Optional[int] = None,
                            episode: Optional[int] = None,
-                           use_local: Optional[bool] = None) -> SeriesQueryResult:
-        """Query single series and return results."""
-        vector_store = build_rag_pipeline(series_name=series_name)
+                           use_local: Optional[bool] = None,
+                           rewrite: Optional[QueryRewrite] = None) -> SeriesQueryResult:
+        """Query single series and return results. Reuses a pre-computed rewrite if given."""
+        rewrite = rewrite or rewrite_query(query, series_name)
+        filters = self._filters_for(rewrite, season, episode)
         
-        try:
-            optimized_query, filters, _ = optimized_rag_ask(query)
-            if season:
-                filters['season'] = str(season)
-            if episode:
-                filters['episode'] = str(episode)
-            self.logger.info("Filters: %s", filters)
-        except (ValueError, KeyError) as e:
-            self.logger.warning("Query optimization failed, using original: %s", e)
-            optimized_query = query
-            filters = {}
-        
-        rag_chain = create_filtered_rag_chain(vector_store, filters, use_local=use_local)
-        response = rag_chain.invoke({"input": optimized_query})
-        sources = self._format_sources(response["context"], series_name)
+        rag_chain = registry.get_rag_chain(series_name, filters, use_local=use_local)
+        response = rag_chain.invoke({"input": rewrite.optimized_query})
+        return self._build_result(series_name, response, rewrite.optimized_query)
+    
+    async def aquery_single_series(self, series_name: str, query: str,
+                                   season: Optional[int] = None,
+                                   episode: Optional[int] = None,
+                                   use_local: Optional[bool] = None,
+                                   rewrite: Optional[QueryRewrite] = None) -> SeriesQueryResult:
+        """Async variant of query_single_series; LLM waits do not block the event loop."""
+        rewrite = rewrite or await arewrite_query(query, series_name)
+        filters = self._filters_for(rewrite, season, episode)
         
-        return SeriesQueryResult(
-            series_name=series_name,
-            answer=response["answer"],
-            sources=sources,
-            optimized_query=optimized_query
+        rag_chain = await run_blocking(
+            registry.get_rag_chain, series_name, filters, use_local=use_local
         )
+        async with admission.slot(use_local):
+            response = await rag_chain.ainvoke({"input": rewrite.optimized_query})
+        return self._build_result(series_name, response, rewrite.optimized_query)
+    
+    async def astream_single_series(self, series_name: str, query: str,
+                                    season: Optional[int] = None,
+                                    episode: Optional[int] = None,
+                                    use_local: Optional[bool] = None,
+                                    rewrite: Optional[QueryRewrite] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield ("metadata", ...) as soon as retrieval finishes, then ("token", ...) answer chunks."""
+        rewrite = rewrite or await arewrite_query(query, series_name)
+        filters = self._filters_for(rewrite, season, episode)
+        
+        retriever = await run_blocking(registry.get_retriever, series_name, filters)
+        context_docs = pack_documents(await retriever.ainvoke(rewrite.optimized_query),
+                                      token_budget_for(use_local))
+        sources = self._format_sources(context_docs, series_name)
+        yield "metadata", {
+            "series": series_name,
+            "optimized_query": rewrite.optimized_query,
+            "sources": sources,
+            "source_count": len(sources)
+        }
+        
+        answer_chain = await run_blocking(registry.get_answer_chain, use_local)
+        async with admission.slot(use_local):
+            async for token in answer_chain.astream({"input": rewrite.optimized_query, "context": context_docs}):
+                yield "token", {"series": series_name, "text": token}
+    
+    async def astream_query(self, query: str, series: str,
+                            season: Optional[int] = None,
+                            episode: Optional[int] = None,
+                            use_local: Optional[bool] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Stream events for a single series or for "all" (auto-detected or every series)."""
+        rewrite = await arewrite_query(query, series)
+        auto_detected = False
+        target_series = [series]
+        if series == "all":
+            detected_series = self.detect_target_series(query, rewrite)
+            auto_detected = detected_series is not None
+            target_series = [detected_series] if auto_detected else list(self.AVAILABLE_SERIES)
+        
+        if len(target_series) == 1:
+            series_queried = []
+            try:
+                async for event in self.astream_single_series(
+                    target_series[0], query, season, episode, use_local, rewrite=rewrite
+                ):
+                    yield event
+                series_queried.append(target_series[0])
+            except (ValueError, FileNotFoundError, OSError) as e:
+                self.logger.error("Error querying %s: %s", target_series[0], e)
+                yield "error", {"series": target_series[0], "message": str(e)}
+            yield "done", {"series_queried": series_queried, "auto_detected": auto_detected}
+            return
+        
+        async for event in self._astream_scatter(query, target_series, season, episode, use_local, rewrite):
+            yield event
+    
+    async def _astream_scatter(self, query: str, target_series: List[str],
+                               season: Optional[int], episode: Optional[int],
+                               use_local: Optional[bool],
+                               rewrite: QueryRewrite) -> AsyncIterator[Tuple[str, Dict]]:
+        """Stream all series concurrently; emit a merged 'partial' event as each series completes."""
+        events = asyncio.Queue()
+        merger = SeriesResultMerger(query, self.AVAILABLE_SERIES)
+        
+        async def pump(series_name):
+            async for event in self.astream_single_series(
+                series_name, query, season, episode, use_local, rewrite=rewrite
+            ):
+                await events.put(event)
+        
+        async def run(series_name):
+            try:
+                await asyncio.wait_for(pump(series_name), timeout=SERIES_QUERY_TIMEOUT_SECONDS)
+                await events.put(("series_done", {"series": series_name}))
+            except asyncio.TimeoutError:
+                self.logger.error("Timed out querying %s after %ss", series_name, SERIES_QUERY_TIMEOUT_SECONDS)
+                await events.put(("error", {"series": series_name, "message": "timeout"}))
+            except Exception as e:  # pylint: disable=broad-except
+                # Every task must report back, otherwise the consumer below waits forever
+                self.logger.error("Error querying %s: %s", series_name, e)
+                await events.put(("error", {"series": series_name, "message": str(e)}))
+        
+        tasks = [asyncio.ensure_future(run(name)) for name in target_series]
+        pending = len(tasks)
+        metadata, tokens = {}, {name: [] for name in target_series}
+        try:
+            while pending:
+                event, data = await events.get()
+                if event == "metadata":
+                    metadata[data["series"]] = data
+                elif event == "token":
+                    tokens[data["series"]].append(data["text"])
+                
+                if event == "series_done":
+                    pending -= 1
+                    series_name = data["series"]
+                    meta = metadata.get(series_name, {})
+                    yield "partial", merger.add(SeriesQueryResult(
+                        series_name=series_name,
+                        answer="".join(tokens[series_name]),
+                        sources=meta.get("sources", []),
+                        optimized_query=meta.get("optimized_query", rewrite.optimized_query)
+                    ))
+                    continue
+                if event == "error":
+                    pending -= 1
+                yield event, data
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        yield "done", {"series_queried": [r.series_name for r in merger.results], "auto_detected": False}
     
     def query_all_series(self, query: str, season: Optional[int] = None,
                         episode: Optional[int] = None,
                         use_local: Optional[bool] = None) -> Dict:
-        """Query all series or auto-detected series and merge results."""
-        detected_series = self.detect_target_series(query)
+        """Query all series or auto-detected series and merge results. Rewrites the query once."""
+        rewrite = rewrite_query(query, "all")
+        detected_series = self.detect_target_series(query, rewrite)
         
         if detected_series:
-            result = self.query_single_series(detected_series, query, season, episode, use_local)
+            result = self.query_single_series(detected_series, query, season, episode, use_local,
+                                              rewrite=rewrite)
             return self._format_single_series_response(result, auto_detected=True)
         
         self.logger.info("Querying all: %s", ", ".join(self.AVAILABLE_SERIES))
         
-        all_results = []
-        for series_name in self.AVAILABLE_SERIES:
+        merger = SeriesResultMerger(query, self.AVAILABLE_SERIES)
+        pool = ThreadPoolExecutor(max_workers=min(len(self.AVAILABLE_SERIES), MAX_SERIES_WORKERS))
+        futures = {
+            pool.submit(self.query_single_series, series_name, query, season, episode, use_local,
+                        rewrite=rewrite): series_name
+            for series_name in self.AVAILABLE_SERIES
+        }
+        try:
+            for future in as_completed(futures, timeout=SERIES_QUERY_TIMEOUT_SECONDS):
+                try:
+                    merger.add(future.result())
+                except (ValueError, FileNotFoundError, OSError) as e:
+                    self.logger.error("Error querying %s: %s", futures[future], e)
+        except FuturesTimeoutError:
+            timed_out = [name for future, name in futures.items() if not future.done()]
+            self.logger.error("Timed out querying %s after %ss", ", ".join(timed_out), SERIES_QUERY_TIMEOUT_SECONDS)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        return merger.response()
+    
+    async def aquery_all_series(self, query: str, season: Optional[int] = None,
+                                episode: Optional[int] = None,
+                                use_local: Optional[bool] = None) -> Dict:
+        """Async variant of query_all_series."""
+        rewrite = await arewrite_query(query, "all")
+        detected_series = self.detect_target_series(query, rewrite)
+        
+        if detected_series:
+            result = await self.aquery_single_series(detected_series, query, season, episode, use_local,
+                                                     rewrite=rewrite)
+            return self._format_single_series_response(result, auto_detected=True)
+        
+        self.logger.info("Querying all: %s", ", ".join(self.AVAILABLE_SERIES))
+        
+        merger = SeriesResultMerger(query, self.AVAILABLE_SERIES)
+        async for result in self.aiter_series_results(query, self.AVAILABLE_SERIES, season, episode,
+                                                      use_local, rewrite):
+            merger.add(result)
+        return merger.response()
+    
+    async def aiter_series_results(self, query: str, series_names: List[str],
+                                   season: Optional[int] = None,
+                                   episode: Optional[int] = None,
+                                   use_local: Optional[bool] = None,
+                                   rewrite: Optional[QueryRewrite] = None) -> AsyncIterator[SeriesQueryResult]:
+        """Query series concurrently and yield each result as soon as it completes.
+        
+        Each series runs under its own SERIES_QUERY_TIMEOUT_SECONDS deadline; failed or
+        timed-out series are logged and skipped.
+        """
+        rewrite = rewrite or await arewrite_query(query, "all")
+        
+        async def run(series_name):
             try:
-                result = self.query_single_series(series_name, query, season, episode, use_local)
-                all_results.append(result)
+                return await asyncio.wait_for(
+                    self.aquery_single_series(series_name, query, season, episode, use_local, rewrite=rewrite),
+                    timeout=SERIES_QUERY_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                self.logger.error("Timed out querying %s after %ss", series_name, SERIES_QUERY_TIMEOUT_SECONDS)
             except (ValueError, FileNotFoundError, OSError) as e:
                 self.logger.error("Error querying %s: %s", series_name, e)
+            return None
         
-        return self._merge_series_results(query, all_results)
+        tasks = [asyncio.ensure_future(run(name)) for name in series_names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result is not None:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _filters_for(self, rewrite: QueryRewrite, season: Optional[int],
+                     episode: Optional[int]) -> Dict:
+        """Per-series copy of rewrite filters with explicit request season/episode applied."""
+        filters = rewrite.filters_for(season, episode)
+        self.logger.info("Filters: %s", filters)
+        return filters
+    
+    def _build_result(self, series_name: str, response: Dict, optimized_query: str) -> SeriesQueryResult:
+        """Build SeriesQueryResult from a retrieval chain response."""
+        return SeriesQueryResult(
+            series_name=series_name,
+            answer=response["answer"],
+            sources=self._format_sources(response["context"], series_name),
+            optimized_query=optimized_query
+        )
     
     def _format_sources(self, context_docs: List, series_name: str) -> List[Dict]:
         """Format source documents to structured dicts."""
@@ -115,24 +463,7 @@ class MultiSeriesService:
     
     def _merge_series_results(self, original_query: str, results: List[SeriesQueryResult]) -> Dict:
         """Merge results from multiple series."""
-        all_sources = []
-        answers = []
-        series_queried = []
-        
+        merger = SeriesResultMerger(original_query)
         for result in results:
-            for source in result.sources:
-                source["series"] = result.series_name
-            all_sources.extend(result.sources)
-            answers.append(f"[{result.series_name.upper()}]: {result.answer}")
-            series_queried.append(result.series_name)
-        
-        return {
-            "status": "success",
-            "original_query": original_query,
-            "optimized_query": results[0].optimized_query if results else original_query,
-            "answer": "\n\n".join(answers),
-            "sources": all_sources,
-            "source_count": len(all_sources),
-            "series_queried": series_queried,
-            "auto_detected": False
-        }
+            merger.add(result)
+        return merger.response()
@@ -0,0 +1,47 @@
+"""Filtered dense retrieval over a series' season/episode partition index."""
+from typing import Any, Dict, List, Sequence
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from config.constants import RETRIEVAL_K
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def fetch_documents(vector_store, chunk_ids: List[str]) -> List[Document]:
+    """Load chunks from the vector store by ID, in the order of chunk_ids."""
+    if not chunk_ids:
+        return []
+    stored = vector_store.get(ids=chunk_ids, include=["documents", "metadatas"])
+    by_id = {
+        chunk: Document(page_content=text, metadata=metadata or {})
+        for chunk, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    }
+    return [by_id[chunk] for chunk in chunk_ids if chunk in by_id]
+
+
+def partition_search(partition_index, vector_store, query_vector: Sequence[float], filters: Dict,
+                     k: int = RETRIEVAL_K) -> List[Document]:
+    """Exact search of only the partitions matching the integer season/episode filters."""
+    hits = partition_index.search(query_vector, k, season=filters.get("season"), episode=filters.get("episode"))
+    return fetch_documents(vector_store, [chunk for chunk, _ in hits])
+
+
+class PartitionRetriever(BaseRetriever):
+    """Dense retriever for season/episode-filtered queries.
+    
+    Embeds the query with the vector store's embedder and scores it against the matching
+    partition's rows only, instead of an ANN search over the whole collection followed by a
+    metadata post-filter; the k nearest chunks are then read from the vector store by ID.
+    """
+    
+    partition_index: Any = None
+    vector_store: Any = None
+    filters: Dict = {}
+    k: int = RETRIEVAL_K
+    
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        query_vector = self.vector_store.embeddings.embed_query(query)
+        return partition_search(self.partition_index, self.vector_store, query_vector, self.filters, self.k)
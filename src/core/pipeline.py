@@ -1,11 +1,20 @@
-from langchain.chains.retrieval import create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import PromptTemplate
-from src.vector_store import embeddings, get_or_create_vector_db
+from langchain_core.runnables import RunnableLambda
+from src.vector_store import get_embeddings, get_or_create_vector_db
 from src.core.llm_engine import get_llm
+from src.core.context_packer import pack_documents, token_budget_for
+from src.core.hybrid_retriever import HybridRetriever
+from src.core.partition_retriever import PartitionRetriever
 from src.prompts.answer_prompt import prompt
 from config.paths import get_series_paths
-from config.constants import SERIES_FOLDER_NAME, RETRIEVAL_K, RETRIEVAL_SEARCH_TYPE, USE_LOCAL_LLM
+from config.constants import (
+    SERIES_FOLDER_NAME,
+    RETRIEVAL_K,
+    RETRIEVAL_SEARCH_TYPE,
+    RETRIEVAL_MODE,
+    HYBRID_FETCH_K,
+    USE_LOCAL_LLM
+)
 from src.utils.logging import get_logger
 import re
 
@@ -19,53 +28,120 @@ def build_rag_pipeline(series_name=None):
     _, _, chroma_db_dir = get_series_paths(target_series)
     return get_or_create_vector_db(
         docs=[], 
-        embedder=embeddings, 
+        embedder=get_embeddings(), 
         collection_name=target_series,
         persist_dir=chroma_db_dir
     )
 
-def create_filtered_rag_chain(vector_store, filters=None, use_local=None):
-    """Create RAG chain with optional metadata filtering."""
-    search_kwargs = {"k": RETRIEVAL_K}
+def parse_filter_values(filters=None):
+    """Convert rewriter season/episode filters ("2", "season 2", 2) to {"season": int, "episode": int}."""
+    values = {}
+    for key in ("season", "episode"):
+        value = (filters or {}).get(key)
+        if value and isinstance(value, str):
+            match = _DIGIT_PATTERN.search(value)
+            value = int(match.group()) if match else int(value)
+        if value:
+            values[key] = value
+    return values
+
+def build_metadata_filter(filters=None):
+    """Convert rewriter season/episode filters to a Chroma metadata filter (or None)."""
+    values = parse_filter_values(filters)
+    
+    filter_conditions = []
+    if "season" in values:
+        filter_conditions.append({"season": {"$eq": values["season"]}})
+    if "episode" in values:
+        filter_conditions.append({"episode_num": {"$eq": values["episode"]}})
+    
+    if not filter_conditions:
+        return None
+    return filter_conditions[0] if len(filter_conditions) == 1 else {"$and": filter_conditions}
+
+def create_filtered_retriever(vector_store, filters=None, metadata_filter=None, k=RETRIEVAL_K,
+                              partition_index=None):
+    """Create retriever with optional season/episode metadata filtering.
     
-    if filters:
-        filter_conditions = []
-        if filters.get("season"):
-            season_num = filters["season"]
-            if isinstance(season_num, str):
-                match = _DIGIT_PATTERN.search(season_num)
-                season_num = int(match.group()) if match else int(season_num)
-            filter_conditions.append({"season": {"$eq": season_num}})
-        if filters.get("episode"):
-            episode_num = filters["episode"]
-            if isinstance(episode_num, str):
-                match = _DIGIT_PATTERN.search(episode_num)
-                episode_num = int(match.group()) if match else int(episode_num)
-            filter_conditions.append({"episode_num": {"$eq": episode_num}})
-        
-        if filter_conditions:
-            search_kwargs["filter"] = filter_conditions[0] if len(filter_conditions) == 1 else {"$and": filter_conditions}
-            logger.info("Using filters: %s", search_kwargs["filter"])
+    With a partition index, season/episode filters search only the matching partition;
+    unfiltered queries always use the vector store's own index.
+    """
+    filter_values = parse_filter_values(filters)
+    if partition_index is not None and filter_values:
+        logger.info("Searching partition: %s", filter_values)
+        return PartitionRetriever(partition_index=partition_index, vector_store=vector_store,
+                                  filters=filter_values, k=k)
     
-    retriever = vector_store.as_retriever(
+    search_kwargs = {"k": k}
+    
+    if metadata_filter is None:
+        metadata_filter = build_metadata_filter(filters)
+    if metadata_filter:
+        search_kwargs["filter"] = metadata_filter
+        logger.info("Using filters: %s", metadata_filter)
+    
+    return vector_store.as_retriever(
         search_type=RETRIEVAL_SEARCH_TYPE,
         search_kwargs=search_kwargs
     )
+
+def create_hybrid_retriever(vector_store, lexical_index=None, filters=None, mode=RETRIEVAL_MODE,
+                            partition_index=None):
+    """Create the retriever for mode "vector", "lexical" or "hybrid".
     
-    is_local = use_local if use_local is not None else USE_LOCAL_LLM
-    llm_instance = get_llm(is_local=is_local)
+    Without a lexical index (series not re-processed yet) every mode falls back to vector search.
+    """
+    if mode == "vector" or lexical_index is None:
+        if mode != "vector":
+            logger.warning("No lexical index, falling back to vector retrieval")
+        return create_filtered_retriever(vector_store, filters, partition_index=partition_index)
     
+    dense_retriever = None
+    if mode == "hybrid":
+        dense_retriever = create_filtered_retriever(vector_store, filters, k=HYBRID_FETCH_K,
+                                                    partition_index=partition_index)
+    return HybridRetriever(
+        dense_retriever=dense_retriever,
+        lexical_index=lexical_index,
+        filters=parse_filter_values(filters),
+        mode=mode
+    )
+
+def create_packed_retriever(retriever, use_local=None):
+    """Wrap retriever so {"input": ...} maps to deduplicated, budgeted, chronological context."""
+    budget = token_budget_for(use_local)
+    return (
+        RunnableLambda(lambda inputs: inputs["input"])
+        | retriever
+        | RunnableLambda(lambda docs: pack_documents(docs, budget))
+    )
+
+def create_answer_chain(use_local=None, llm_instance=None):
+    """Create stuff-documents chain that answers from {input} and {context} documents."""
+    if llm_instance is None:
+        is_local = use_local if use_local is not None else USE_LOCAL_LLM
+        llm_instance = get_llm(is_local=is_local)
+    
+    from langchain.chains.combine_documents import create_stuff_documents_chain
     doc_prompt = PromptTemplate.from_template(
         "--- SCENE ---\n"
         "SOURCE: {episode} | TIME: {start_time}\n"
         "CONTENT: {page_content}\n"
         "---------------"
     )
-    question_answering_chain = create_stuff_documents_chain(
+    return create_stuff_documents_chain(
         llm=llm_instance, 
         prompt=prompt, 
         document_prompt=doc_prompt,
         document_separator="\n\n"
     )
 
+def create_filtered_rag_chain(vector_store, filters=None, use_local=None, lexical_index=None,
+                              partition_index=None):
+    """Create RAG chain with optional metadata filtering and hybrid lexical retrieval."""
+    from langchain.chains.retrieval import create_retrieval_chain
+    retriever = create_packed_retriever(
+        create_hybrid_retriever(vector_store, lexical_index, filters, partition_index=partition_index), use_local
+    )
+    question_answering_chain = create_answer_chain(use_local=use_local)
     return create_retrieval_chain(retriever, question_answering_chain)
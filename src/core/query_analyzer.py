@@ -0,0 +1,212 @@
+"""Rule-based query analysis: season/episode filters and series detection without an LLM call."""
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+from config.constants import (
+    SERIES_GAZETTEER_SEEDS,
+    GAZETTEER_MIN_COUNT,
+    GAZETTEER_MAX_TERMS
+)
+from config.paths import DATA_PROCESSED
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+GAZETTEER_FILE = "gazetteer.json"
+
+_I_FOLD = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+_TOKEN_PATTERN = re.compile(r"\w+")
+_SENTENCE_SPLIT = re.compile(r"[.!?\n]+")
+_WORD_PATTERN = re.compile(r"[A-Za-z]+")
+_PROPER_NOUN = re.compile(r"^[A-Z][a-z]{2,}$")
+
+
+def _fold(text: str) -> str:
+    """Fold case and Turkish dotted/dotless I so ordinals and names match regardless of spelling."""
+    return str(text).translate(_I_FOLD).casefold()
+
+
+_ORDINAL_WORDS = [
+    ("birinci", "ilk", "first"), ("ikinci", "second"), ("üçüncü", "third"), ("dördüncü", "fourth"),
+    ("beşinci", "fifth"), ("altıncı", "sixth"), ("yedinci", "seventh"), ("sekizinci", "eighth"),
+    ("dokuzuncu", "ninth"), ("onuncu", "tenth"),
+]
+_CARDINAL_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+_NUMBERS = {_fold(word): n for n, words in enumerate(_ORDINAL_WORDS, start=1) for word in words}
+_NUMBERS.update({word: n for n, word in enumerate(_CARDINAL_WORDS, start=1)})
+
+
+def _alternation(words) -> str:
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+_ORDINAL = _alternation(_fold(w) for words in _ORDINAL_WORDS for w in words)
+_CARDINAL = _alternation(_CARDINAL_WORDS)
+_KEYWORDS = {
+    "season": r"(?:sezon|season)\w*",
+    "episode": r"(?:bolum|bölüm|episode)\w*|ep",
+}
+
+_SXE_PATTERN = re.compile(r"\bs(\d{1,2})\s*e(\d{1,2})\b")
+# "2. sezon", "üçüncü bölüm", "second season": the number precedes the keyword
+_FORWARD_PATTERNS = {
+    key: re.compile(rf"\b(?:(\d{{1,2}})(\.)?|({_ORDINAL}))\s*(?:{word})\b")
+    for key, word in _KEYWORDS.items()
+}
+# "sezon 2", "season two", "episode 4": the number follows the keyword
+_BACKWARD_PATTERNS = {
+    key: re.compile(rf"\b(?:{word})\s+(\d{{1,2}}|{_ORDINAL}|{_CARDINAL})\b")
+    for key, word in _KEYWORDS.items()
+}
+# A keyword ending the text so far, with the number that may precede it
+_TRAILING_KEYWORD = re.compile(
+    rf"(?:(\d{{1,2}}\.?|{_ORDINAL})\s*)?(?:{_KEYWORDS['season']}|{_KEYWORDS['episode']})\s*$"
+)
+# Temporal hints the regexes cannot resolve (finale, "last episode"): leave those to the LLM
+_UNRESOLVED_HINT = re.compile(
+    rf"\b(?:{_KEYWORDS['season']}|{_KEYWORDS['episode']}|final\w*|finale|son|last)\b"
+)
+
+
+def _to_number(token: str) -> str:
+    return str(int(token)) if token.isdigit() else str(_NUMBERS[token])
+
+
+def _mask(text: str, match) -> str:
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+class QueryAnalysis:
+    """Deterministic filters and series guess with confidence in [0, 1]."""
+    def __init__(self, filters: Dict, detected_series: str, series_hits: Dict[str, int],
+                 filter_confidence: float):
+        self.filters = filters
+        self.detected_series = detected_series
+        self.series_hits = series_hits
+        self.filter_confidence = filter_confidence
+    
+    def entity_confidence(self, series: Optional[str] = None) -> float:
+        """Confidence that known entities of the series (or the detected one) anchor the query."""
+        target = self.detected_series if series in (None, "all") else series
+        hits = self.series_hits.get(target, 0) if target else 0
+        if hits >= 2:
+            return 0.95
+        return 0.85 if hits == 1 else 0.3
+    
+    def confidence(self, series: Optional[str] = None) -> float:
+        """Overall confidence that the rule-based result can replace the LLM rewrite."""
+        return min(self.filter_confidence, self.entity_confidence(series))
+
+
+class QueryAnalyzer:
+    """Regex filter extraction plus per-series character/location gazetteer lookup."""
+    
+    def __init__(self, processed_root: Path = DATA_PROCESSED):
+        self.processed_root = Path(processed_root)
+        self._terms = None
+    
+    def _load(self) -> Dict[str, str]:
+        """Map folded term → series; terms claimed by more than one series are dropped."""
+        owners = {}
+        for series_name, seeds in SERIES_GAZETTEER_SEEDS.items():
+            for term in seeds:
+                owners.setdefault(_fold(term), set()).add(series_name)
+        seeded = {term: next(iter(s)) for term, s in owners.items() if len(s) == 1}
+        
+        for path in sorted(self.processed_root.glob(f"*/{GAZETTEER_FILE}")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for term in json.load(f):
+                        owners.setdefault(_fold(term), set()).add(path.parent.name)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Could not load gazetteer %s: %s", path, e)
+        
+        terms = {term: next(iter(s)) for term, s in owners.items() if len(s) == 1}
+        terms.update(seeded)
+        logger.info("Gazetteer loaded: %d terms", len(terms))
+        return terms
+    
+    def reload(self, *_) -> None:
+        """Drop loaded gazetteers so the next analysis re-reads them (e.g. after re-ingestion)."""
+        self._terms = None
+    
+    def _extract_filters(self, folded: str) -> tuple:
+        found = {"season": "", "episode": ""}
+        match = _SXE_PATTERN.search(folded)
+        if match:
+            found["season"], found["episode"] = _to_number(match.group(1)), _to_number(match.group(2))
+            folded = _mask(folded, match)
+        
+        unmasked = folded
+        for key, pattern in _FORWARD_PATTERNS.items():
+            for match in pattern.finditer(folded):
+                digits, period, ordinal = match.groups()
+                # A bare digit right after a numberless keyword belongs to it ("sezon 2 bölüm 3"),
+                # not when that keyword already has its own number ("3 bölüm 2 sezon")
+                trailing = _TRAILING_KEYWORD.search(unmasked[:match.start()])
+                if digits and not period and trailing and not trailing.group(1):
+                    continue
+                if not found[key]:
+                    found[key] = _to_number(digits or ordinal)
+                    folded = _mask(folded, match)
+                break
+        for key, pattern in _BACKWARD_PATTERNS.items():
+            match = pattern.search(folded)
+            if match and not found[key]:
+                found[key] = _to_number(match.group(1))
+                folded = _mask(folded, match)
+        
+        # Leftover keywords ("son bölüm", "finalde") mean the rules missed part of the request
+        confidence = 0.3 if _UNRESOLVED_HINT.search(folded) else 1.0
+        return found, confidence
+    
+    def analyze(self, query: str) -> QueryAnalysis:
+        """Analyze query in microseconds: filters, series hits and confidence."""
+        if self._terms is None:
+            self._terms = self._load()
+        folded = _fold(query)
+        filters, filter_confidence = self._extract_filters(folded)
+        
+        tokens = _TOKEN_PATTERN.findall(folded)
+        candidates = set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+        series_hits = Counter(self._terms[t] for t in candidates if t in self._terms)
+        detected_series = series_hits.most_common(1)[0][0] if len(series_hits) == 1 else ""
+        
+        return QueryAnalysis(filters, detected_series, dict(series_hits), filter_confidence)
+
+
+def build_gazetteer(series_name: str, merged_dir: Path, processed_dir: Path) -> int:
+    """Collect recurring proper nouns (characters, places) from processed scenes into gazetteer.json."""
+    from src.scene_store import iter_scene_files, read_scenes  # ingestion only; keeps numpy off API startup
+    
+    capitalized, lowercase = Counter(), Counter()
+    for json_path in iter_scene_files(merged_dir):
+        try:
+            scenes = read_scenes(json_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Gazetteer: skipping %s: %s", json_path.name, e)
+            continue
+        for scene in scenes:
+            for sentence in _SENTENCE_SPLIT.split(scene.get("text", "")):
+                words = _WORD_PATTERN.findall(sentence)
+                for word in words[1:]:
+                    if _PROPER_NOUN.match(word):
+                        capitalized[word.lower()] += 1
+                    elif word.islower():
+                        lowercase[word] += 1
+    
+    terms = [
+        term for term, count in capitalized.most_common()
+        if count >= GAZETTEER_MIN_COUNT and lowercase[term] <= count * 0.1
+    ][:GAZETTEER_MAX_TERMS]
+    
+    output_path = Path(processed_dir) / GAZETTEER_FILE
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False, indent=4)
+    logger.info("Gazetteer for %s: %d terms", series_name, len(terms))
+    return len(terms)
+
+
+query_analyzer = QueryAnalyzer()
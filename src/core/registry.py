@@ -0,0 +1,224 @@
+"""Process-wide registry of warm vector stores, lexical and partition indexes, LLMs and compiled chains."""
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from config.constants import USE_LOCAL_LLM, RETRIEVAL_MODE, PARTITIONED_RETRIEVAL, VECTOR_BACKEND
+from config.paths import CHROMA_DB, LEXICAL_INDEX, PARTITION_INDEX
+from src.core.llm_engine import get_llm
+from src.core.pipeline import (
+    build_rag_pipeline,
+    build_metadata_filter,
+    create_hybrid_retriever,
+    create_packed_retriever,
+    create_answer_chain
+)
+from src.lexical_index import BM25Index
+from src.partition_index import PartitionIndex
+from src.vector_store import get_index_version
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PipelineRegistry:
+    """Open each series index once and reuse LLMs, retrievers and chains across requests.
+    
+    Reads are lock-free on the warm path; the lock is only taken to build a missing entry.
+    A series is invalidated explicitly via invalidate() or automatically when the index
+    version stamps written by get_or_create_vector_db / build_lexical_index /
+    build_partition_index change on disk.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vector_stores = {}
+        self._lexical_indexes = {}
+        self._partition_indexes = {}
+        self._index_versions = {}
+        self._llms = {}
+        self._answer_chains = {}
+        self._retrievers = {}
+        self._rag_chains = {}
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+    
+    @staticmethod
+    def backend(use_local: Optional[bool]) -> bool:
+        """Resolve use_local=None to the configured default backend."""
+        return use_local if use_local is not None else USE_LOCAL_LLM
+    
+    @staticmethod
+    def filter_signature(metadata_filter: Optional[Dict]) -> str:
+        """Stable cache key for a Chroma metadata filter."""
+        return json.dumps(metadata_filter, sort_keys=True) if metadata_filter else ""
+    
+    def add_invalidation_listener(self, callback: Callable[[Optional[str]], None]) -> None:
+        """Call callback(series_name) whenever a series (None = all) is invalidated."""
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_invalidation_listener(self, callback: Callable[[Optional[str]], None]) -> None:
+        """Stop calling a callback registered with add_invalidation_listener."""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def ensure_fresh(self, series_name: str) -> str:
+        """Invalidate the series if its on-disk index versions changed; return current version."""
+        version = ":".join(str(get_index_version(index_root / series_name))
+                           for index_root in (CHROMA_DB, LEXICAL_INDEX, PARTITION_INDEX))
+        if series_name in self._index_versions and self._index_versions[series_name] != version:
+            logger.info("Index version changed for %s, invalidating", series_name)
+            self.invalidate(series_name)
+        return version
+    
+    def get_vector_store(self, series_name: str):
+        """Return the series' vector store, reopening it if the index was rebuilt."""
+        version = self.ensure_fresh(series_name)
+        vector_store = self._vector_stores.get(series_name)
+        if vector_store is not None:
+            return vector_store
+        
+        with self._lock:
+            if series_name not in self._vector_stores:
+                self._vector_stores[series_name] = build_rag_pipeline(series_name=series_name)
+                self._index_versions[series_name] = version
+            return self._vector_stores[series_name]
+    
+    def get_lexical_index(self, series_name: str) -> Optional[BM25Index]:
+        """Return the series' BM25 index, or None if --process has not built one yet."""
+        if series_name in self._lexical_indexes:
+            return self._lexical_indexes[series_name]
+        
+        with self._lock:
+            if series_name not in self._lexical_indexes:
+                index_dir = LEXICAL_INDEX / series_name
+                self._lexical_indexes[series_name] = BM25Index(index_dir) if BM25Index.exists(index_dir) else None
+            return self._lexical_indexes[series_name]
+    
+    def get_partition_index(self, series_name: str) -> Optional[PartitionIndex]:
+        """Return the series' partition index, or None if disabled, not built or not on Chroma."""
+        if series_name in self._partition_indexes:
+            return self._partition_indexes[series_name]
+        
+        with self._lock:
+            if series_name not in self._partition_indexes:
+                index_dir = PARTITION_INDEX / series_name
+                available = PARTITIONED_RETRIEVAL and VECTOR_BACKEND == "chroma" and PartitionIndex.exists(index_dir)
+                self._partition_indexes[series_name] = PartitionIndex(index_dir) if available else None
+            return self._partition_indexes[series_name]
+    
+    def get_llm(self, use_local: Optional[bool] = None):
+        """Return cached LLM instance for the backend."""
+        is_local = self.backend(use_local)
+        llm_instance = self._llms.get(is_local)
+        if llm_instance is None:
+            with self._lock:
+                if is_local not in self._llms:
+                    self._llms[is_local] = get_llm(is_local=is_local)
+                llm_instance = self._llms[is_local]
+        return llm_instance
+    
+    def get_answer_chain(self, use_local: Optional[bool] = None):
+        """Return cached stuff-documents answer chain for the backend."""
+        is_local = self.backend(use_local)
+        chain = self._answer_chains.get(is_local)
+        if chain is None:
+            llm_instance = self.get_llm(is_local)
+            with self._lock:
+                if is_local not in self._answer_chains:
+                    self._answer_chains[is_local] = create_answer_chain(llm_instance=llm_instance)
+                chain = self._answer_chains[is_local]
+        return chain
+    
+    def get_retriever(self, series_name: str, filters: Optional[Dict] = None):
+        """Return cached retriever keyed by (series, filter signature)."""
+        vector_store = self.get_vector_store(series_name)
+        metadata_filter = build_metadata_filter(filters)
+        key = (series_name, self.filter_signature(metadata_filter))
+        retriever = self._retrievers.get(key)
+        if retriever is None:
+            with self._lock:
+                if key not in self._retrievers:
+                    lexical_index = self.get_lexical_index(series_name) if RETRIEVAL_MODE != "vector" else None
+                    partition_index = self.get_partition_index(series_name) if metadata_filter else None
+                    self._retrievers[key] = create_hybrid_retriever(vector_store, lexical_index, filters,
+                                                                    partition_index=partition_index)
+                retriever = self._retrievers[key]
+        return retriever
+    
+    def get_rag_chain(self, series_name: str, filters: Optional[Dict] = None,
+                      use_local: Optional[bool] = None):
+        """Return cached retrieval chain keyed by (series, filter signature, backend)."""
+        is_local = self.backend(use_local)
+        retriever = self.get_retriever(series_name, filters)
+        key = (series_name, self.filter_signature(build_metadata_filter(filters)), is_local)
+        chain = self._rag_chains.get(key)
+        if chain is None:
+            from langchain.chains.retrieval import create_retrieval_chain
+            answer_chain = self.get_answer_chain(is_local)
+            with self._lock:
+                if key not in self._rag_chains:
+                    self._rag_chains[key] = create_retrieval_chain(
+                        create_packed_retriever(retriever, is_local), answer_chain
+                    )
+                chain = self._rag_chains[key]
+        return chain
+    
+    def invalidate(self, series_name: Optional[str] = None) -> None:
+        """Drop cached store, retrievers and chains for a series (or everything if None)."""
+        with self._lock:
+            if series_name is None:
+                self._vector_stores.clear()
+                self._lexical_indexes.clear()
+                self._partition_indexes.clear()
+                self._index_versions.clear()
+                self._retrievers.clear()
+                self._rag_chains.clear()
+            else:
+                self._vector_stores.pop(series_name, None)
+                self._lexical_indexes.pop(series_name, None)
+                self._partition_indexes.pop(series_name, None)
+                self._index_versions.pop(series_name, None)
+                for key in [k for k in self._retrievers if k[0] == series_name]:
+                    del self._retrievers[key]
+                for key in [k for k in self._rag_chains if k[0] == series_name]:
+                    del self._rag_chains[key]
+        logger.info("Registry invalidated for %s", series_name or "all series")
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(series_name)
+    
+    def warmup(self, series_names: List[str], backends=(True, False)) -> Dict[str, float]:
+        """Build each backend's LLM and answer chain and each series' store ahead of traffic.
+        
+        Returns per-component build seconds; a failing component is logged and skipped so
+        one unavailable backend does not keep the others cold.
+        """
+        steps = []
+        for is_local in backends:
+            label = "local" if is_local else "google"
+            steps += [(f"llm:{label}", lambda is_local=is_local: self.get_llm(is_local)),
+                      (f"answer_chain:{label}", lambda is_local=is_local: self.get_answer_chain(is_local))]
+        steps += [(f"vector_store:{name}", lambda name=name: self.get_vector_store(name))
+                  for name in series_names]
+        steps += [(f"lexical_index:{name}", lambda name=name: self.get_lexical_index(name))
+                  for name in series_names]
+        steps += [(f"partition_index:{name}", lambda name=name: self.get_partition_index(name))
+                  for name in series_names]
+        
+        timings = {}
+        for name, build in steps:
+            start = time.perf_counter()
+            try:
+                build()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Warmup of %s failed: %s", name, e)
+                continue
+            timings[name] = round(time.perf_counter() - start, 3)
+        logger.info("Registry warmup: %s", timings)
+        return timings
+
+
+registry = PipelineRegistry()
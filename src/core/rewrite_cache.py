@@ -0,0 +1,136 @@
+"""Persistent LRU/TTL cache for query-rewrite results."""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from config.constants import (
+    REWRITE_CACHE_ENABLED,
+    REWRITE_CACHE_MAX_ENTRIES,
+    REWRITE_CACHE_TTL_SECONDS
+)
+from config.paths import REWRITE_CACHE_DB
+from src.utils.text_processing import normalize_query
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RewriteCache:
+    """SQLite-backed cache of rewriter JSON keyed by (rewriter model, normalized question).
+    
+    Entries expire after ttl_seconds; once max_entries is exceeded the least recently
+    used entries are evicted. The database is opened lazily on first use.
+    """
+    
+    def __init__(self, db_path: Path, max_entries: int = REWRITE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = REWRITE_CACHE_TTL_SECONDS, enabled: bool = True):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0}
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rewrite_cache ("
+                "model TEXT NOT NULL, question TEXT NOT NULL, result TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL, "
+                "PRIMARY KEY (model, question))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_rewrite_last_access ON rewrite_cache(last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def get(self, question: str, model_id: str) -> Optional[Dict]:
+        """Return cached rewriter result, or None on miss/expiry."""
+        if not self.enabled:
+            return None
+        key = normalize_query(question)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT result, created_at FROM rewrite_cache WHERE model = ? AND question = ?",
+                    (model_id, key)
+                ).fetchone()
+                if row is None:
+                    self._counters["misses"] += 1
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    conn.execute(
+                        "DELETE FROM rewrite_cache WHERE model = ? AND question = ?", (model_id, key)
+                    )
+                    conn.commit()
+                    self._counters["expired"] += 1
+                    self._counters["misses"] += 1
+                    return None
+                conn.execute(
+                    "UPDATE rewrite_cache SET last_access = ? WHERE model = ? AND question = ?",
+                    (now, model_id, key)
+                )
+                conn.commit()
+                self._counters["hits"] += 1
+                return json.loads(row[0])
+            except (sqlite3.Error, json.JSONDecodeError) as e:
+                logger.warning("Rewrite cache read failed: %s", e)
+                self._counters["misses"] += 1
+                return None
+    
+    def put(self, question: str, model_id: str, result: Dict) -> None:
+        """Store rewriter result and evict least recently used entries beyond max_entries."""
+        if not self.enabled:
+            return
+        key = normalize_query(question)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO rewrite_cache "
+                    "(model, question, result, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (model_id, key, json.dumps(result, ensure_ascii=False), now, now)
+                )
+                self._counters["writes"] += 1
+                overflow = conn.execute("SELECT COUNT(*) FROM rewrite_cache").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM rewrite_cache WHERE rowid IN ("
+                        "SELECT rowid FROM rewrite_cache ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._counters["evictions"] += overflow
+                conn.commit()
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning("Rewrite cache write failed: %s", e)
+    
+    def clear(self) -> None:
+        """Remove all cached rewrites."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM rewrite_cache")
+            conn.commit()
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters and hit rate."""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["enabled"] = self.enabled
+        return stats
+
+
+rewrite_cache = RewriteCache(REWRITE_CACHE_DB, enabled=REWRITE_CACHE_ENABLED)
@@ -0,0 +1,159 @@
+"""Admission control: per-backend LLM concurrency limits with a bounded priority queue."""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from config.constants import ADMISSION_LIMITS, USE_LOCAL_LLM
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_EVALUATE = 2
+
+# Request priority travels with the asyncio context, so tasks spawned by a handler inherit it
+current_priority = contextvars.ContextVar("current_priority", default=PRIORITY_INTERACTIVE)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a backend cannot admit more work; maps to HTTP 429/503 with Retry-After."""
+    def __init__(self, backend: str, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"{backend} backend overloaded: {reason}")
+        self.backend = backend
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class BackendLimiter:
+    """At most max_concurrency holders; up to max_queue waiters ordered by (priority, arrival)."""
+    
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._wait_times = deque(maxlen=1000)
+        self._hold_times = deque(maxlen=1000)
+        self._counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+    
+    def _queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+    
+    def _retry_after(self) -> int:
+        avg_hold = sum(self._hold_times) / len(self._hold_times) if self._hold_times else 1.0
+        return max(1, math.ceil(avg_hold * (self._queued() + 1) / self.max_concurrency))
+    
+    def check_capacity(self) -> None:
+        """Fail fast if a new request would be rejected because the queue is full."""
+        if self._active >= self.max_concurrency and self._queued() >= self.max_queue:
+            self._counters["rejected_queue_full"] += 1
+            raise AdmissionRejected(self.name, "queue full", 429, self._retry_after())
+    
+    async def acquire(self, priority: int) -> None:
+        """Take a slot, waiting in priority order for at most max_wait_seconds."""
+        start = time.monotonic()
+        if self._active < self.max_concurrency and not self._queued():
+            self._active += 1
+            self._record_admit(start)
+            return
+        self.check_capacity()
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            done, _ = await asyncio.wait({future}, timeout=self.max_wait_seconds)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            future.cancel()
+            raise
+        if not done:
+            future.cancel()
+            self._counters["rejected_timeout"] += 1
+            raise AdmissionRejected(self.name, "wait timeout", 503, self._retry_after())
+        self._record_admit(start)
+    
+    def _record_admit(self, start: float) -> None:
+        self._counters["admitted"] += 1
+        self._wait_times.append(time.monotonic() - start)
+    
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        """Free a slot, handing it straight to the highest-priority live waiter."""
+        if held_seconds is not None:
+            self._hold_times.append(held_seconds)
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        """Hold a slot for the duration of the block."""
+        await self.acquire(current_priority.get() if priority is None else priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+    
+    def stats(self) -> Dict:
+        """Return concurrency, queue depth and wait-time statistics."""
+        waits = sorted(self._wait_times)
+        stats = dict(self._counters)
+        stats.update({
+            "active": self._active,
+            "queued": self._queued(),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "wait_avg_ms": 1000 * sum(waits) / len(waits) if waits else 0.0,
+            "wait_p99_ms": 1000 * waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+            "wait_max_ms": 1000 * waits[-1] if waits else 0.0
+        })
+        return stats
+
+
+class AdmissionController:
+    """One BackendLimiter per LLM backend ("local" = Ollama, "google" = Gemini)."""
+    
+    def __init__(self, limits: Dict[str, Dict] = ADMISSION_LIMITS):
+        self.limiters = {name: BackendLimiter(name, **cfg) for name, cfg in limits.items()}
+    
+    def limiter(self, use_local: Optional[bool] = None) -> BackendLimiter:
+        """Return limiter for the backend selected by use_local (None = configured default)."""
+        is_local = use_local if use_local is not None else USE_LOCAL_LLM
+        return self.limiters["local" if is_local else "google"]
+    
+    def slot(self, use_local: Optional[bool] = None, priority: Optional[int] = None):
+        """Async context manager holding one backend slot."""
+        return self.limiter(use_local).slot(priority)
+    
+    @contextmanager
+    def blocking_slot(self, loop: asyncio.AbstractEventLoop, use_local: Optional[bool] = None,
+                      priority: int = PRIORITY_INTERACTIVE):
+        """Hold one backend slot from a worker thread; the limiter is driven on its event loop."""
+        limiter = self.limiter(use_local)
+        asyncio.run_coroutine_threadsafe(limiter.acquire(priority), loop).result()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            loop.call_soon_threadsafe(limiter.release, time.monotonic() - start)
+    
+    def stats(self) -> Dict:
+        """Return per-backend statistics."""
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+admission = AdmissionController()
@@ -0,0 +1,67 @@
+"""Single-flight coalescing of identical in-flight async calls."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Call:
+    """One in-flight call shared by a leader and its followers."""
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome.
+    
+    The first caller for a key (the leader) starts the work as a task; callers arriving
+    while it runs (followers) await the same task. Results and exceptions reach every
+    waiter. A waiter being cancelled does not cancel the shared task unless it was the
+    last one still waiting.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counters = {"leaders": 0, "followers": 0, "errors": 0, "cancelled": 0}
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return func()'s result, sharing one execution among concurrent callers with the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            self._counters["leaders"] += 1
+            call.task.add_done_callback(lambda task: self._finish(key, call, task))
+        else:
+            self._counters["followers"] += 1
+            logger.info("Coalesced request onto in-flight call (%d waiting)", call.waiters + 1)
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Unregister first: a caller arriving before the done callback runs must start
+                # a fresh call instead of joining the one being cancelled
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+    
+    def _finish(self, key: Hashable, call: _Call, task: asyncio.Task) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if task.cancelled():
+            self._counters["cancelled"] += 1
+        elif task.exception() is not None:
+            self._counters["errors"] += 1
+    
+    def stats(self) -> Dict:
+        """Return leader/follower counters and number of calls in flight."""
+        stats = dict(self._counters)
+        stats["in_flight"] = len(self._calls)
+        total = stats["leaders"] + stats["followers"]
+        stats["coalesced_ratio"] = stats["followers"] / total if total else 0.0
+        return stats
@@ -0,0 +1,160 @@
+"""Embedding backends selected by EMBEDDING_BACKEND.
+
+Local backends run batched CPU inference and return L2-normalized float32 vectors, so
+ingestion and query embedding need no network access. Every backend is a LangChain
+Embeddings and is wrapped in CachedEmbeddings by vector_store.get_embeddings.
+"""
+import hashlib
+import re
+from typing import List, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from config.constants import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    ONNX_EMBEDDING_MODEL,
+    ONNX_EMBEDDING_MAX_LENGTH,
+    HASHING_EMBEDDING_DIM,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_THREADS
+)
+from config.paths import EMBEDDING_MODELS
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_HASH_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalEmbeddings(Embeddings):
+    """Base for in-process embedders: splits input into batches and normalizes the output."""
+    
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts batch by batch; returns unit-length float32 vectors as lists."""
+        if not texts:
+            return []
+        batches = [
+            self._embed_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return _normalize_rows(np.concatenate(batches)).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text."""
+        return self.embed_documents([text])[0]
+
+
+class HashingEmbeddings(LocalEmbeddings):
+    """Deterministic feature-hashing embedder over word unigrams and bigrams.
+    
+    No model files and no randomness: identical text always maps to the identical vector,
+    which makes it suitable for tests and offline pipeline runs, not for semantic quality.
+    """
+    
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM, batch_size: int = EMBEDDING_BATCH_SIZE):
+        super().__init__(batch_size)
+        self.dim = dim
+    
+    def _features(self, text: str) -> List[str]:
+        words = _HASH_TOKEN_PATTERN.findall(text.casefold())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        return vectors
+
+
+class OnnxEmbeddings(LocalEmbeddings):
+    """Sentence-embedding model exported to ONNX, run with onnxruntime on CPU.
+    
+    model_dir must contain model.onnx and a Hugging Face tokenizer.json. Token embeddings
+    are mean-pooled over the attention mask unless the model already outputs a pooled
+    sentence embedding.
+    """
+    
+    def __init__(self, model_dir, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: int = EMBEDDING_THREADS, max_length: int = ONNX_EMBEDDING_MAX_LENGTH):
+        super().__init__(batch_size)
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND='onnx' requires the onnxruntime and tokenizers packages"
+            ) from e
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / "model.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        
+        output = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        if output.ndim == 2:
+            return output
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def embed_queries(embedder: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Query-type vectors for several texts, in one batched call where the backend allows it.
+    
+    Each vector equals embedder.embed_query(text): local models embed queries and documents
+    identically, and Gemini takes the query task type on its batched endpoint.
+    """
+    if isinstance(embedder, LocalEmbeddings):
+        return embedder.embed_documents(texts)
+    try:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    except ImportError:
+        GoogleGenerativeAIEmbeddings = None
+    if GoogleGenerativeAIEmbeddings is not None and isinstance(embedder, GoogleGenerativeAIEmbeddings):
+        return embedder.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embedder.embed_query(text) for text in texts]
+
+
+def create_embedder(backend: str = EMBEDDING_BACKEND) -> Tuple[Embeddings, str]:
+    """Build the configured embedder; returns (embedder, model_id used in cache keys and index stamps)."""
+    if backend == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        logger.info("Using Google Embedding: %s", EMBEDDING_MODEL)
+        return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL
+    if backend == "onnx":
+        logger.info("Using ONNX Embedding: %s (batch %d, %d threads)",
+                    ONNX_EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS)
+        return OnnxEmbeddings(EMBEDDING_MODELS / ONNX_EMBEDDING_MODEL), f"onnx/{ONNX_EMBEDDING_MODEL}"
+    if backend == "hashing":
+        logger.info("Using hashing Embedding: %d dims", HASHING_EMBEDDING_DIM)
+        return HashingEmbeddings(), f"hashing/{HASHING_EMBEDDING_DIM}"
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
@@ -0,0 +1,387 @@
+"""In-process flat vector store: exact NumPy search over memory-mapped float32 embeddings.
+
+The VECTOR_BACKEND = "numpy" alternative to Chroma. At tens of thousands of chunks per
+series, one matrix product over every vector plus argpartition costs less than Chroma's
+per-query overhead, and the result is exact rather than an HNSW approximation.
+
+Layout of a store directory (<persist_dir>/flat):
+    segments.json       live segment names, next segment number, deleted chunk IDs
+    <segment>/          one directory per add call, complete before segments.json lists it
+        vectors.npy         float32 embeddings
+        sq_norms.npy        squared L2 norm per row (float32)
+        ids.npy             chunk ID per row (unicode)
+        seasons.npy         season per row, -1 if unknown (int16)
+        episodes.npy        episode per row, -1 if unknown (int16)
+        documents.jsonl     page_content and metadata per row
+        codes.npy, code_sq_norms.npy, scale.npy, offset.npy
+                            int8 codes and their parameters, with int8 quantization
+
+Ingestion adds one segment per batch, so each manifest checkpoint writes only the new
+chunks. Deletes are tombstones that hide rows of the segments written before them, and
+re-adding an ID hides its older rows. compact() rewrites the live rows as one segment,
+which is then searched straight from the memory mapping.
+
+With quantization="int8" (per collection, see get_vector_quantization) a compacted store
+scores queries from the int8 codes and rescores the best k * rescore_factor candidates
+with the float32 rows, which are then only read for those candidates (src/quantization.py).
+Until it is compacted (several segments or tombstones), the store searches the float32 rows.
+
+Distances are squared L2, like Chroma's default space. filter takes the Chroma-style
+$eq / $and conditions on season and episode_num that build_metadata_filter produces.
+"""
+import json
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from config.constants import QUANTIZATION_RESCORE_FACTOR
+from src.quantization import QUANTIZED_ARRAYS, check_quantization, quantize_int8, quantized_top_k
+from src.utils.file_io import write_atomic, write_json_atomic
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+FLAT_STORE_DIR = "flat"
+_SEGMENTS_FILE = "segments.json"
+_DOCUMENTS_FILE = "documents.jsonl"
+_ARRAYS = ("vectors", "sq_norms", "ids", "seasons", "episodes")
+_FILTER_COLUMNS = {"season": "seasons", "episode_num": "episodes"}
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+class _Segment:
+    """One immutable batch of rows: arrays memory-mapped, documents read on first use."""
+    
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.number = int(directory.name)
+        # Plain ndarray views of the mappings: memmap subclass arithmetic is slower per query
+        self.arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r").view(np.ndarray) for name in _ARRAYS}
+        self.quantized = None
+        if (directory / f"{QUANTIZED_ARRAYS[0]}.npy").exists():
+            self.quantized = {name: np.load(directory / f"{name}.npy", mmap_mode="r").view(np.ndarray)
+                              for name in QUANTIZED_ARRAYS}
+        self._documents = None
+    
+    def __len__(self) -> int:
+        return len(self.arrays["ids"])
+    
+    @property
+    def quantization(self) -> str:
+        return "none" if self.quantized is None else "int8"
+    
+    @classmethod
+    def write(cls, directory: Path, ids: List[str], vectors: np.ndarray,
+              texts: List[str], metadatas: List[Dict], quantization: str = "none") -> "_Segment":
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "vectors": vectors,
+            "sq_norms": np.einsum("ij,ij->i", vectors, vectors),
+            "ids": np.array(ids, dtype=str),
+            "seasons": np.array([_as_int(m.get("season")) for m in metadatas], dtype=np.int16),
+            "episodes": np.array([_as_int(m.get("episode_num")) for m in metadatas], dtype=np.int16),
+        }
+        if quantization == "int8":
+            arrays.update(quantize_int8(vectors))
+        for name, array in arrays.items():
+            write_atomic(directory / f"{name}.npy", lambda f, a=array: np.save(f, a))
+        
+        def write_documents(f):
+            for text, metadata in zip(texts, metadatas):
+                line = json.dumps({"page_content": text, "metadata": metadata}, ensure_ascii=False)
+                f.write((line + "\n").encode("utf-8"))
+        
+        write_atomic(directory / _DOCUMENTS_FILE, write_documents)
+        return cls(directory)
+    
+    def documents(self) -> List[Tuple[str, dict]]:
+        if self._documents is None:
+            documents = []
+            with open(self.directory / _DOCUMENTS_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    documents.append((record["page_content"], record["metadata"]))
+            self._documents = documents
+        return self._documents
+
+
+class FlatVectorStore(VectorStore):
+    """LangChain vector store over the segments in <persist_dir>/flat (see module docstring).
+    
+    Single-writer, like a Chroma persist directory: ingestion writes while services read
+    the state they opened, and pick up a rebuilt store through the index version stamp.
+    """
+    
+    def __init__(self, embedding_function, persist_dir, quantization: str = "none",
+                 rescore_factor: int = QUANTIZATION_RESCORE_FACTOR):
+        self._embedding = embedding_function
+        self.quantization = check_quantization(quantization)
+        self.rescore_factor = rescore_factor
+        self.store_dir = Path(persist_dir) / FLAT_STORE_DIR
+        self._segments: List[_Segment] = []
+        self._deleted: Dict[str, int] = {}
+        self._next_segment = 1
+        self._view = None
+        if self.exists(persist_dir):
+            with open(self.store_dir / _SEGMENTS_FILE, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._segments = [_Segment(self.store_dir / name) for name in state["segments"]]
+            self._deleted = state["deleted"]
+            self._next_segment = state["next_segment"]
+    
+    @staticmethod
+    def exists(persist_dir) -> bool:
+        """True if persist_dir holds a flat store."""
+        return (Path(persist_dir) / FLAT_STORE_DIR / _SEGMENTS_FILE).exists()
+    
+    @property
+    def embeddings(self):
+        return self._embedding
+    
+    def __len__(self) -> int:
+        return len(self._live_view()["ids"])
+    
+    def _save_state(self) -> None:
+        write_json_atomic(self.store_dir / _SEGMENTS_FILE, {
+            "segments": [segment.directory.name for segment in self._segments],
+            "next_segment": self._next_segment,
+            "deleted": self._deleted
+        }, indent=None)
+        self._view = None
+    
+    def _live_view(self) -> Dict[str, Any]:
+        """Live rows across segments as arrays, plus (segment, row) to locate each document.
+        
+        A single segment without tombstones is used as mapped; otherwise live rows are
+        gathered into memory once, until the next write.
+        """
+        if self._view is not None:
+            return self._view
+        if not self._segments:
+            arrays = {"vectors": np.zeros((0, 0), dtype=np.float32), "sq_norms": np.zeros(0, dtype=np.float32),
+                      "ids": np.zeros(0, dtype=str), "seasons": np.zeros(0, dtype=np.int16),
+                      "episodes": np.zeros(0, dtype=np.int16)}
+            self._view = {**arrays, "segment": np.zeros(0, dtype=np.int32), "row": np.zeros(0, dtype=np.int64),
+                          "quantized": None}
+            return self._view
+        
+        segment_of = np.concatenate([np.full(len(s), i, dtype=np.int32) for i, s in enumerate(self._segments)])
+        row_of = np.concatenate([np.arange(len(s), dtype=np.int64) for s in self._segments])
+        if len(self._segments) == 1 and not self._deleted:
+            self._view = {**self._segments[0].arrays, "segment": segment_of, "row": row_of,
+                          "quantized": self._segments[0].quantized}
+            return self._view
+        
+        ids = np.concatenate([s.arrays["ids"] for s in self._segments])
+        numbers = np.array([s.number for s in self._segments], dtype=np.int64)[segment_of]
+        # Newest row per ID, unless a later delete covers the segment it is in
+        _, newest_reversed = np.unique(ids[::-1], return_index=True)
+        keep = np.zeros(len(ids), dtype=bool)
+        keep[len(ids) - 1 - newest_reversed] = True
+        if self._deleted:
+            deleted_before = np.array([self._deleted.get(chunk, 0) for chunk in ids.tolist()], dtype=np.int64)
+            keep &= numbers > deleted_before
+        
+        self._view = {name: np.concatenate([s.arrays[name] for s in self._segments])[keep] for name in _ARRAYS}
+        self._view.update({"segment": segment_of[keep], "row": row_of[keep], "quantized": None})
+        if self.quantization != "none":
+            logger.info("Flat vector store %s is not compacted: searching float32 rows instead of %s codes",
+                        self.store_dir, self.quantization)
+        return self._view
+    
+    def _documents_at(self, view: Dict[str, Any], positions: Iterable[int]) -> List[Document]:
+        documents = []
+        for position in positions:
+            text, metadata = self._segments[view["segment"][position]].documents()[view["row"][position]]
+            documents.append(Document(page_content=text, metadata=dict(metadata)))
+        return documents
+    
+    @staticmethod
+    def _filter_mask(view: Dict[str, Any], filter: Optional[Dict]) -> Optional[np.ndarray]:  # pylint: disable=redefined-builtin
+        if not filter:
+            return None
+        mask = np.ones(len(view["ids"]), dtype=bool)
+        for condition in filter.get("$and", [filter]):
+            for key, value in condition.items():
+                if isinstance(value, dict):
+                    if set(value) != {"$eq"}:
+                        raise ValueError(f"Unsupported filter operator for the flat vector store: {value}")
+                    value = value["$eq"]
+                if key not in _FILTER_COLUMNS:
+                    raise ValueError(f"Unsupported filter key for the flat vector store: {key}")
+                mask &= view[_FILTER_COLUMNS[key]] == _as_int(value)
+        return mask
+    
+    def search_by_vectors(self, query_vectors: Sequence[Sequence[float]], k: int = 4,
+                          filter: Optional[Dict] = None) -> List[List[Tuple[Document, float]]]:  # pylint: disable=redefined-builtin
+        """Exact top-k for a batch of query vectors: one matrix product and one argpartition.
+        
+        Returns per query up to k (Document, squared L2 distance) pairs, nearest first.
+        On an int8-quantized store the candidates come from the codes instead.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        view = self._live_view()
+        mask = self._filter_mask(view, filter)
+        positions = np.arange(len(view["ids"])) if mask is None else np.flatnonzero(mask)
+        if not len(positions) or not len(queries):
+            return [[] for _ in range(len(queries))]
+        if view["quantized"] is not None:
+            rows, distances = quantized_top_k(queries, view["quantized"], view["vectors"], k, self.rescore_factor,
+                                              rows=None if mask is None else positions)
+            return [
+                list(zip(self._documents_at(view, row.tolist()), row_distances.tolist()))
+                for row, row_distances in zip(rows, distances)
+            ]
+        
+        if mask is None:
+            vectors, sq_norms = view["vectors"], view["sq_norms"]
+        else:
+            vectors, sq_norms = view["vectors"][positions], view["sq_norms"][positions]
+        
+        distances = sq_norms[None, :] - 2.0 * (queries @ vectors.T) + np.einsum("ij,ij->i", queries, queries)[:, None]
+        k = min(k, len(positions))
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < len(positions) else \
+            np.broadcast_to(np.arange(k), (len(queries), k))
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        
+        return [
+            list(zip(self._documents_at(view, positions[row].tolist()), row_distances.tolist()))
+            for row, row_distances in zip(top, top_distances)
+        ]
+    
+    def similarity_search_by_vectors(self, embeddings: Sequence[Sequence[float]], k: int = 4,
+                                     filter: Optional[Dict] = None, **kwargs: Any) -> List[List[Document]]:  # pylint: disable=redefined-builtin
+        """Batched similarity_search_by_vector: one result list per query vector."""
+        return [[doc for doc, _ in hits] for hits in self.search_by_vectors(embeddings, k, filter)]
+    
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4,
+                                    filter: Optional[Dict] = None, **kwargs: Any) -> List[Document]:  # pylint: disable=redefined-builtin
+        return self.similarity_search_by_vectors([embedding], k, filter)[0]
+    
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:  # pylint: disable=redefined-builtin
+        return self.search_by_vectors([self._embedding.embed_query(query)], k, filter)[0]
+    
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Dict] = None, **kwargs: Any) -> List[Document]:  # pylint: disable=redefined-builtin
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+    
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+    
+    def add_embeddings(self, texts: List[str], embeddings: Sequence[Sequence[float]],
+                       metadatas: Optional[List[Dict]] = None, ids: Optional[List[str]] = None) -> List[str]:
+        """Store already-embedded texts as one new segment; returns their IDs."""
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        
+        segment = _Segment.write(self.store_dir / f"{self._next_segment:06d}", ids, vectors, texts, metadatas,
+                                 self.quantization)
+        self._segments.append(segment)
+        self._next_segment += 1
+        self._save_state()
+        return ids
+    
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+    
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Hide every stored row of the IDs; compact() drops them from disk."""
+        if not ids:
+            return False
+        newest = self._next_segment - 1
+        self._deleted.update((chunk, newest) for chunk in ids)
+        self._save_state()
+        return True
+    
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, List]:
+        """Chroma-style get: {"ids", and each of "documents", "metadatas", "embeddings" in include}.
+        
+        With ids, rows come back in the order given and unknown IDs are skipped.
+        """
+        include = include if include is not None else ["documents", "metadatas"]
+        view = self._live_view()
+        if ids is None:
+            positions = list(range(len(view["ids"])))
+        else:
+            position_of = {chunk: i for i, chunk in enumerate(view["ids"].tolist())}
+            positions = [position_of[chunk] for chunk in ids if chunk in position_of]
+        
+        result = {"ids": [str(view["ids"][i]) for i in positions]}
+        if "documents" in include or "metadatas" in include:
+            documents = self._documents_at(view, positions)
+            if "documents" in include:
+                result["documents"] = [doc.page_content for doc in documents]
+            if "metadatas" in include:
+                result["metadatas"] = [doc.metadata for doc in documents]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(view["vectors"][positions]).tolist()
+        return result
+    
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        stored = self.get(list(ids), include=["documents", "metadatas"])
+        return [Document(page_content=text, metadata=metadata)
+                for text, metadata in zip(stored["documents"], stored["metadatas"])]
+    
+    def needs_compaction(self) -> bool:
+        """True with several segments, tombstones, or segments not in the configured quantization."""
+        return (len(self._segments) > 1 or bool(self._deleted)
+                or any(segment.quantization != self.quantization for segment in self._segments))
+    
+    def compact(self) -> None:
+        """Rewrite the live rows as a single segment in the configured quantization, dropping the old ones."""
+        if not self.needs_compaction():
+            return
+        view = self._live_view()
+        old_segments = self._segments
+        positions = range(len(view["ids"]))
+        documents = self._documents_at(view, positions)
+        if documents:
+            segment = _Segment.write(self.store_dir / f"{self._next_segment:06d}", view["ids"].tolist(),
+                                     np.ascontiguousarray(view["vectors"], dtype=np.float32),
+                                     [doc.page_content for doc in documents], [doc.metadata for doc in documents],
+                                     self.quantization)
+            self._segments = [segment]
+            self._next_segment += 1
+        else:
+            self._segments = []
+        self._deleted = {}
+        self._save_state()
+        for segment in old_segments:
+            shutil.rmtree(segment.directory, ignore_errors=True)
+        logger.info("Flat vector store compacted: %d chunks (%s) in %s", len(documents), self.quantization, self.store_dir)
+    
+    def reset(self) -> None:
+        """Drop every stored vector."""
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        self._segments, self._deleted, self._next_segment, self._view = [], {}, 1, None
+    
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[Dict]] = None,
+                   ids: Optional[List[str]] = None, persist_dir=None, quantization: str = "none",
+                   **kwargs: Any) -> "FlatVectorStore":
+        if persist_dir is None:
+            raise ValueError("FlatVectorStore needs a persist_dir")
+        store = cls(embedding_function=embedding, persist_dir=persist_dir, quantization=quantization)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
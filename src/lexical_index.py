@@ -0,0 +1,199 @@
+"""On-disk BM25 inverted index over the same chunks as the vector store.
+
+Layout of an index directory:
+    meta.json         document count, average length, BM25 parameters
+    vocabulary.json   term -> [postings offset, document frequency]
+    doc_ids.npy       postings document ids, grouped by term (int32)
+    term_freqs.npy    postings term frequencies, aligned with doc_ids (uint16)
+    doc_lengths.npy   tokens per document (float32)
+    seasons.npy       season per document, -1 if unknown (int16)
+    episodes.npy      episode per document, -1 if unknown (int16)
+    documents.jsonl   page_content and metadata per document, in id order
+
+Arrays are memory-mapped on load, so opening an index is cheap and its pages are shared
+between worker processes.
+"""
+import itertools
+import json
+import math
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from config.constants import BM25_K1, BM25_B
+from src.vector_store import mark_index_rebuilt
+from src.utils.file_io import write_atomic
+from src.utils.text_processing import tokenize_for_index
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_META_FILE = "meta.json"
+_VOCABULARY_FILE = "vocabulary.json"
+_DOCUMENTS_FILE = "documents.jsonl"
+_ARRAYS = ("doc_ids", "term_freqs", "doc_lengths", "seasons", "episodes")
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+class BM25Index:
+    """BM25 scoring over memory-mapped postings with season/episode filtering per posting."""
+    
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / _META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self.index_dir / _VOCABULARY_FILE, "r", encoding="utf-8") as f:
+            self.vocabulary = json.load(f)
+        self.num_docs = meta["num_docs"]
+        self.avg_doc_length = meta["avg_doc_length"] or 1.0
+        self.k1 = meta.get("k1", BM25_K1)
+        self.b = meta.get("b", BM25_B)
+        arrays = {name: np.load(self.index_dir / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        self.doc_ids = arrays["doc_ids"]
+        self.term_freqs = arrays["term_freqs"]
+        self.doc_lengths = arrays["doc_lengths"]
+        self.seasons = arrays["seasons"]
+        self.episodes = arrays["episodes"]
+        self._documents = None
+    
+    @staticmethod
+    def exists(index_dir) -> bool:
+        """True if index_dir holds a complete index."""
+        return (Path(index_dir) / _META_FILE).exists()
+    
+    @classmethod
+    def build(cls, docs: Iterable, index_dir) -> "BM25Index":
+        """Tokenize LangChain documents, write the index to index_dir and open it."""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        (index_dir / _META_FILE).unlink(missing_ok=True)
+        
+        # Documents stream to disk as they are tokenized; only postings and per-doc numbers stay in memory
+        postings = {}
+        doc_lengths, seasons, episodes = [], [], []
+        
+        def write_documents(f):
+            for doc_id, doc in enumerate(docs):
+                tokens = tokenize_for_index(doc.page_content)
+                for term, tf in Counter(tokens).items():
+                    postings.setdefault(term, []).append((doc_id, min(tf, 65535)))
+                doc_lengths.append(len(tokens))
+                seasons.append(_as_int(doc.metadata.get("season")))
+                episodes.append(_as_int(doc.metadata.get("episode_num")))
+                line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+                f.write((line + "\n").encode("utf-8"))
+        
+        # Every file is replaced by rename, so readers with the old files mapped keep valid inodes
+        write_atomic(index_dir / _DOCUMENTS_FILE, write_documents)
+        
+        vocabulary, doc_ids, term_freqs = {}, [], []
+        for term in sorted(postings):
+            vocabulary[term] = [len(doc_ids), len(postings[term])]
+            for doc_id, tf in postings[term]:
+                doc_ids.append(doc_id)
+                term_freqs.append(tf)
+        
+        arrays = {
+            "doc_ids": np.asarray(doc_ids, dtype=np.int32),
+            "term_freqs": np.asarray(term_freqs, dtype=np.uint16),
+            "doc_lengths": np.asarray(doc_lengths, dtype=np.float32),
+            "seasons": np.asarray(seasons, dtype=np.int16),
+            "episodes": np.asarray(episodes, dtype=np.int16),
+        }
+        for name, array in arrays.items():
+            write_atomic(index_dir / f"{name}.npy", lambda f, a=array: np.save(f, a))
+        write_atomic(index_dir / _VOCABULARY_FILE,
+                     lambda f: f.write(json.dumps(vocabulary, ensure_ascii=False).encode("utf-8")))
+        # meta.json last: its presence marks the index as complete
+        meta = {
+            "num_docs": len(doc_lengths),
+            "avg_doc_length": float(np.mean(doc_lengths)) if doc_lengths else 0.0,
+            "k1": BM25_K1,
+            "b": BM25_B
+        }
+        write_atomic(index_dir / _META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+        
+        logger.info("BM25 index: %d docs, %d terms, %d postings -> %s",
+                    len(doc_lengths), len(vocabulary), len(doc_ids), index_dir)
+        return cls(index_dir)
+    
+    def _load_documents(self) -> List[Tuple[str, dict]]:
+        if self._documents is None:
+            documents = []
+            with open(self.index_dir / _DOCUMENTS_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    documents.append((record["page_content"], record["metadata"]))
+            self._documents = documents
+        return self._documents
+    
+    def _allowed_mask(self, season: Optional[int], episode: Optional[int]) -> Optional[np.ndarray]:
+        if season is None and episode is None:
+            return None
+        mask = np.ones(self.num_docs, dtype=bool)
+        if season is not None:
+            mask &= self.seasons == season
+        if episode is not None:
+            mask &= self.episodes == episode
+        return mask
+    
+    def search(self, query_terms: Iterable[str], k: int,
+               season: Optional[int] = None, episode: Optional[int] = None) -> List[Tuple]:
+        """Return up to k (Document, score) pairs, best first.
+        
+        query_terms may be phrases; they are tokenized and each distinct token is scored once.
+        Postings outside the season/episode filter are dropped before scoring.
+        """
+        from langchain.schema import Document
+        
+        tokens = {token for term in query_terms for token in tokenize_for_index(term)}
+        allowed = self._allowed_mask(season, episode)
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        
+        for token in tokens:
+            entry = self.vocabulary.get(token)
+            if entry is None:
+                continue
+            offset, doc_freq = entry
+            ids = self.doc_ids[offset:offset + doc_freq]
+            tf = self.term_freqs[offset:offset + doc_freq].astype(np.float32)
+            if allowed is not None:
+                keep = allowed[ids]
+                ids, tf = ids[keep], tf[keep]
+                if not len(ids):
+                    continue
+            idf = math.log(1.0 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[ids] / self.avg_doc_length)
+            scores[ids] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        
+        documents = self._load_documents()
+        return [
+            (Document(page_content=documents[i][0], metadata=dict(documents[i][1])), float(scores[i]))
+            for i in candidates
+        ]
+
+
+def build_lexical_index(docs: Iterable, index_dir) -> Optional[BM25Index]:
+    """Rebuild the series' BM25 index from the chunked documents (a list or a stream)."""
+    docs = iter(docs)
+    first = next(docs, None)
+    if first is None:
+        logger.warning("No documents, skipping BM25 index: %s", index_dir)
+        return None
+    index = BM25Index.build(itertools.chain([first], docs), index_dir)
+    mark_index_rebuilt(os.fspath(index_dir))
+    return index
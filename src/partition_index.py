@@ -0,0 +1,161 @@
+"""Season/episode partitioned copy of a series' dense vectors for filtered retrieval.
+
+Layout of an index directory:
+    meta.json        row count, dimension, embedding model, partitions
+    vectors.npy      float32 embeddings as stored in Chroma, rows grouped by season then episode
+    sq_norms.npy     squared L2 norm per row (float32)
+    chunk_ids.npy    chunk ID per row (ASCII bytes)
+
+Each partition is one (season, episode) with a [start, end) row range. Because rows are
+sorted, a season is one contiguous slice and an episode-only filter is a few slices, so a
+filtered query scores exactly the chunks it may return and nothing else. Distances are
+squared L2, Chroma's default space, so rankings match an exact Chroma search.
+
+Arrays are memory-mapped on load, like the lexical index.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from config.constants import VECTOR_UPSERT_BATCH_SIZE
+from src.vector_store import mark_index_rebuilt
+from src.utils.file_io import write_atomic, write_json_atomic
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_META_FILE = "meta.json"
+_VECTORS_FILE = "vectors.npy"
+_NORMS_FILE = "sq_norms.npy"
+_IDS_FILE = "chunk_ids.npy"
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+class PartitionIndex:
+    """Exact squared-L2 search restricted to the rows of the matching season/episode partitions."""
+    
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / _META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.num_rows = meta["num_rows"]
+        self.dimension = meta["dimension"]
+        self.embedding_model = meta.get("embedding_model")
+        self.partitions = [tuple(partition) for partition in meta["partitions"]]
+        self.vectors = np.load(self.index_dir / _VECTORS_FILE, mmap_mode="r")
+        self.sq_norms = np.load(self.index_dir / _NORMS_FILE, mmap_mode="r")
+        self.chunk_ids = np.load(self.index_dir / _IDS_FILE, mmap_mode="r")
+    
+    @staticmethod
+    def exists(index_dir) -> bool:
+        """True if index_dir holds a complete index."""
+        return (Path(index_dir) / _META_FILE).exists()
+    
+    @classmethod
+    def build(cls, vector_store, episodes: Iterable[Tuple], index_dir, embedding_model: Optional[str] = None,
+              batch_size: int = VECTOR_UPSERT_BATCH_SIZE) -> "PartitionIndex":
+        """Copy the stored vectors of (season, episode, chunk_ids) episodes into index_dir and open it.
+        
+        Vectors are read back from the vector store by chunk ID in batches and streamed to
+        disk, so only one batch is held in memory.
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        (index_dir / _META_FILE).unlink(missing_ok=True)
+        
+        episodes = sorted(((_as_int(season), _as_int(episode), list(ids)) for season, episode, ids in episodes),
+                          key=lambda e: (e[0], e[1]))
+        partitions, chunk_ids = [], []
+        for season, episode, ids in episodes:
+            partitions.append([season, episode, len(chunk_ids), len(chunk_ids) + len(ids)])
+            chunk_ids.extend(ids)
+        
+        sq_norms, dimension = [], []
+        
+        def write_vectors(f):
+            for start in range(0, len(chunk_ids), batch_size):
+                batch = chunk_ids[start:start + batch_size]
+                stored = vector_store.get(ids=batch, include=["embeddings"])
+                by_id = dict(zip(stored["ids"], stored["embeddings"]))
+                missing = [chunk for chunk in batch if chunk not in by_id]
+                if missing:
+                    raise ValueError(f"{len(missing)} chunks missing from the vector store, e.g. {missing[0]}; "
+                                     "re-run main.py --process --force")
+                block = np.asarray([by_id[chunk] for chunk in batch], dtype=np.float32)
+                if not dimension:
+                    dimension.append(block.shape[1])
+                    np.lib.format.write_array_header_1_0(f, {
+                        "descr": np.lib.format.dtype_to_descr(block.dtype),
+                        "fortran_order": False,
+                        "shape": (len(chunk_ids), dimension[0])
+                    })
+                f.write(block.tobytes())
+                sq_norms.append(np.einsum("ij,ij->i", block, block))
+        
+        write_atomic(index_dir / _VECTORS_FILE, write_vectors)
+        write_atomic(index_dir / _NORMS_FILE, lambda f: np.save(f, np.concatenate(sq_norms)))
+        ids_array = np.array([chunk.encode("ascii") for chunk in chunk_ids])
+        write_atomic(index_dir / _IDS_FILE, lambda f: np.save(f, ids_array))
+        # meta.json last: its presence marks the index as complete
+        write_json_atomic(index_dir / _META_FILE, {
+            "num_rows": len(chunk_ids),
+            "dimension": dimension[0],
+            "embedding_model": embedding_model,
+            "partitions": partitions
+        }, indent=None)
+        
+        logger.info("Partition index: %d chunks in %d partitions -> %s", len(chunk_ids), len(partitions), index_dir)
+        return cls(index_dir)
+    
+    def row_ranges(self, season: Optional[int] = None, episode: Optional[int] = None) -> List[Tuple[int, int]]:
+        """[start, end) row ranges of the partitions matching the filter, adjacent ranges merged."""
+        ranges = []
+        for part_season, part_episode, start, end in self.partitions:
+            if (season is not None and part_season != season) or (episode is not None and part_episode != episode):
+                continue
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            elif end > start:
+                ranges.append((start, end))
+        return ranges
+    
+    def search(self, query_vector: Sequence[float], k: int,
+               season: Optional[int] = None, episode: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return up to k (chunk_id, squared L2 distance) pairs within the filter, nearest first."""
+        ranges = self.row_ranges(season, episode)
+        if not ranges:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            rows = np.arange(start, end)
+            vectors, sq_norms = self.vectors[start:end], self.sq_norms[start:end]
+        else:
+            rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+            vectors, sq_norms = self.vectors[rows], self.sq_norms[rows]
+        
+        distances = sq_norms - 2.0 * (vectors @ query) + float(query @ query)
+        top = np.arange(len(rows))
+        if len(top) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [(self.chunk_ids[rows[i]].decode("ascii"), float(distances[i])) for i in top]
+
+
+def build_partition_index(vector_store, episodes: Iterable[Tuple], index_dir,
+                          embedding_model: Optional[str] = None) -> Optional[PartitionIndex]:
+    """Rebuild the series' partition index from (season, episode, chunk_ids) per indexed episode."""
+    episodes = [episode for episode in episodes if episode[2]]
+    if not episodes:
+        logger.warning("No indexed chunks, skipping partition index: %s", index_dir)
+        return None
+    index = PartitionIndex.build(vector_store, episodes, index_dir, embedding_model=embedding_model)
+    mark_index_rebuilt(os.fspath(index_dir))
+    return index
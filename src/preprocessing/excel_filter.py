@@ -1,6 +1,7 @@
 """Excel filtering utilities to remove dialogues from audio descriptions."""
 import re
-from typing import List, Dict
+from typing import List, Dict, Sequence
+import numpy as np
 from config.constants import (
     MIN_ACTION_WORDS, 
     ACTION_INDICATORS, 
@@ -13,36 +14,33 @@ from src.utils.logging import get_logger
 logger = get_logger(__name__)
 
 
+# Compiled once: one alternation per rule instead of a re.search per pattern or verb per call
+_QUOTE_CHARS = ('"', "'")
+_QUESTION_STARTERS = tuple(DIALOGUE_QUESTION_STARTERS)
+_SPEAKER_REGEX = re.compile("|".join(f"(?:{pattern})" for pattern in SPEAKER_PATTERNS), re.IGNORECASE)
+_DIALOGUE_VERB_REGEX = re.compile(rf"\b\w+\s+(?:{'|'.join(map(re.escape, DIALOGUE_VERBS))})\b")
+# Lookahead matches at every offset, so overlapping indicators ("opensits") are all seen
+_ACTION_INDICATOR_REGEX = re.compile(f"(?=({'|'.join(map(re.escape, ACTION_INDICATORS))}))")
+
+
 def has_quotation_marks(text: str) -> bool:
     """Check if text contains any type of quotation marks."""
-    return '"' in text or "'" in text or '"' in text or '"' in text or "'" in text or "'" in text
+    return any(quote in text for quote in _QUOTE_CHARS)
 
 
 def is_question_dialogue(text: str) -> bool:
     """Check if text is a question that sounds like dialogue."""
-    if text.strip().endswith('?'):
-        text_lower = text.lower()
-        for starter in DIALOGUE_QUESTION_STARTERS:
-            if text_lower.startswith(starter):
-                return True
-    return False
+    return text.strip().endswith('?') and text.lower().startswith(_QUESTION_STARTERS)
 
 
 def has_speaker_pattern(text: str) -> bool:
     """Check if text contains speaker patterns like 'Name:' or 'said/asked'."""
-    for pattern in SPEAKER_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    return False
+    return _SPEAKER_REGEX.search(text) is not None
 
 
 def has_dialogue_verbs(text: str) -> bool:
     """Check if text contains dialogue-indicating verbs like 'said' or 'asked'."""
-    text_lower = text.lower()
-    for verb in DIALOGUE_VERBS:
-        if re.search(rf'\b\w+\s+{verb}\b', text_lower):
-            return True
-    return False
+    return _DIALOGUE_VERB_REGEX.search(text.lower()) is not None
 
 
 def is_too_short(text: str) -> bool:
@@ -53,48 +51,41 @@ def is_too_short(text: str) -> bool:
 
 def has_action_indicators(text: str) -> bool:
     """Check if text contains multiple action-indicating words."""
-    text_lower = text.lower()
-    action_count = sum(1 for indicator in ACTION_INDICATORS if indicator in text_lower)
-    return action_count >= 2
+    return len(set(_ACTION_INDICATOR_REGEX.findall(text.lower()))) >= 2
 
 
 def is_dialogue_text(text: str) -> bool:
     """Return True if text is dialogue (filter), False if action (keep)."""
-    if not text or not text.strip():
-        return True
-    
-    text = text.strip()
-    
-    if has_quotation_marks(text):
+    text = str(text).strip()
+    if not text or has_quotation_marks(text):
         return True
-    if is_question_dialogue(text):
+    lowered = text.lower()
+    if text.endswith('?') and lowered.startswith(_QUESTION_STARTERS):
         return True
-    if has_speaker_pattern(text):
+    if _SPEAKER_REGEX.search(text) or _DIALOGUE_VERB_REGEX.search(lowered):
         return True
-    if has_dialogue_verbs(text):
-        return True
-    if has_action_indicators(text):
+    # Long enough texts are kept, so action indicators are only counted for short ones
+    if not is_too_short(text):
         return False
-    if is_too_short(text):
-        return True
+    return len(set(_ACTION_INDICATOR_REGEX.findall(lowered))) < 2
+
+
+def dialogue_mask(texts: Sequence[str]) -> np.ndarray:
+    """Boolean mask over a column of texts: True where is_dialogue_text would filter the text.
     
-    return False
+    Texts are checked one by one so each stops at its first deciding rule; pandas .str methods
+    on object columns loop in Python as well and measured slower than this.
+    """
+    return np.fromiter((is_dialogue_text(text) for text in texts), dtype=bool, count=len(texts))
 
 
 def filter_dialogues_from_actions(actions: List[Dict]) -> tuple[List[Dict], int, int]:
     """Filter dialogues from actions, return (filtered_actions, kept_count, removed_count)."""
-    filtered = []
-    removed_count = 0
-    
-    for action in actions:
-        text = action.get('text', '')
-        clean_text = text.replace('[ACTION: ', '').replace(']', '').strip()
-        
-        if is_dialogue_text(clean_text):
-            removed_count += 1
-
-        else:
-            filtered.append(action)
+    clean_texts = [action.get('text', '').replace('[ACTION: ', '').replace(']', '').strip()
+                   for action in actions]
+    is_dialogue = dialogue_mask(clean_texts)
+    filtered = [action for action, drop in zip(actions, is_dialogue) if not drop]
+    removed_count = int(is_dialogue.sum())
     
     kept_count = len(filtered)
     
@@ -1,13 +1,16 @@
 """Excel parsing utilities for action descriptions."""
-import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from config.constants import ACTION_DURATION_MS
+from src.scene_store import scene_suffix, write_scenes
 from src.utils.logging import get_logger
 from src.preprocessing.excel_filter import filter_dialogues_from_actions
 
 logger = get_logger(__name__)
 
+EXCEL_COLUMNS = ["Time", "Subtitle"]
+
 def parse_time_to_ms(time_val) -> int:
     """Convert time formats (1:30, 90s) to milliseconds."""
     if pd.isna(time_val):
@@ -27,6 +30,26 @@ def parse_time_to_ms(time_val) -> int:
     return int(total_seconds * 1000)
 
 
+def parse_times_to_ms(values: pd.Series) -> list:
+    """Column version of parse_time_to_ms with identical results.
+    
+    Numeric columns (seconds) are converted in one NumPy pass, since str() of a float
+    parses back to the same float; text and time-of-day columns use parse_time_to_ms.
+    """
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return [parse_time_to_ms(value) for value in values.tolist()]
+    
+    seconds = values.to_numpy(dtype=np.float64)
+    missing = np.isnan(seconds)
+    # inf and values beyond int64 milliseconds take the row-wise path (and its errors)
+    if not np.all(missing | (np.abs(seconds) < 9e15)):
+        return [parse_time_to_ms(value) for value in values.tolist()]
+    
+    result = np.zeros(len(seconds), dtype=np.int64)
+    result[~missing] = (seconds[~missing] * 1000).astype(np.int64)
+    return result.tolist()
+
+
 def ms_to_timestamp(ms: int) -> str:
     """Convert milliseconds to 'HH:MM:SS,mmm' format."""
     seconds, milliseconds = divmod(ms, 1000)
@@ -47,25 +70,21 @@ def process_excel(file_path: Path, is_action: bool = False, filter_dialogues: bo
     Returns:
         List of scene dictionaries
     """
-    df = pd.read_excel(file_path)
+    df = pd.read_excel(file_path, usecols=EXCEL_COLUMNS)
+    start_times = parse_times_to_ms(df["Time"])
+    texts = [str(value).strip() for value in df["Subtitle"].tolist()]
+    scene_type = "action" if is_action else "dialogue"
+    
     results = []
-
-    for _, row in df.iterrows():
-        start_ms = parse_time_to_ms(row['Time'])
+    for start_ms, text in zip(start_times, texts):
         end_ms = start_ms + ACTION_DURATION_MS
-        
-        text = str(row['Subtitle']).strip()
-        
-        if is_action:
-            text = f"[ACTION: {text}]"
-        
         results.append({
-            "text": text,
+            "text": f"[ACTION: {text}]" if is_action else text,
             "start_time": ms_to_timestamp(start_ms),
             "end_time": ms_to_timestamp(end_ms),
             "start_ms": start_ms,
             "end_ms": end_ms,
-            "type": "action" if is_action else "dialogue"
+            "type": scene_type
         })
     
     # Filter dialogues if requested
@@ -77,8 +96,32 @@ def process_excel(file_path: Path, is_action: bool = False, filter_dialogues: bo
     return results
 
 
+def save_excel_file_to_json(excel_path: Path, raw_dir: Path, processed_dir: Path,
+                            is_action: bool = False, filter_dialogues: bool = True,
+                            force: bool = False) -> Path:
+    """Process single Excel file and save its scenes (JSON or columnar, per SCENE_STORE_FORMAT).
+    
+    Existing output is kept unless force.
+    """
+    excel_path = Path(excel_path)
+    rel_path = excel_path.relative_to(raw_dir)
+    json_path = (Path(processed_dir) / rel_path).with_suffix(scene_suffix())
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    if json_path.exists() and not force:
+        return json_path
+    
+    scenes_data = process_excel(excel_path, is_action=is_action, 
+                                filter_dialogues=filter_dialogues)
+    
+    write_scenes(json_path, scenes_data)
+    
+    logger.info("Processed %s: %d scenes", excel_path.name, len(scenes_data))
+    return json_path
+
+
 def save_excel_scenes_to_json(raw_dir: Path, processed_dir: Path, is_action: bool = False, 
-                              filter_dialogues: bool = True) -> None:
+                              filter_dialogues: bool = True, force: bool = False) -> None:
     """
     Process Excel files in directory and save as JSON.
     
@@ -87,6 +130,7 @@ def save_excel_scenes_to_json(raw_dir: Path, processed_dir: Path, is_action: boo
         processed_dir: Directory to save processed JSON files
         is_action: Whether to treat content as actions
         filter_dialogues: Whether to filter out dialogues (default: True for actions)
+        force: Re-process files even if their JSON output already exists
     """
     raw_dir = Path(raw_dir)
     processed_dir = Path(processed_dir)
@@ -94,23 +138,7 @@ def save_excel_scenes_to_json(raw_dir: Path, processed_dir: Path, is_action: boo
     if not processed_dir.exists():
         processed_dir.mkdir(parents=True, exist_ok=True)
     
-    def process_single_excel(excel_path: Path):
-        """Process single Excel file and save to JSON."""
-        rel_path = excel_path.relative_to(raw_dir)
-        json_path = (processed_dir / rel_path).with_suffix(".json")
-        json_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        if json_path.exists():
-            return
-        
-        scenes_data = process_excel(excel_path, is_action=is_action, 
-                                    filter_dialogues=filter_dialogues)
-        
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(scenes_data, f, ensure_ascii=False, indent=4)
-        
-        logger.info("Processed %s: %d scenes", excel_path.name, len(scenes_data))
-    
     excel_files = list(raw_dir.rglob("*.xlsx"))
     for excel_path in excel_files:
-        process_single_excel(excel_path)
+        save_excel_file_to_json(excel_path, raw_dir, processed_dir, is_action=is_action,
+                                filter_dialogues=filter_dialogues, force=force)
@@ -1,76 +1,70 @@
-import json
-import os
+from bisect import bisect_left, bisect_right
 from typing import Dict, List, Tuple
-from config.constants import NGRAM_SIZE, TIME_WINDOW_MS
+from config.constants import NGRAM_SIZE, TIME_WINDOW_MS, MERGE_SEARCH_BUCKETS
+from src.scene_store import read_scenes, write_scenes
 from src.utils.logging import get_logger
 from src.utils.text_processing import normalize_text, build_ngrams
 
 logger = get_logger(__name__)
 
 
-def _build_time_buckets(dialogues: List[Dict]) -> Dict[int, List[Dict]]:
-    """Group dialogues by time windows for efficient filtering."""
-    dialogue_by_time = {}
-    for d in dialogues:
-        start_ms = d.get('start_ms', 0)
-        time_bucket = start_ms // TIME_WINDOW_MS
-        if time_bucket not in dialogue_by_time:
-            dialogue_by_time[time_bucket] = []
-        dialogue_by_time[time_bucket].append(d)
-    return dialogue_by_time
-
-
-def _find_potential_overlaps(action: Dict, dialogue_by_time: Dict[int, List[Dict]]) -> List[Dict]:
-    """Find dialogues that overlap with action in time."""
-    act_start = action.get('start_ms', 0)
-    act_end = action.get('end_ms', 0)
-    time_bucket = act_start // TIME_WINDOW_MS
-    potential_overlaps = []
+class _DialogueIndex:
+    """Dialogues sorted by start time, with normalized text, words and n-grams computed once.
     
-    for bucket_offset in range(-120, 121):
-        bucket = time_bucket + bucket_offset
-        if bucket in dialogue_by_time:
-            for d in dialogue_by_time[bucket]:
-                d_start = d.get('start_ms', 0)
-                d_end = d.get('end_ms', 0)
-                
-                if d_start <= act_start and act_end <= d_end:
-                    potential_overlaps.append(d)
-                elif act_start <= d_end and d_start <= act_end:
-                    potential_overlaps.append(d)
+    Candidates for an action are found by binary search instead of probing every time
+    bucket: a dialogue can only overlap the action if it starts no later than the action's
+    end and no earlier than the action's start minus the longest dialogue duration.
+    """
     
-    return potential_overlaps
+    def __init__(self, dialogues: List[Dict]):
+        spans = sorted((d.get('start_ms', 0), d.get('end_ms', 0), i) for i, d in enumerate(dialogues))
+        self.starts = [start for start, _, _ in spans]
+        self.ends = [end for _, end, _ in spans]
+        self.texts = [normalize_text(dialogues[i].get('text', '')) for _, _, i in spans]
+        self.words = [text.split() for text in self.texts]
+        self.ngrams = [build_ngrams(text, NGRAM_SIZE) if text else set() for text in self.texts]
+        self.max_duration = max((max(0, end - start) for start, end, _ in spans), default=0)
+    
+    def find_overlaps(self, action: Dict) -> List[int]:
+        """Indexes of dialogues overlapping the action and starting within MERGE_SEARCH_BUCKETS of it."""
+        act_start = action.get('start_ms', 0)
+        act_end = action.get('end_ms', 0)
+        time_bucket = act_start // TIME_WINDOW_MS
+        window_start = (time_bucket - MERGE_SEARCH_BUCKETS) * TIME_WINDOW_MS
+        window_end = (time_bucket + MERGE_SEARCH_BUCKETS + 1) * TIME_WINDOW_MS
+        
+        lo = bisect_left(self.starts, max(window_start, min(act_start, act_end) - self.max_duration))
+        hi = min(bisect_left(self.starts, window_end), bisect_right(self.starts, max(act_start, act_end)))
+        return [
+            i for i in range(lo, hi)
+            if (self.starts[i] <= act_start and act_end <= self.ends[i])
+            or (act_start <= self.ends[i] and self.starts[i] <= act_end)
+        ]
 
 
-def _is_duplicate_action(action_text: str, potential_overlaps: List[Dict]) -> bool:
+def _is_duplicate_action(action_text: str, index: _DialogueIndex, candidates: List[int]) -> bool:
     """Check if action is duplicate using substring, word sequence, and n-gram matching."""
-    if not potential_overlaps:
+    if not candidates:
         return False
     
     act_words = action_text.split()
     
     if len(act_words) < 5:
-        for po in potential_overlaps:
-            po_text = normalize_text(po.get('text', ''))
-            if action_text == po_text:
-                return True
-        return False
+        return any(index.texts[i] == action_text for i in candidates)
     
-    for po in potential_overlaps:
-        po_text = normalize_text(po.get('text', ''))
+    act_ngrams = build_ngrams(action_text, NGRAM_SIZE)
+    for i in candidates:
+        po_text = index.texts[i]
         if not po_text:
             continue
         
         if action_text in po_text:
             return True
         
-        dia_words = po_text.split()
-        if _check_word_sequence_match(act_words, dia_words):
+        if _check_word_sequence_match(act_words, index.words[i]):
             return True
         
-        act_ngrams = build_ngrams(action_text, NGRAM_SIZE)
-        dia_ngrams = build_ngrams(po_text, NGRAM_SIZE)
-        
+        dia_ngrams = index.ngrams[i]
         if act_ngrams and dia_ngrams:
             overlap = len(act_ngrams & dia_ngrams)
             overlap_ratio = overlap / len(act_ngrams)
@@ -101,9 +95,9 @@ def _check_word_sequence_match(action_words: List[str], dialogue_words: List[str
     return match_ratio >= 0.8
 
 
-def _merge_and_deduplicate(dialogues: List[Dict], actions: List[Dict], 
-                           dialogue_by_time: Dict) -> Tuple[List[Dict], int, int]:
+def _merge_and_deduplicate(dialogues: List[Dict], actions: List[Dict]) -> Tuple[List[Dict], int, int]:
     """Merge actions into dialogues with duplicate detection."""
+    index = _DialogueIndex(dialogues)
     merged_list = list(dialogues)
     added_actions = 0
     skipped_duplicates = 0
@@ -122,8 +116,7 @@ def _merge_and_deduplicate(dialogues: List[Dict], actions: List[Dict],
             added_actions += 1
             continue
         
-        potential_overlaps = _find_potential_overlaps(act, dialogue_by_time)
-        is_duplicate = _is_duplicate_action(act_text_clean, potential_overlaps)
+        is_duplicate = _is_duplicate_action(act_text_clean, index, index.find_overlaps(act))
         
         if is_duplicate:
             skipped_duplicates += 1
@@ -146,14 +139,17 @@ def _renumber_scene_ids(merged_list: List[Dict]) -> None:
         item['scene_id'] = i + 1
 
 
+def merge_scenes(dialogues: List[Dict], actions: List[Dict]) -> Tuple[List[Dict], int, int]:
+    """Merge, sort and renumber scenes; returns (merged_list, added_actions, skipped_duplicates)."""
+    merged_list, added_actions, skipped_duplicates = _merge_and_deduplicate(dialogues, actions)
+    _sort_chronologically(merged_list)
+    _renumber_scene_ids(merged_list)
+    return merged_list, added_actions, skipped_duplicates
+
+
 def _save_merged_file(merged_list: List[Dict], output_path: str) -> None:
-    """Save merged scenes to JSON file."""
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(merged_list, f, indent=4, ensure_ascii=False)
+    """Save merged scenes atomically, in the format given by output_path's suffix."""
+    write_scenes(output_path, merged_list)
 
 
 def merge_json_files(dialogue_path: str, action_path: str, output_path: str) -> None:
@@ -161,22 +157,12 @@ def merge_json_files(dialogue_path: str, action_path: str, output_path: str) ->
     logger.info("Loading files...")
     
     try:
-        with open(dialogue_path, 'r', encoding='utf-8') as f:
-            dialogues = json.load(f)
-            
-        with open(action_path, 'r', encoding='utf-8') as f:
-            actions = json.load(f)
+        dialogues = read_scenes(dialogue_path)
+        actions = read_scenes(action_path)
             
         logger.info("Dialogues: %d lines, Actions: %d lines", len(dialogues), len(actions))
         
-        dialogue_by_time = _build_time_buckets(dialogues)
-        
-        merged_list, added_actions, skipped_duplicates = _merge_and_deduplicate(
-            dialogues, actions, dialogue_by_time
-        )
-        
-        _sort_chronologically(merged_list)
-        _renumber_scene_ids(merged_list)
+        merged_list, added_actions, skipped_duplicates = merge_scenes(dialogues, actions)
         _save_merged_file(merged_list, output_path)
         
         logger.info("Merge successful: %d actions added, %d duplicates removed, %d total lines", 
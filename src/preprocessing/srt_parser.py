@@ -1,9 +1,9 @@
 """SRT subtitle file parsing utilities."""
 import pysubs2
-import json
 from pathlib import Path
 from src.models.scene import Scene
 from config.constants import SCENE_GAP_THRESHOLD_SECONDS
+from src.scene_store import scene_suffix, write_scenes
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -54,7 +54,29 @@ def split_srt_into_scenes(srt_path: Path, gap_threshold: int = SCENE_GAP_THRESHO
     return scenes
 
 
-def save_srt_scenes_to_json(raw_dir: Path, processed_dir: Path) -> None:
+def save_srt_file_to_json(srt_path: Path, raw_dir: Path, processed_dir: Path, force: bool = False) -> Path:
+    """Process single SRT file and save its scenes (JSON or columnar, per SCENE_STORE_FORMAT).
+    
+    Existing output is kept unless force.
+    """
+    srt_path = Path(srt_path)
+    rel_path = srt_path.relative_to(raw_dir)
+    json_path = (Path(processed_dir) / rel_path).with_suffix(scene_suffix())
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    if json_path.exists() and not force:
+        return json_path
+    
+    scenes = split_srt_into_scenes(srt_path)
+    scenes_list = [s.to_dict(idx + 1) for idx, s in enumerate(scenes)]
+    
+    write_scenes(json_path, scenes_list)
+    
+    logger.info("Processed %s: %d scenes", srt_path.name, len(scenes_list))
+    return json_path
+
+
+def save_srt_scenes_to_json(raw_dir: Path, processed_dir: Path, force: bool = False) -> None:
     """Process SRT files in directory and save as JSON."""
     raw_dir = Path(raw_dir)
     processed_dir = Path(processed_dir)
@@ -62,23 +84,6 @@ def save_srt_scenes_to_json(raw_dir: Path, processed_dir: Path) -> None:
     if not processed_dir.exists():
         processed_dir.mkdir(parents=True, exist_ok=True)
     
-    def process_single_srt(srt_path: Path):
-        """Process single SRT file and save to JSON."""
-        rel_path = srt_path.relative_to(raw_dir)
-        json_path = (processed_dir / rel_path).with_suffix(".json")
-        json_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        if json_path.exists():
-            return
-        
-        scenes = split_srt_into_scenes(srt_path)
-        scenes_list = [s.to_dict(idx + 1) for idx, s in enumerate(scenes)]
-        
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(scenes_list, f, ensure_ascii=False, indent=4)
-        
-        logger.info("Processed %s: %d scenes", srt_path.name, len(scenes_list))
-    
     srt_files = list(raw_dir.rglob("*.srt"))
     for srt_path in srt_files:
-        process_single_srt(srt_path)
+        save_srt_file_to_json(srt_path, raw_dir, processed_dir, force=force)
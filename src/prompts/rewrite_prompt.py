@@ -1,7 +1,16 @@
 """Query rewrite and optimization prompt for RAG system."""
+from functools import lru_cache
+from typing import Dict, Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from src.core.llm_engine import llm
+from config.constants import FAST_PATH_ENABLED, FAST_PATH_MIN_CONFIDENCE, USE_LOCAL_LLM
+from src.core.llm_engine import get_model_name
+from src.core.query_analyzer import QueryAnalysis, query_analyzer
+from src.core.registry import registry
+from src.core.rewrite_cache import rewrite_cache
+from src.core.scheduler import admission
+from src.utils.concurrency import run_blocking
+from src.utils.text_processing import QUERY_TERMS_SEPARATOR
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -123,6 +132,16 @@ schema = {
 }
 parser = JsonOutputParser(schema=schema)
 
+expansion_schema = {
+    "type": "object",
+    "properties": {
+        "real_question": schema["properties"]["real_question"],
+        "search_terms": schema["properties"]["search_terms"],
+    },
+    "required": ["real_question", "search_terms"]
+}
+expansion_parser = JsonOutputParser(schema=expansion_schema)
+
 REWRITE_PROMPT = PromptTemplate(
     template=(
         _SYSTEM_INSTRUCTIONS +
@@ -142,29 +161,153 @@ REWRITE_PROMPT = PromptTemplate(
     partial_variables={"format_instructions": parser.get_format_instructions()},
 )
 
-rewriter_chain = REWRITE_PROMPT | llm | parser
+# Fast path: filters and series already come from the rules, so only translation and term expansion remain
+EXPANSION_PROMPT = PromptTemplate(
+    template=(
+        _SYSTEM_INSTRUCTIONS +
+        "### TASK BREAKDOWN\n\n" +
+        _TRANSLATION_RULES +
+        _SEARCH_EXPANSION_RULES +
+        "### FORMAT INSTRUCTIONS\n"
+        "{format_instructions}\n\n"
+        "### USER QUESTION\n"
+        "{question}\n\n"
+        "Remember: Output ONLY valid JSON. No markdown, no explanations.\n"
+    ),
+    input_variables=["question"],
+    partial_variables={"format_instructions": expansion_parser.get_format_instructions()},
+)
+
+
+@lru_cache(maxsize=1)
+def get_rewriter_chain():
+    """Compose the rewriter chain on first use; the LLM instance is shared through the registry."""
+    return REWRITE_PROMPT | registry.get_llm(USE_LOCAL_LLM) | parser
+
+
+@lru_cache(maxsize=1)
+def get_expansion_chain():
+    """Compose the translation/term-expansion chain used when the rules resolved filters and series."""
+    return EXPANSION_PROMPT | registry.get_llm(USE_LOCAL_LLM) | expansion_parser
+
+
+def _rewriter(expand_only: bool) -> tuple:
+    """Return (chain, cache model id); expansion results are cached apart from full rewrites."""
+    if expand_only:
+        return get_expansion_chain(), f"{get_model_name()}:expand"
+    return get_rewriter_chain(), get_model_name()
 
 
-def optimized_rag_ask(user_query: str) -> tuple:
-    """Optimize user query for better retrieval."""
+class QueryRewrite:
+    """Request-scoped rewrite result shared by every per-series retrieval and generation."""
+    def __init__(self, original_query: str, optimized_query: str, filters: Dict, detected_series: str):
+        self.original_query = original_query
+        self.optimized_query = optimized_query
+        self.filters = filters or {}
+        self.detected_series = detected_series or ""
+    
+    def filters_for(self, season: Optional[int] = None, episode: Optional[int] = None) -> Dict:
+        """Return a copy of the filters with explicit request season/episode applied."""
+        filters = dict(self.filters)
+        if season:
+            filters['season'] = str(season)
+        if episode:
+            filters['episode'] = str(episode)
+        return filters
+
+
+def _parse_rewrite_result(user_query: str, result: dict) -> tuple:
+    """Turn raw rewriter JSON into (combined_query, filters, detected_series)."""
+    real_q = result.get("real_question", "")
+    terms = result.get("search_terms", [])
+    filters = result.get("filters", {})
+    detected_series = result.get("detected_series", "")
+    
+    season_filter = filters.get("season", "")
+    episode_filter = filters.get("episode", "")
+    
+    logger.info("Query: %s → %s | Series: %s | Season: %s | Episode: %s | Terms: %d", 
+               user_query[:50], real_q[:50], detected_series or "?",
+               season_filter or "?", episode_filter or "?", len(terms))
+
+    combined_query = f"{real_q}{QUERY_TERMS_SEPARATOR}{', '.join(terms)}"
+    
+    return (combined_query, filters, detected_series)
+
+
+def optimized_rag_ask(user_query: str, expand_only: bool = False) -> tuple:
+    """Optimize user query for better retrieval.
+    
+    expand_only asks the LLM for the translation and search terms alone; filters and series
+    then come back empty and are filled in by the rule-based analysis.
+    """
     try:
-        result = rewriter_chain.invoke({"question": user_query})
-        real_q = result.get("real_question", "")
-        terms = result.get("search_terms", [])
-        filters = result.get("filters", {})
-        detected_series = result.get("detected_series", "")
-        
-        season_filter = filters.get("season", "")
-        episode_filter = filters.get("episode", "")
-        
-        logger.info("Query: %s → %s | Series: %s | Season: %s | Episode: %s | Terms: %d", 
-                   user_query[:50], real_q[:50], detected_series or "?",
-                   season_filter or "?", episode_filter or "?", len(terms))
-
-        combined_query = f"{real_q} | TERMS: {', '.join(terms)}"
-        
-        return (combined_query, filters, detected_series)
+        chain, model_id = _rewriter(expand_only)
+        result = rewrite_cache.get(user_query, model_id)
+        if result is None:
+            result = chain.invoke({"question": user_query})
+            rewrite_cache.put(user_query, model_id, result)
+        return _parse_rewrite_result(user_query, result)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error("Query rewrite failed: %s", e)
+        return (user_query, {}, "")
+
 
+async def aoptimized_rag_ask(user_query: str, expand_only: bool = False) -> tuple:
+    """Async variant of optimized_rag_ask using the chain's native ainvoke."""
+    try:
+        chain, model_id = _rewriter(expand_only)
+        # SQLite lookups and writes go to the executor so they never stall the event loop
+        result = await run_blocking(rewrite_cache.get, user_query, model_id)
+        if result is None:
+            async with admission.slot():
+                result = await chain.ainvoke({"question": user_query})
+            await run_blocking(rewrite_cache.put, user_query, model_id, result)
+        return _parse_rewrite_result(user_query, result)
     except (ValueError, KeyError, TypeError) as e:
         logger.error("Query rewrite failed: %s", e)
         return (user_query, {}, "")
+
+
+def _fast_path(user_query: str, series: Optional[str]) -> tuple:
+    """Return (analysis, confident); confident means the rules alone resolved filters and series."""
+    if not FAST_PATH_ENABLED:
+        return None, False
+    analysis = query_analyzer.analyze(user_query)
+    confidence = analysis.confidence(series)
+    if confidence < FAST_PATH_MIN_CONFIDENCE:
+        return analysis, False
+    logger.info("Fast path (%.2f): %s | Series: %s | Season: %s | Episode: %s", confidence,
+                user_query[:50], analysis.detected_series or "?",
+                analysis.filters["season"] or "?", analysis.filters["episode"] or "?")
+    return analysis, True
+
+
+def _apply_analysis(rewrite: QueryRewrite, analysis: Optional[QueryAnalysis]) -> QueryRewrite:
+    """Prefer deterministic regex filters over the LLM's; fill in a series the LLM missed."""
+    if analysis is None:
+        return rewrite
+    for key, value in analysis.filters.items():
+        if value:
+            rewrite.filters[key] = value
+    if not rewrite.detected_series:
+        rewrite.detected_series = analysis.detected_series
+    return rewrite
+
+
+def rewrite_query(user_query: str, series: Optional[str] = None) -> QueryRewrite:
+    """Rewrite user query once and wrap the result for reuse across series.
+    
+    series is the requested target ("all"/None when it must be detected); it decides how much
+    the rule-based fast path must recognize before the LLM is only asked to translate and expand.
+    """
+    analysis, confident = _fast_path(user_query, series)
+    rewrite = QueryRewrite(user_query, *optimized_rag_ask(user_query, expand_only=confident))
+    return _apply_analysis(rewrite, analysis)
+
+
+async def arewrite_query(user_query: str, series: Optional[str] = None) -> QueryRewrite:
+    """Async variant of rewrite_query."""
+    analysis, confident = _fast_path(user_query, series)
+    rewrite = QueryRewrite(user_query, *(await aoptimized_rag_ask(user_query, expand_only=confident)))
+    return _apply_analysis(rewrite, analysis)
@@ -0,0 +1,92 @@
+"""Int8 scalar quantization of embedding matrices with full-precision rescoring.
+
+Each dimension is mapped linearly onto 256 levels between its minimum and maximum:
+    x ~ offset + scale * code,    code in int8
+
+Search scores every row from the 1-byte codes, keeps the k * rescore_factor nearest
+candidates, and ranks those by exact squared L2 over the float32 vectors. The float32
+matrix can stay memory-mapped on disk: only candidate rows are read, so resident memory
+is about a quarter of the unquantized matrix.
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8")
+QUANTIZED_ARRAYS = ("codes", "code_sq_norms", "scale", "offset")
+# Rows dequantized per matrix product, bounding the float32 temporary to a few MB
+_BLOCK_ROWS = 4096
+
+
+def check_quantization(mode: str) -> str:
+    """Validate a quantization mode name and return it."""
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization: {mode} (expected one of {QUANTIZATION_MODES})")
+    return mode
+
+
+def quantize_int8(vectors: np.ndarray) -> Dict[str, np.ndarray]:
+    """Encode float32 rows as int8 codes; returns the arrays in QUANTIZED_ARRAYS."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    low, high = vectors.min(axis=0), vectors.max(axis=0)
+    scale = np.where(high > low, (high - low) / 255.0, 1.0).astype(np.float32)
+    offset = (low + 128.0 * scale).astype(np.float32)
+    
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    code_sq_norms = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        block = vectors[start:start + _BLOCK_ROWS]
+        block_codes = np.clip(np.rint((block - offset) / scale), -128, 127)
+        codes[start:start + len(block)] = block_codes
+        decoded = offset + scale * block_codes
+        code_sq_norms[start:start + len(block)] = np.einsum("ij,ij->i", decoded, decoded)
+    return {"codes": codes, "code_sq_norms": code_sq_norms, "scale": scale, "offset": offset}
+
+
+def approximate_sq_distances(queries: np.ndarray, quantized: Dict[str, np.ndarray],
+                             rows=None) -> np.ndarray:
+    """Squared L2 from each query to the decoded rows (all rows, or a slice / index array)."""
+    codes = quantized["codes"] if rows is None else quantized["codes"][rows]
+    code_sq_norms = quantized["code_sq_norms"] if rows is None else quantized["code_sq_norms"][rows]
+    scaled = queries * quantized["scale"]
+    dots = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), _BLOCK_ROWS):
+        block = codes[start:start + _BLOCK_ROWS].astype(np.float32)
+        dots[:, start:start + len(block)] = scaled @ block.T
+    dots += (queries @ quantized["offset"])[:, None]
+    return code_sq_norms[None, :] - 2.0 * dots + np.einsum("ij,ij->i", queries, queries)[:, None]
+
+
+def quantized_top_k(queries: np.ndarray, quantized: Dict[str, np.ndarray], vectors: np.ndarray, k: int,
+                    rescore_factor: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest k rows per query: int8 candidates, rescored with exact float32 distances.
+    
+    rows restricts the search to those row indices. Returns (row indices, squared L2
+    distances), both (queries, min(k, rows)) and nearest first; indices are into vectors.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    row_ids = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    approx = approximate_sq_distances(queries, quantized, rows)
+    count = min(len(row_ids), max(k * rescore_factor, k))
+    if count == 0:
+        return np.empty((len(queries), 0), dtype=row_ids.dtype), np.empty((len(queries), 0), dtype=np.float32)
+    if count < len(row_ids):
+        candidates = np.argpartition(approx, count - 1, axis=1)[:, :count]
+    else:
+        candidates = np.broadcast_to(np.arange(count), (len(queries), count))
+    candidate_rows = row_ids[candidates]
+    
+    gathered = np.asarray(vectors[candidate_rows.ravel()], dtype=np.float32).reshape(len(queries), count, -1)
+    differences = gathered - queries[:, None, :]
+    exact = np.einsum("qcd,qcd->qc", differences, differences)
+    
+    k = min(k, count)
+    top = np.argpartition(exact, k - 1, axis=1)[:, :k] if k < count else np.broadcast_to(np.arange(k), exact.shape)
+    top_distances = np.take_along_axis(exact, top, axis=1)
+    order = np.argsort(top_distances, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    return np.take_along_axis(candidate_rows, top, axis=1), np.take_along_axis(top_distances, order, axis=1)
+
+
+def quantized_nbytes(quantized: Dict[str, np.ndarray]) -> int:
+    """Bytes the quantized search keeps resident (codes, norms and per-dimension parameters)."""
+    return sum(int(quantized[name].nbytes) for name in QUANTIZED_ARRAYS)
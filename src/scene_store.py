@@ -0,0 +1,211 @@
+"""Processed scene files: indented JSON or a memory-mapped columnar format.
+
+A columnar .scenes file holds one episode as struct-of-arrays:
+    b"SCNS", format version (uint32), header length (uint32), JSON header, 8-byte aligned buffers
+
+Each scene key becomes a column. Integer columns (scene_id, start_ms, end_ms) use the
+smallest integer dtype that fits and are read zero-copy from the mapping. Low-cardinality
+strings (type) are uint8 codes plus a category list. Other strings (text, start_time,
+end_time) are per-row character lengths plus one zlib-compressed UTF-8 heap, decompressed
+and decoded once per column. Anything else is stored JSON-encoded like a string. Keys
+missing from some scenes get a presence mask. Records read back equal the records written.
+
+read_scenes / write_scenes pick the format from the file suffix, so a series can mix both
+while it is being converted (see scripts/convert_scenes.py).
+"""
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List
+import numpy as np
+from config.constants import SCENE_STORE_FORMAT
+from src.utils.file_io import write_atomic, write_json_atomic
+
+SCENE_SUFFIXES = {"json": ".json", "columnar": ".scenes"}
+_MAGIC = b"SCNS"
+_VERSION = 1
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGNMENT = 8
+_MAX_CATEGORIES = 255
+_HEAP_COMPRESSION_LEVEL = 6
+_INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+_MISSING = object()
+
+
+def scene_suffix(store_format: str = SCENE_STORE_FORMAT) -> str:
+    """File suffix for processed scene files in store_format ("json" or "columnar")."""
+    try:
+        return SCENE_SUFFIXES[store_format]
+    except KeyError:
+        raise ValueError(f"Unknown SCENE_STORE_FORMAT: {store_format}") from None
+
+
+def iter_scene_files(directory) -> List[Path]:
+    """All processed scene files under directory, in either format, sorted."""
+    return sorted(p for p in Path(directory).rglob("*") if p.suffix in SCENE_SUFFIXES.values())
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _smallest_int_array(values: List[int]) -> np.ndarray:
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.array(values, dtype=dtype)
+    raise ValueError("Integer column out of int64 range")
+
+
+def _encode_column(values: List) -> Dict:
+    """Pick the column kind and build its buffers; returns {"kind", "buffers", ...}."""
+    given = [v for v in values if v is not _MISSING]
+    if all(type(v) is int and -2 ** 63 <= v < 2 ** 63 for v in given):
+        ints = _smallest_int_array([0 if v is _MISSING else v for v in values])
+        return {"kind": "int", "buffers": {"values": ints}}
+    
+    if all(type(v) is str for v in given):
+        kind, strings = "str", ["" if v is _MISSING else v for v in values]
+        categories = sorted(set(given))
+        if len(categories) <= _MAX_CATEGORIES and len(categories) * 8 <= len(values):
+            codes = {category: i for i, category in enumerate(categories)}
+            column_codes = np.array([codes.get(v, 0) for v in strings], dtype=np.uint8)
+            return {"kind": "cat", "categories": categories, "buffers": {"values": column_codes}}
+    else:
+        kind = "json"
+        strings = ["" if v is _MISSING else json.dumps(v, ensure_ascii=False) for v in values]
+    
+    heap = zlib.compress("".join(strings).encode("utf-8"), _HEAP_COMPRESSION_LEVEL)
+    lengths = _smallest_int_array([len(string) for string in strings])
+    return {"kind": kind, "buffers": {"lengths": lengths, "heap": np.frombuffer(heap, dtype=np.uint8)}}
+
+
+def write_scene_file(path, records: Iterable[Dict]) -> None:
+    """Write scene dicts as a columnar .scenes file (atomically)."""
+    records = list(records)
+    names = list(dict.fromkeys(key for record in records for key in record))
+    
+    columns, arrays, cursor = [], [], 0
+    for name in names:
+        values = [record.get(name, _MISSING) for record in records]
+        present = np.array([v is not _MISSING for v in values], dtype=np.uint8)
+        column = _encode_column(values)
+        if not present.all():
+            column["buffers"]["present"] = present
+        
+        specs = {}
+        for buffer_name, array in column.pop("buffers").items():
+            cursor = _align(cursor)
+            specs[buffer_name] = [cursor, int(array.size), array.dtype.str]
+            arrays.append((cursor, array))
+            cursor += array.nbytes
+        columns.append({"name": name, **column, "buffers": specs})
+    
+    header = json.dumps({"rows": len(records), "columns": columns}, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+    
+    def write(f):
+        f.write(_PREAMBLE.pack(_MAGIC, _VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_start - _PREAMBLE.size - len(header)))
+        position = 0
+        for offset, array in arrays:
+            f.write(b"\0" * (offset - position))
+            f.write(array.tobytes())
+            position = offset + array.nbytes
+    
+    write_atomic(path, write)
+
+
+class SceneFile:
+    """Read-only view of a .scenes file; integer and category codes are zero-copy views of the mapping."""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        # Plain ndarray view of the mapping: slicing a memmap subclass costs more than small files take to read
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r").view(np.ndarray)
+        magic, version, header_length = _PREAMBLE.unpack(self._buffer[:_PREAMBLE.size].tobytes())
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a version {_VERSION} scene file: {self.path}")
+        header_end = _PREAMBLE.size + header_length
+        header = json.loads(self._buffer[_PREAMBLE.size:header_end].tobytes().decode("utf-8"))
+        self._data_start = _align(header_end)
+        self.rows = header["rows"]
+        self._columns = {column["name"]: column for column in header["columns"]}
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    @property
+    def columns(self) -> List[str]:
+        """Column names in first-seen key order."""
+        return list(self._columns)
+    
+    def _array(self, spec) -> np.ndarray:
+        offset, count, dtype = spec
+        dtype = np.dtype(dtype)
+        start = self._data_start + offset
+        return self._buffer[start:start + count * dtype.itemsize].view(dtype)
+    
+    def present(self, name: str) -> np.ndarray:
+        """Boolean mask of scenes that have the key."""
+        spec = self._columns[name]["buffers"].get("present")
+        return np.ones(self.rows, dtype=bool) if spec is None else self._array(spec).astype(bool)
+    
+    def column(self, name: str):
+        """An int column as an integer array view; other columns as a list (None where missing)."""
+        column = self._columns[name]
+        buffers = column["buffers"]
+        if column["kind"] == "int":
+            return self._array(buffers["values"])
+        if column["kind"] == "cat":
+            categories = column["categories"]
+            values = [categories[code] for code in self._array(buffers["values"]).tolist()]
+        else:
+            heap = zlib.decompress(self._array(buffers["heap"])).decode("utf-8")
+            ends = np.cumsum(self._array(buffers["lengths"]), dtype=np.int64).tolist()
+            values = [heap[start:end] for start, end in zip([0] + ends, ends)]
+            if column["kind"] == "json":
+                values = [json.loads(v) if v else None for v in values]
+        if "present" in buffers:
+            values = [v if keep else None for v, keep in zip(values, self.present(name).tolist())]
+        return values
+    
+    def records(self) -> List[Dict]:
+        """All scenes as dicts, equal to the records that were written."""
+        columns = {}
+        for name in self._columns:
+            values = self.column(name)
+            columns[name] = values.tolist() if isinstance(values, np.ndarray) else values
+        masks = {name: self.present(name).tolist() for name, column in self._columns.items()
+                 if "present" in column["buffers"]}
+        if columns and not masks:
+            return [dict(zip(columns, row)) for row in zip(*columns.values())]
+        
+        records = [{} for _ in range(self.rows)]
+        for name, values in columns.items():
+            mask = masks.get(name)
+            for i, (record, value) in enumerate(zip(records, values)):
+                if mask is None or mask[i]:
+                    record[name] = value
+        return records
+
+
+def read_scenes(path) -> List[Dict]:
+    """Load a processed scene file in either format as a list of scene dicts."""
+    path = Path(path)
+    if path.suffix == SCENE_SUFFIXES["columnar"]:
+        return SceneFile(path).records()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_scenes(path, records: List[Dict]) -> None:
+    """Write scene dicts atomically in the format given by path's suffix."""
+    path = Path(path)
+    if path.suffix == SCENE_SUFFIXES["columnar"]:
+        write_scene_file(path, records)
+    else:
+        write_json_atomic(path, records)
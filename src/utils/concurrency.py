@@ -0,0 +1,64 @@
+"""Concurrency helpers for running blocking code from async handlers and pipelining iterators."""
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.constants import BLOCKING_EXECUTOR_WORKERS
+
+_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_EXECUTOR_WORKERS,
+    thread_name_prefix="blocking"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run blocking callable on the bounded executor without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+_DONE = object()
+
+
+def bounded_prefetch(iterable, max_items):
+    """Iterate iterable in a background thread, running at most max_items ahead of the caller.
+    
+    The producer blocks while the queue is full, so memory stays bounded by max_items while
+    producing overlaps with consuming. Producer exceptions are re-raised in the caller; if
+    the caller stops early, the producer is stopped at its next item.
+    """
+    items = queue.Queue(maxsize=max(1, max_items))
+    stop = threading.Event()
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:  # pylint: disable=broad-except
+            put((_DONE, e))
+    
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -1,8 +1,8 @@
 """Data loading utilities."""
-import json
 import os
 import re
 from langchain.schema import Document
+from src.scene_store import iter_scene_files, read_scenes
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -16,10 +16,31 @@ def extract_season_episode(filename):
     return None, None
 
 
+def load_scene_file_as_documents(j_path, series_folder_name):
+    """Load scenes from one merged scene file (JSON or columnar) as LangChain Documents."""
+    documents = []
+    season, episode = extract_season_episode(j_path.stem)
+    # The JSON file name regardless of format, so chunk IDs and citations survive a format switch
+    source = j_path.with_suffix(".json").name
+    for s in read_scenes(j_path):
+        metadata = {
+            "source": source,
+            "episode": j_path.stem,
+            "season": season,
+            "episode_num": episode,
+            "series": series_folder_name,
+            "start_time": s["start_time"],
+            "end_time": s["end_time"],
+            "scene_id": s["scene_id"]
+        }
+        documents.append(Document(page_content=s["text"], metadata=metadata))
+    return documents
+
+
 def load_scenes_as_documents(processed_dir, series_folder_name):
     """Load scenes from JSON files as LangChain Documents."""
     clean_data = []
-    json_files = sorted(list(processed_dir.rglob("*.json")))
+    json_files = iter_scene_files(processed_dir)
     
     if not json_files:
         logger.warning("No JSON files in %s", processed_dir)
@@ -29,22 +50,8 @@ def load_scenes_as_documents(processed_dir, series_folder_name):
     
     for j_path in json_files:
         try:
-            season, episode = extract_season_episode(j_path.stem)
-            with open(j_path, "r", encoding="utf-8") as f:
-                scenes_data = json.load(f)
-                for s in scenes_data:
-                    metadata = {
-                        "source": j_path.name,
-                        "episode": j_path.stem,
-                        "season": season,
-                        "episode_num": episode,
-                        "series": series_folder_name,
-                        "start_time": s["start_time"],
-                        "end_time": s["end_time"],
-                        "scene_id": s["scene_id"]
-                    }
-                    clean_data.append(Document(page_content=s["text"], metadata=metadata))
-        except (json.JSONDecodeError, KeyError, OSError) as e:
+            clean_data.extend(load_scene_file_as_documents(j_path, series_folder_name))
+        except (ValueError, KeyError, OSError) as e:
             logger.error("Failed: %s - %s", j_path.name, e)
     
     logger.info("Loaded %d scenes from %d files", len(clean_data), len(json_files))
@@ -0,0 +1,127 @@
+"""Disk-backed embedding cache keyed by (model, text hash)."""
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+from src.embedders import embed_queries
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_SQLITE_MAX_PARAMS = 900
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 hex digest of text (UTF-8)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap any LangChain Embeddings with a SQLite cache shared by ingestion and querying.
+    
+    Document and query vectors are cached separately ("document"/"query" kind), since
+    some providers embed them with different task types. embed_documents and embed_queries
+    look a whole batch up in bulk, send only misses to the wrapped model and write them
+    back in one transaction.
+    """
+    
+    def __init__(self, underlying: Embeddings, model_id: str, db_path: Path):
+        self.underlying = underlying
+        self.model_id = model_id
+        self.db_path = Path(db_path)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, kind, hash))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def _lookup(self, kind: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(unique), _SQLITE_MAX_PARAMS):
+                batch = unique[i:i + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND kind = ? AND hash IN ({placeholders})",
+                    [self.model_id, kind, *batch]
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+        return found
+    
+    def _store(self, kind: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, hash, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_id, kind, h, array("f", vec).tobytes()) for h, vec in items.items()]
+            )
+            conn.commit()
+    
+    def _embed_cached(self, texts: List[str], kind: str, embed_fn) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        try:
+            found = self._lookup(kind, hashes)
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache read failed: %s", e)
+            found = {}
+        
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = text
+        
+        hits = len(texts) - sum(1 for h in hashes if h in missing)
+        self._counters["hits"] += hits
+        self._counters["misses"] += len(texts) - hits
+        
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            try:
+                self._store(kind, computed)
+            except sqlite3.Error as e:
+                logger.warning("Embedding cache write failed: %s", e)
+            found.update(computed)
+            logger.info("Embedding cache: %d hits, %d computed", hits, len(missing))
+        
+        return [found[h] for h in hashes]
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only texts not already cached."""
+        return self._embed_cached(texts, "document", self.underlying.embed_documents)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the cached vector for identical query text."""
+        return self._embed_cached([text], "query", lambda ts: [self.underlying.embed_query(ts[0])])[0]
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries; vectors and cache entries are the same as embed_query's."""
+        return self._embed_cached(texts, "query", lambda ts: embed_queries(self.underlying, ts))
+    
+    def stats(self) -> Dict:
+        """Return hit/miss counters (per text)."""
+        stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
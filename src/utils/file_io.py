@@ -0,0 +1,51 @@
+"""Atomic file writes: readers and concurrent workers never see a half-written file."""
+import json
+import os
+import shutil
+from pathlib import Path
+
+
+def _tmp_path(path: Path) -> Path:
+    # Unique per process so parallel workers writing the same target never share a temp file
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def write_json_atomic(path, data, indent: int = 4) -> None:
+    """Serialize data to a temp file in the target directory, then rename it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def copy_file_atomic(source, path) -> None:
+    """Copy source to a temp file next to path, then rename it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_atomic(path, write) -> None:
+    """Call write(f) on a binary temp file next to path, then rename it over path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -1,10 +1,16 @@
 """Text processing utilities."""
 import re
+import unicodedata
 from nltk.util import ngrams as create_ngrams
-from config.constants import NGRAM_SIZE
+from config.constants import NGRAM_SIZE, BM25_STOPWORDS
 
 _BRACKET_PATTERN = re.compile(r'\[.*?\]')
 _NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+_TOKEN_PATTERN = re.compile(r'\w+')
+# Fold Turkish dotted/dotless I variants together so "WILL", "Will" and "İstanbul" normalize consistently
+_TURKISH_I_MAP = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+# Rewritten queries are "<english question> | TERMS: term1, term2, ..."
+QUERY_TERMS_SEPARATOR = " | TERMS: "
 
 def normalize_text(text):
     """Normalize text: remove brackets/special chars, lowercase."""
@@ -16,3 +22,19 @@ def build_ngrams(text, n=NGRAM_SIZE):
     """Build n-gram set for text matching."""
     words = text.split()
     return {text} if len(words) < n else {" ".join(gram) for gram in create_ngrams(words, n)}
+
+def normalize_query(text):
+    """Normalize user question for cache keys: Turkish-aware casefold, fold punctuation/whitespace."""
+    text = unicodedata.normalize('NFC', str(text)).translate(_TURKISH_I_MAP).casefold()
+    text = _NON_WORD_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+def tokenize_for_index(text):
+    """Tokenize text for the lexical index: same case folding as queries, stopwords dropped."""
+    text = unicodedata.normalize('NFC', str(text)).translate(_TURKISH_I_MAP).casefold()
+    return [t for t in _TOKEN_PATTERN.findall(text) if len(t) > 1 and t not in BM25_STOPWORDS]
+
+def split_search_query(query):
+    """Split a rewritten query into (question, search_terms); plain queries have no terms."""
+    question, _, terms = str(query).partition(QUERY_TERMS_SEPARATOR)
+    return question.strip(), [t.strip() for t in terms.split(",") if t.strip()]
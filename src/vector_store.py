@@ -1,28 +1,165 @@
-"""Vector Store Utilities."""
+"""Vector Store Utilities.
+
+Embedding client, text splitter and vector store are created on first use rather than at import.
+VECTOR_BACKEND picks Chroma or the in-process NumPy store (src/flat_vector_store.py); both
+live in the series' persist directory and share its version and embedding model stamps.
+"""
 import os
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import time
+from functools import lru_cache
 from dotenv import load_dotenv
-from config.constants import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL
+from config.constants import (
+    CHUNK_SIZE, CHUNK_OVERLAP, VECTOR_UPSERT_BATCH_SIZE, VECTOR_BACKEND, VECTOR_QUANTIZATION,
+    VECTOR_QUANTIZATION_BY_SERIES
+)
+from config.paths import EMBEDDING_CACHE_DB
+from src.embedders import create_embedder
+from src.utils.embedding_cache import CachedEmbeddings
 from src.utils.logging import get_logger
 
 load_dotenv()
 logger = get_logger(__name__)
 
-logger.info("Using Google Embedding: %s", EMBEDDING_MODEL)
-embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+@lru_cache(maxsize=1)
+def get_embeddings():
+    """Return the process-wide cached embedder for EMBEDDING_BACKEND, creating it on first call."""
+    embedder, model_id = create_embedder()
+    return CachedEmbeddings(embedder, model_id=model_id, db_path=EMBEDDING_CACHE_DB)
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    add_start_index=True
-)
+@lru_cache(maxsize=1)
+def get_text_splitter():
+    """Return the chunking text splitter used during ingestion."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True
+    )
+
+INDEX_VERSION_FILE = ".index_version"
+EMBEDDING_MODEL_FILE = ".embedding_model"
+
+def mark_index_rebuilt(persist_dir):
+    """Write a version stamp so running services can detect the rebuilt index."""
+    with open(os.path.join(persist_dir, INDEX_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+
+def get_index_version(persist_dir):
+    """Return the index version stamp for persist_dir, or None if never stamped."""
+    try:
+        with open(os.path.join(persist_dir, INDEX_VERSION_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _check_embedding_model(embedder, persist_dir):
+    """Refuse to open an index built with a different embedding model (vectors would not compare)."""
+    model_id = getattr(embedder, "model_id", None)
+    try:
+        with open(os.path.join(persist_dir, EMBEDDING_MODEL_FILE), "r", encoding="utf-8") as f:
+            index_model_id = f.read().strip()
+    except OSError:
+        return
+    if model_id and index_model_id != model_id:
+        raise ValueError(
+            f"Index {persist_dir} was built with embedding model '{index_model_id}' but "
+            f"'{model_id}' is configured; delete it and re-run main.py --process"
+        )
+
+def _write_embedding_model(embedder, persist_dir):
+    model_id = getattr(embedder, "model_id", None)
+    if model_id:
+        with open(os.path.join(persist_dir, EMBEDDING_MODEL_FILE), "w", encoding="utf-8") as f:
+            f.write(model_id)
+
+def get_vector_quantization(collection_name):
+    """Configured vector quantization for a series: its override, else VECTOR_QUANTIZATION."""
+    return VECTOR_QUANTIZATION_BY_SERIES.get(collection_name, VECTOR_QUANTIZATION)
+
+def _check_backend(backend):
+    if backend not in ("chroma", "numpy"):
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+
+def open_vector_db(embedder, collection_name, persist_dir, reset=False, backend=VECTOR_BACKEND):
+    """Open (or create) the series' vector store for incremental updates; reset drops all stored vectors."""
+    _check_backend(backend)
+    os.makedirs(persist_dir, exist_ok=True)
+    if backend == "numpy":
+        from src.flat_vector_store import FlatVectorStore
+        vector_store = FlatVectorStore(embedding_function=embedder, persist_dir=persist_dir,
+                                       quantization=get_vector_quantization(collection_name))
+        if reset:
+            logger.info("Resetting database: %s", collection_name)
+            vector_store.reset()
+            _write_embedding_model(embedder, persist_dir)
+        else:
+            _check_embedding_model(embedder, persist_dir)
+        return vector_store
+    
+    from langchain_chroma import Chroma
+    vector_store = Chroma(
+        collection_name=collection_name,
+        embedding_function=embedder,
+        persist_directory=persist_dir
+    )
+    if reset:
+        logger.info("Resetting database: %s", collection_name)
+        vector_store.delete_collection()
+        vector_store = Chroma(
+            collection_name=collection_name,
+            embedding_function=embedder,
+            persist_directory=persist_dir
+        )
+        _write_embedding_model(embedder, persist_dir)
+    else:
+        _check_embedding_model(embedder, persist_dir)
+    return vector_store
+
+def upsert_chunks(vector_store, docs, ids, delete_ids=(), batch_size=VECTOR_UPSERT_BATCH_SIZE):
+    """Delete stale chunk IDs, then add (or overwrite) chunks under their deterministic IDs."""
+    delete_ids = list(delete_ids)
+    for i in range(0, len(delete_ids), batch_size):
+        vector_store.delete(ids=delete_ids[i:i + batch_size])
+    for i in range(0, len(docs), batch_size):
+        vector_store.add_documents(docs[i:i + batch_size], ids=ids[i:i + batch_size])
+    logger.info("Vector store updated: %d chunks added, %d removed", len(docs), len(delete_ids))
+
+def compact_vector_db(vector_store):
+    """Merge the NumPy store's per-batch segments and apply its quantization; Chroma needs nothing."""
+    compact = getattr(vector_store, "compact", None)
+    if compact is not None:
+        compact()
+
+def vector_db_needs_compaction(embedder, collection_name, persist_dir, backend=VECTOR_BACKEND):
+    """True if the NumPy store is uncompacted or stored in a different quantization than configured."""
+    if backend != "numpy":
+        return False
+    from src.flat_vector_store import FlatVectorStore
+    if not FlatVectorStore.exists(persist_dir):
+        return False
+    return open_vector_db(embedder, collection_name, persist_dir, backend=backend).needs_compaction()
 
-def get_or_create_vector_db(docs, embedder, collection_name, persist_dir):
-    """Create or load Chroma vector store."""
+def get_or_create_vector_db(docs, embedder, collection_name, persist_dir, backend=VECTOR_BACKEND):
+    """Create or load the series' vector store (Chroma or the NumPy flat store)."""
+    _check_backend(backend)
+    if backend == "numpy":
+        from src.flat_vector_store import FlatVectorStore
+        if FlatVectorStore.exists(persist_dir):
+            logger.info("Loading existing flat database: %s", collection_name)
+            _check_embedding_model(embedder, persist_dir)
+            return FlatVectorStore(embedding_function=embedder, persist_dir=persist_dir,
+                                   quantization=get_vector_quantization(collection_name))
+        logger.info("Creating flat database '%s' with %d docs", collection_name, len(docs))
+        vector_store = FlatVectorStore.from_documents(docs, embedder, persist_dir=persist_dir,
+                                                      quantization=get_vector_quantization(collection_name))
+        _write_embedding_model(embedder, persist_dir)
+        mark_index_rebuilt(persist_dir)
+        return vector_store
+    
+    from langchain_chroma import Chroma
     if os.path.exists(persist_dir) and os.listdir(persist_dir):
         logger.info("Loading existing database: %s", collection_name)
+        _check_embedding_model(embedder, persist_dir)
         vector_store = Chroma(
             collection_name=collection_name,
             embedding_function=embedder,
@@ -36,5 +173,7 @@ def get_or_create_vector_db(docs, embedder, collection_name, persist_dir):
             collection_name=collection_name,
             persist_directory=persist_dir
         )
+        _write_embedding_model(embedder, persist_dir)
+        mark_index_rebuilt(persist_dir)
         logger.info("Database created: %s", persist_dir)
     return vector_store
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Tests for src.core.answer_cache."""
+import pytest
+from src.core.answer_cache import SemanticAnswerCache
+
+CONSTRAINTS = ("stranger_things", None, None, True, "")
+
+
+def _payload(answer, series="stranger_things"):
+    return {"answer": answer, "series_queried": [series]}
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(max_entries=2, threshold=0.9, eviction="lru")
+
+
+def test_similar_question_with_same_constraints_hits(cache):
+    cache.insert([1.0, 0.0], CONSTRAINTS, _payload("Will is in the Upside Down"))
+    assert cache.lookup([0.99, 0.05], CONSTRAINTS)["answer"] == "Will is in the Upside Down"
+    assert cache.lookup([0.0, 1.0], CONSTRAINTS) is None
+    assert cache.lookup([1.0, 0.0], ("stranger_things", "2", None, True, "")) is None
+
+
+def test_constraint_index_only_keeps_live_entries(cache):
+    for season in range(50):
+        cache.insert([1.0, 0.0], ("stranger_things", str(season), None, True, ""), _payload(str(season)))
+    assert len(cache._constraint_index) == 2  # pylint: disable=protected-access
+    assert cache.lookup([1.0, 0.0], ("stranger_things", "49", None, True, ""))["answer"] == "49"
+    assert cache.lookup([1.0, 0.0], ("stranger_things", "0", None, True, "")) is None
+    assert cache.stats()["evictions"] == 48
+
+
+def test_shared_constraints_survive_until_their_last_entry_goes(cache):
+    cache.insert([1.0, 0.0], CONSTRAINTS, _payload("first"))
+    cache.insert([0.0, 1.0], CONSTRAINTS, _payload("second"))
+    cache.insert([0.6, 0.8], ("breaking_bad", None, None, True, ""), _payload("third", "breaking_bad"))
+    assert cache.lookup([0.0, 1.0], CONSTRAINTS)["answer"] == "second"
+    cache.invalidate_series("stranger_things")
+    assert cache.lookup([0.0, 1.0], CONSTRAINTS) is None
+    assert list(cache._constraint_index) == [("breaking_bad", None, None, True, "")]  # pylint: disable=protected-access
+
+
+def test_invalidating_everything_empties_the_index(cache):
+    cache.insert([1.0, 0.0], CONSTRAINTS, _payload("first"))
+    cache.invalidate_series()
+    assert cache.stats()["size"] == 0
+    assert not cache._constraint_index  # pylint: disable=protected-access
@@ -0,0 +1,77 @@
+"""Tests for per-item error isolation in src.core.batch."""
+import asyncio
+import pytest
+from langchain_core.documents import Document
+from src.core import batch
+from src.core.batch import BatchQueryRunner
+from src.prompts.rewrite_prompt import QueryRewrite
+
+
+class FakeService:
+    AVAILABLE_SERIES = ["stranger_things"]
+
+
+class FakeVectorStore:
+    """Dense search over nothing: every query finds one document, except the poisoned one."""
+
+    def similarity_search_by_vector(self, vector, k, filter=None):  # pylint: disable=redefined-builtin
+        if vector == [0.0]:
+            raise RuntimeError("corrupt segment")
+        return [Document(page_content=f"hit for {vector}", metadata={"scene_id": 1, "start_index": 0})]
+
+
+class FakeEmbeddings:
+    def embed_queries(self, texts):
+        return [[0.0] if text == "poisoned" else [1.0] for text in texts]
+
+
+async def _rewrite(query, series=None):
+    if query == "bad":
+        raise RuntimeError("rewriter timed out")
+    return QueryRewrite(query, query, {}, "stranger_things")
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(batch, "arewrite_query", _rewrite)
+    return BatchQueryRunner(FakeService())
+
+
+def _unit(query):
+    return {"key": query, "series": "stranger_things", "rewrite": QueryRewrite(query, query, {}, ""),
+            "metadata_filter": None, "filter_values": {}, "use_local": True}
+
+
+def test_failed_rewrite_fails_only_its_own_items(runner, monkeypatch):
+    planned = []
+
+    async def retrieve_all(units):
+        planned.extend(unit["key"][0] for unit in units)
+        for unit in units:
+            unit["docs"] = []
+
+    async def generate(unit, _):
+        unit["answer"] = "ok"
+
+    monkeypatch.setattr(runner, "_retrieve_all", retrieve_all)
+    monkeypatch.setattr(runner, "_generate", generate)
+    monkeypatch.setattr(runner, "_build_response", lambda item, units: {"status": "success"})
+
+    responses = asyncio.run(runner.run([{"query": "good"}, {"query": "bad"}, {"query": "Bad"}]))
+
+    assert responses[0] == {"status": "success"}
+    for response in responses[1:]:
+        assert response["status"] == "error" and "rewriter timed out" in response["message"]
+    assert planned == ["good"]
+
+
+def test_failed_unit_does_not_sink_its_retrieval_group(runner, monkeypatch):
+    monkeypatch.setattr(batch, "RETRIEVAL_MODE", "vector")
+    monkeypatch.setattr(batch, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(batch.registry, "get_vector_store", lambda series_name: FakeVectorStore())
+    units = [_unit("first"), _unit("poisoned"), _unit("last")]
+
+    asyncio.run(runner._retrieve_all(units))  # pylint: disable=protected-access
+
+    assert ["docs" in unit for unit in units] == [True, False, True]
+    assert units[0]["docs"][0].page_content == "hit for [1.0]"
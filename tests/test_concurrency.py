@@ -0,0 +1,38 @@
+"""Tests for src.utils.concurrency."""
+import threading
+import pytest
+from src.utils.concurrency import bounded_prefetch
+
+
+def _prefetch_threads():
+    return [t for t in threading.enumerate() if t.name == "prefetch"]
+
+
+def test_items_arrive_in_order():
+    assert list(bounded_prefetch(iter(range(50)), 3)) == list(range(50))
+
+
+def test_producer_error_is_raised_in_caller():
+    def produce():
+        yield 1
+        raise ValueError("bad input")
+
+    items = bounded_prefetch(produce(), 2)
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="bad input"):
+        next(items)
+
+
+def test_closing_stops_the_producer():
+    produced = []
+
+    def produce():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+
+    items = bounded_prefetch(produce(), 2)
+    assert next(items) == 0
+    items.close()
+    assert not _prefetch_threads()
+    assert len(produced) < 10
@@ -0,0 +1,46 @@
+"""Tests for src.core.context_packer."""
+from langchain_core.documents import Document
+from config.constants import CHARS_PER_TOKEN
+from src.core.context_packer import estimate_tokens, pack_documents
+
+
+def _chunk(text, start, episode="S01E01", scene_id=1, season=1, episode_num=1):
+    return Document(page_content=text, metadata={
+        "series": "stranger_things", "season": season, "episode": episode, "episode_num": episode_num,
+        "scene_id": scene_id, "start_index": start
+    })
+
+
+def test_empty_input_packs_nothing():
+    assert pack_documents([], 100) == []
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * (CHARS_PER_TOKEN + 1)) == 2
+
+
+def test_overlapping_chunks_of_one_scene_are_merged():
+    scene = "Will is missing. Joyce hears him through the lights. Hopper starts searching."
+    packed = pack_documents([_chunk(scene[20:], 20), _chunk(scene[:40], 0)], 1000)
+    assert [doc.page_content for doc in packed] == [scene]
+    assert packed[0].metadata["start_index"] == 0
+
+
+def test_separate_chunks_are_not_merged():
+    packed = pack_documents([_chunk("second part", 100), _chunk("first part", 0)], 1000)
+    assert [doc.page_content for doc in packed] == ["first part", "second part"]
+
+
+def test_best_ranked_spans_fill_the_budget_then_emit_chronologically():
+    late = _chunk("a" * 40, 0, episode="S01E05", season=1, episode_num=5)
+    early = _chunk("b" * 40, 0, episode="S01E02", season=1, episode_num=2)
+    dropped = _chunk("c" * 40, 0, episode="S01E01", season=1, episode_num=1)
+    budget = 2 * estimate_tokens("a" * 40)
+    packed = pack_documents([late, early, dropped], budget)
+    assert [doc.page_content[0] for doc in packed] == ["b", "a"]
+
+
+def test_best_span_is_truncated_when_it_alone_exceeds_the_budget():
+    packed = pack_documents([_chunk("x" * 100, 0), _chunk("y" * 10, 0, scene_id=2)], 5)
+    assert [doc.page_content for doc in packed] == ["x" * 5 * CHARS_PER_TOKEN]
@@ -0,0 +1,124 @@
+"""Tests for src.core.data_processor episode processing and index rebuilds."""
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+# Skipped where the preprocessing dependencies (the scene models, LangChain) are not installed
+data_processor = pytest.importorskip("src.core.data_processor")
+from src.core.ingest_manifest import IngestManifest  # pylint: disable=wrong-import-position
+
+
+def _scene(scene_id, start_ms, text):
+    return {"scene_id": scene_id, "start_ms": start_ms, "end_ms": start_ms + 1500,
+            "start_time": f"00:00:{start_ms // 1000:02d},000", "end_time": f"00:00:{start_ms // 1000 + 1:02d},500",
+            "text": text}
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def paths(tmp_path):
+    raw, processed = tmp_path / "raw", tmp_path / "processed"
+    return (raw / "ad", raw / "cs", processed / "ad", processed / "cs", processed / "merged")
+
+
+@pytest.fixture
+def parsed(paths, monkeypatch):
+    """Stand-ins for the SRT/Excel parsers: each episode's parsed files are written by the test."""
+    _, _, proc_ad, proc_cs, _ = paths
+
+    def save_srt(srt_path, *_, **__):
+        return proc_cs / "S01" / f"{srt_path.stem}.json"
+
+    def save_excel(excel_path, *_, **__):
+        return proc_ad / "S01" / f"{excel_path.stem}.json"
+
+    monkeypatch.setattr(data_processor, "save_srt_file_to_json", save_srt)
+    monkeypatch.setattr(data_processor, "save_excel_file_to_json", save_excel)
+    return proc_ad / "S01", proc_cs / "S01"
+
+
+def _episode(tmp_path, stem):
+    return {"dialogue": tmp_path / "raw" / "cs" / "S01" / f"{stem}.srt",
+            "action": tmp_path / "raw" / "ad" / "S01" / f"{stem}_audio_description.xlsx"}
+
+
+def test_failed_merge_keeps_the_previous_merged_file(tmp_path, paths, parsed):
+    action_dir, dialogue_dir = parsed
+    _write_json(dialogue_dir / "S01E01.json", [_scene(1, 0, "Where is Will?")])
+    # Unreadable action file: merge_json_files logs the error and writes nothing
+    (action_dir / "S01E01_audio_description.json").parent.mkdir(parents=True)
+    (action_dir / "S01E01_audio_description.json").write_text("{not json", encoding="utf-8")
+    merged = _write_json(paths[4] / "S01" / "S01E01_merged.json", [_scene(1, 0, "previous merge")])
+
+    with pytest.raises(OSError, match="Merge produced no output"):
+        data_processor._process_episode(_episode(tmp_path, "S01E01"), paths)
+
+    assert json.loads(merged.read_text(encoding="utf-8"))[0]["text"] == "previous merge"
+    assert [p.name for p in merged.parent.iterdir()] == ["S01E01_merged.json"]
+
+
+def test_successful_merge_replaces_the_merged_file(tmp_path, paths, parsed):
+    action_dir, dialogue_dir = parsed
+    _write_json(dialogue_dir / "S01E01.json", [_scene(1, 0, "Where is Will?")])
+    _write_json(action_dir / "S01E01_audio_description.json", [_scene(1, 5000, "[ACTION: Joyce strings lights]")])
+    merged = _write_json(paths[4] / "S01" / "S01E01_merged.json", [_scene(1, 0, "previous merge")])
+
+    outputs, _ = data_processor._process_episode(_episode(tmp_path, "S01E01"), paths)
+
+    assert outputs[-1] == "merged/S01/S01E01_merged.json"
+    assert [s["text"] for s in json.loads(merged.read_text(encoding="utf-8"))] == [
+        "Where is Will?", "[ACTION: Joyce strings lights]"]
+    assert [p.name for p in merged.parent.iterdir()] == ["S01E01_merged.json"]
+
+
+def test_index_rebuild_skips_failed_and_missing_episodes(tmp_path, paths):
+    processed_dir = paths[4].parent
+    _write_json(paths[4] / "S01" / "S01E01_merged.json", [_scene(1, 0, "Hopper searches the lab")])
+    _write_json(paths[4] / "S01" / "S01E02_merged.json", [_scene(1, 0, "stale text of a failed episode")])
+    manifest = IngestManifest(processed_dir / "manifest.json")
+    manifest.update("S01/S01E01", {}, ["merged/S01/S01E01_merged.json"], [])
+    manifest.update("S01/S01E02", {}, ["merged/S01/S01E02_merged.json"], [])
+    manifest.update("S01/S01E03", {}, ["merged/S01/S01E03_merged.json"], [])
+
+    records = data_processor._indexable_records(manifest, processed_dir, {"S01/S01E02": "OSError: merge"})
+    assert list(records) == ["S01/S01E01"]
+    index = data_processor._rebuild_lexical_index(records, processed_dir, "stranger_things", tmp_path / "bm25")
+    assert index.num_docs == 1
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_one_failing_episode_does_not_stop_the_run(tmp_path, paths, monkeypatch, parallel):
+    processed_dir = paths[4].parent
+    manifest = IngestManifest(processed_dir / "manifest.json")
+    # The failing episode was ingested before: its old record and merged file are still around
+    _write_json(paths[4] / "S01" / "S01E02_merged.json", [_scene(1, 0, "old text")])
+    manifest.update("S01/S01E02", {}, ["merged/S01/S01E02_merged.json"], [])
+
+    def process_episode(episode, _):
+        stem = episode["dialogue"].stem
+        if stem == "S01E02":
+            raise ValueError("corrupt subtitle file")
+        _write_json(paths[4] / "S01" / f"{stem}_merged.json", [_scene(1, 0, f"{stem} dialogue")])
+        return [f"merged/S01/{stem}_merged.json"], {"srt": 0.0}
+
+    monkeypatch.setattr(data_processor, "_process_episode", process_episode)
+    keys = ["S01/S01E01", "S01/S01E02", "S01/S01E03"]
+    episodes = {key: _episode(tmp_path, key.split("/")[1]) for key in keys}
+
+    with ThreadPoolExecutor(2) as executor:
+        results = data_processor._process_episodes(keys, episodes, paths, executor if parallel else None)
+    failed = {key: result["error"] for key, result in results.items() if result["error"]}
+    for key, result in results.items():
+        if not result["error"]:
+            manifest.update(key, {}, result["outputs"], [])
+
+    assert failed == {"S01/S01E02": "ValueError: corrupt subtitle file"}
+    records = data_processor._indexable_records(manifest, processed_dir, failed)
+    assert sorted(records) == ["S01/S01E01", "S01/S01E03"]
+    index = data_processor._rebuild_lexical_index(records, processed_dir, "stranger_things", tmp_path / "bm25")
+    assert index.num_docs == 2
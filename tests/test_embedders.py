@@ -0,0 +1,57 @@
+"""Tests for src.embedders."""
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.embedders import HashingEmbeddings, create_embedder, embed_queries
+
+TEXTS = ["Where is Will?", "Eleven flips the van", "", "where IS will", "Şimdi ne yapacağız?"]
+
+
+class QueryOnlyEmbeddings(Embeddings):
+    """A remote-style backend: queries must go through embed_query, never embed_documents."""
+
+    def embed_documents(self, texts):
+        raise AssertionError("embed_documents used for queries")
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def test_hashing_is_deterministic_across_instances():
+    first = HashingEmbeddings(dim=64).embed_documents(TEXTS)
+    assert HashingEmbeddings(dim=64).embed_documents(TEXTS) == first
+    # Case-folded words: only spelling-insensitive duplicates share a vector
+    assert first[0] == first[3]
+    assert first[0] != first[1]
+
+
+def test_hashing_vectors_are_unit_length_float32():
+    vectors = np.asarray(HashingEmbeddings(dim=64).embed_documents(TEXTS), dtype=np.float64)
+    assert vectors.shape == (len(TEXTS), 64)
+    norms = np.linalg.norm(vectors, axis=1)
+    np.testing.assert_allclose(norms[[0, 1, 3, 4]], 1.0, rtol=1e-6)
+    # No features: stays the zero vector instead of dividing by zero
+    assert norms[2] == 0.0
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 64])
+def test_batch_size_does_not_change_vectors(batch_size):
+    expected = HashingEmbeddings(dim=64, batch_size=len(TEXTS)).embed_documents(TEXTS)
+    assert HashingEmbeddings(dim=64, batch_size=batch_size).embed_documents(TEXTS) == expected
+
+
+def test_embed_queries_matches_embed_query_for_local_backends():
+    embedder = HashingEmbeddings(dim=64, batch_size=2)
+    assert embed_queries(embedder, TEXTS) == [embedder.embed_query(text) for text in TEXTS]
+
+
+def test_embed_queries_falls_back_to_embed_query():
+    embedder = QueryOnlyEmbeddings()
+    assert embed_queries(embedder, TEXTS) == [embedder.embed_query(text) for text in TEXTS]
+
+
+def test_create_embedder_builds_hashing_and_rejects_unknown_backends():
+    embedder, model_id = create_embedder("hashing")
+    assert isinstance(embedder, HashingEmbeddings) and model_id.startswith("hashing/")
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        create_embedder("word2vec")
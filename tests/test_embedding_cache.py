@@ -0,0 +1,68 @@
+"""Tests for src.utils.embedding_cache."""
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.embedders import HashingEmbeddings
+from src.utils.embedding_cache import CachedEmbeddings
+
+
+class TaskTypeEmbeddings(Embeddings):
+    """Distinguishes document from query vectors and records how many texts it embedded."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded += texts
+        return [[0.0, float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return [1.0, float(len(text))]
+
+
+@pytest.fixture
+def model():
+    return TaskTypeEmbeddings()
+
+
+@pytest.fixture
+def cache(model, tmp_path):
+    return CachedEmbeddings(model, model_id="test", db_path=tmp_path / "embeddings.db")
+
+
+def test_documents_are_computed_once(cache, model):
+    first = cache.embed_documents(["a", "bb", "a"])
+    second = cache.embed_documents(["bb", "a"])
+    assert first == [[0.0, 1.0], [0.0, 2.0], [0.0, 1.0]]
+    assert second == [[0.0, 2.0], [0.0, 1.0]]
+    assert model.embedded == ["a", "bb"]
+    assert cache.stats()["hits"] == 2
+
+
+def test_query_and_document_vectors_are_cached_separately(cache):
+    assert cache.embed_documents(["same"]) == [[0.0, 4.0]]
+    assert cache.embed_query("same") == [1.0, 4.0]
+
+
+def test_embed_queries_matches_embed_query_and_shares_its_entries(cache, model):
+    assert cache.embed_queries(["one", "three"]) == [[1.0, 3.0], [1.0, 5.0]]
+    assert cache.embed_query("three") == [1.0, 5.0]
+    assert model.embedded == ["one", "three"]
+
+
+def test_cache_survives_reopening(model, tmp_path):
+    CachedEmbeddings(model, model_id="test", db_path=tmp_path / "embeddings.db").embed_query("kept")
+    reopened = CachedEmbeddings(model, model_id="test", db_path=tmp_path / "embeddings.db")
+    assert reopened.embed_query("kept") == [1.0, 4.0]
+    assert model.embedded == ["kept"]
+    other_model = CachedEmbeddings(model, model_id="other", db_path=tmp_path / "embeddings.db")
+    other_model.embed_query("kept")
+    assert model.embedded == ["kept", "kept"]
+
+
+def test_local_backend_batched_queries_equal_single_queries(tmp_path):
+    cache = CachedEmbeddings(HashingEmbeddings(dim=64), model_id="hashing", db_path=tmp_path / "embeddings.db")
+    texts = ["who is eleven", "what happened in hawkins"]
+    batched = cache.embed_queries(texts)
+    fresh = HashingEmbeddings(dim=64)
+    assert batched == [fresh.embed_query(text) for text in texts]
@@ -0,0 +1,76 @@
+"""Tests for src.preprocessing.excel_filter against the original per-row dialogue rule."""
+import importlib.util
+import random
+import re
+from pathlib import Path
+import pytest
+from config.constants import (
+    MIN_ACTION_WORDS,
+    ACTION_INDICATORS,
+    DIALOGUE_QUESTION_STARTERS,
+    DIALOGUE_VERBS,
+    SPEAKER_PATTERNS
+)
+
+
+def _load_excel_filter():
+    """Load excel_filter.py by path: importing it through src.preprocessing also pulls in the parsers."""
+    path = Path(__file__).resolve().parent.parent / "src" / "preprocessing" / "excel_filter.py"
+    spec = importlib.util.spec_from_file_location("excel_filter", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+excel_filter = _load_excel_filter()
+
+
+def _reference_is_dialogue(text):
+    """Original rule: one re.search per pattern and verb, checks in this order."""
+    if not text or not text.strip():
+        return True
+    text = text.strip()
+    text_lower = text.lower()
+    if '"' in text or "'" in text:
+        return True
+    if text.endswith('?') and any(text_lower.startswith(starter) for starter in DIALOGUE_QUESTION_STARTERS):
+        return True
+    if any(re.search(pattern, text, re.IGNORECASE) for pattern in SPEAKER_PATTERNS):
+        return True
+    if any(re.search(rf'\b\w+\s+{verb}\b', text_lower) for verb in DIALOGUE_VERBS):
+        return True
+    if sum(1 for indicator in ACTION_INDICATORS if indicator in text_lower) >= 2:
+        return False
+    return len(text.split()) < MIN_ACTION_WORDS
+
+
+SAMPLE = [
+    "", "   ", "Will: Where are you?", "Joyce Byers: Will?", "He runs, Hopper: stop",
+    "\"Run!\" she screams", "It's dark in the lab", "Where is the lab?", "The lab is dark?",
+    "he said nothing at all today", "Mike asked about the door again", "mom whispered something quiet",
+    "Eleven opens the door and walks in", "He opensits", "He walks.", "A dog barks",
+    "The van flips over on the road", "İstanbul sokaklarında YÜRÜYOR", "Dustin nods and smiles",
+    "Who", "what if he turns back?", "Hopper stares, then turns and leaves the cabin",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLE)
+def test_is_dialogue_text_matches_the_original_rule(text):
+    assert excel_filter.is_dialogue_text(text) == _reference_is_dialogue(text)
+
+
+def test_dialogue_mask_matches_the_original_rule_on_random_texts():
+    rng = random.Random(0)
+    vocabulary = (ACTION_INDICATORS + DIALOGUE_VERBS + DIALOGUE_QUESTION_STARTERS
+                  + ["Will:", "Mike", "Joyce Byers:", ", Hopper:", "he", "mom", "the", "door", "'", "\"", "İ", "ı"])
+    texts = [" ".join(rng.choices(vocabulary, k=rng.randint(0, 9))) + ("?" if rng.random() < 0.2 else "")
+             for _ in range(2000)]
+    assert excel_filter.dialogue_mask(texts).tolist() == [_reference_is_dialogue(text) for text in texts]
+
+
+def test_filter_dialogues_from_actions_keeps_actions_in_order():
+    actions = [{"text": "[ACTION: Eleven opens the door and walks in]"}, {"text": "[ACTION: Will: Mom?]"},
+               {"text": "[ACTION: The van flips over on the road]"}]
+    filtered, kept, removed = excel_filter.filter_dialogues_from_actions(actions)
+    assert filtered == [actions[0], actions[2]]
+    assert (kept, removed) == (2, 1)
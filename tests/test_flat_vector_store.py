@@ -0,0 +1,158 @@
+"""Tests for src.flat_vector_store segments, tombstones, compaction and batched search."""
+import numpy as np
+import pytest
+from src import flat_vector_store
+from src.flat_vector_store import FlatVectorStore
+
+DIMENSION = 8
+
+
+def _metadata(i):
+    return {"season": 1 + i % 2, "episode_num": 1 + i % 3, "scene_id": i}
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(30, DIMENSION)).astype(np.float32)
+
+
+@pytest.fixture
+def store(tmp_path, vectors):
+    store = FlatVectorStore(None, tmp_path)
+    # Two segments, like two ingestion checkpoints
+    for batch in (range(0, 20), range(20, 30)):
+        store.add_embeddings([f"chunk {i}" for i in batch], vectors[list(batch)],
+                             [_metadata(i) for i in batch], [f"id-{i}" for i in batch])
+    return store
+
+
+def _brute_force(vectors, ids, query, k):
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind="stable")[:k]
+    return [ids[i] for i in order], distances[order]
+
+
+def _ids(documents):
+    return [f"id-{doc.metadata['scene_id']}" for doc in documents]
+
+
+def test_added_rows_are_searchable_and_readable(store, vectors):
+    assert len(store) == 30
+    stored = store.get(["id-3", "missing", "id-25"], include=["documents", "embeddings"])
+    assert stored["ids"] == ["id-3", "id-25"]
+    assert stored["documents"] == ["chunk 3", "chunk 25"]
+    np.testing.assert_allclose(stored["embeddings"], vectors[[3, 25]])
+    assert _ids(store.similarity_search_by_vector(vectors[25], k=1)) == ["id-25"]
+
+
+def test_deleted_rows_disappear_from_search_and_get(store, vectors):
+    store.delete(["id-4", "id-25"])
+    assert len(store) == 28
+    assert store.get(["id-4", "id-25"])["ids"] == []
+    assert "id-4" not in _ids(store.similarity_search_by_vector(vectors[4], k=5))
+    # id-4 is season 1, episode 2: a filtered search must skip its tombstone too
+    season_filter = {"$and": [{"season": {"$eq": 1}}, {"episode_num": {"$eq": 2}}]}
+    hits = _ids(store.similarity_search_by_vector(vectors[4], k=30, filter=season_filter))
+    assert "id-4" not in hits
+    assert sorted(hits) == sorted(f"id-{i}" for i in range(30) if i % 2 == 0 and i % 3 == 1 and i != 4)
+
+
+def test_readding_an_id_replaces_its_row(store, vectors):
+    replacement = vectors[0] + 10
+    store.add_embeddings(["chunk 7 v2"], [replacement], [_metadata(7)], ["id-7"])
+    assert len(store) == 30
+    assert store.get(["id-7"])["documents"] == ["chunk 7 v2"]
+    assert store.similarity_search_by_vector(replacement, k=1)[0].page_content == "chunk 7 v2"
+
+
+def test_readding_a_deleted_id_makes_it_visible_again(store, vectors):
+    store.delete(["id-7"])
+    store.add_embeddings(["chunk 7 v2"], [vectors[7]], [_metadata(7)], ["id-7"])
+    assert store.get(["id-7"])["documents"] == ["chunk 7 v2"]
+    assert len(store) == 30
+
+
+def test_compact_keeps_live_rows_and_drops_old_segments(store, vectors, tmp_path):
+    store.delete(["id-4"])
+    store.add_embeddings(["chunk 7 v2"], [vectors[7]], [_metadata(7)], ["id-7"])
+    before = store.similarity_search_by_vectors(vectors[:5], k=4)
+    assert store.needs_compaction()
+
+    store.compact()
+
+    assert not store.needs_compaction()
+    assert [p.name for p in store.store_dir.iterdir() if p.is_dir()] == ["000004"]
+    assert store.similarity_search_by_vectors(vectors[:5], k=4) == before
+    reopened = FlatVectorStore(None, tmp_path)
+    assert len(reopened) == 29
+    assert reopened.get(["id-4", "id-7"])["documents"] == ["chunk 7 v2"]
+
+
+@pytest.mark.parametrize("filter, wanted, k", [
+    (None, lambda m: True, 5),
+    ({"season": {"$eq": 2}}, lambda m: m["season"] == 2, 4),
+    ({"$and": [{"season": {"$eq": 1}}, {"episode_num": {"$eq": 3}}]},
+     lambda m: m["season"] == 1 and m["episode_num"] == 3, 50),
+])
+def test_batched_search_matches_brute_force(store, vectors, filter, wanted, k):  # pylint: disable=redefined-builtin
+    keep = [i for i in range(30) if wanted(_metadata(i))]
+    ids = [f"id-{i}" for i in keep]
+    queries = np.random.default_rng(1).normal(size=(6, DIMENSION)).astype(np.float32)
+
+    results = store.search_by_vectors(queries, k=k, filter=filter)
+    batched = store.similarity_search_by_vectors(queries, k=k, filter=filter)
+
+    for query, hits, documents in zip(queries, results, batched):
+        expected_ids, expected_distances = _brute_force(vectors[keep], ids, query, k)
+        assert _ids(documents) == _ids([doc for doc, _ in hits]) == expected_ids
+        np.testing.assert_allclose([distance for _, distance in hits], expected_distances, rtol=1e-4, atol=1e-4)
+
+
+def test_search_on_an_empty_store_returns_nothing(tmp_path):
+    assert FlatVectorStore(None, tmp_path).similarity_search_by_vectors(np.zeros((2, DIMENSION)), k=3) == [[], []]
+
+
+@pytest.fixture
+def int8_store(tmp_path, vectors):
+    store = FlatVectorStore(None, tmp_path / "int8", quantization="int8")
+    for batch in (range(0, 20), range(20, 30)):
+        store.add_embeddings([f"chunk {i}" for i in batch], vectors[list(batch)],
+                             [_metadata(i) for i in batch], [f"id-{i}" for i in batch])
+    return store
+
+
+def test_uncompacted_int8_store_searches_float32_rows(int8_store, vectors, monkeypatch):
+    def fail(*_, **__):
+        raise AssertionError("codes searched before compaction")
+
+    monkeypatch.setattr(flat_vector_store, "quantized_top_k", fail)
+    hits = int8_store.search_by_vectors(vectors[:3], k=4)
+    assert [_ids([doc for doc, _ in row])[0] for row in hits] == ["id-0", "id-1", "id-2"]
+    assert [distance for _, distance in hits[0]][0] == pytest.approx(0.0, abs=1e-4)
+
+
+def test_compacted_int8_store_searches_the_codes(int8_store, vectors, monkeypatch):
+    int8_store.compact()
+    calls = []
+    real = flat_vector_store.quantized_top_k
+    monkeypatch.setattr(flat_vector_store, "quantized_top_k", lambda *a, **kw: calls.append(1) or real(*a, **kw))
+    int8_store.search_by_vectors(vectors[:3], k=4)
+    assert calls == [1]
+
+
+@pytest.mark.parametrize("filter", [None, {"season": {"$eq": 2}}])
+def test_int8_with_rescoring_returns_the_float32_top_k(tmp_path, filter):  # pylint: disable=redefined-builtin
+    rng = np.random.default_rng(7)
+    corpus = rng.normal(size=(2000, 64)).astype(np.float32)
+    queries = corpus[rng.choice(2000, 25, replace=False)] + rng.normal(scale=0.5, size=(25, 64)).astype(np.float32)
+    stores = {}
+    for quantization in ("none", "int8"):
+        stores[quantization] = FlatVectorStore(None, tmp_path / quantization, quantization=quantization)
+        stores[quantization].add_embeddings([f"chunk {i}" for i in range(2000)], corpus,
+                                            [_metadata(i) for i in range(2000)], [f"id-{i}" for i in range(2000)])
+        stores[quantization].compact()
+
+    exact = stores["none"].similarity_search_by_vectors(queries, k=10, filter=filter)
+    quantized = stores["int8"].similarity_search_by_vectors(queries, k=10, filter=filter)
+
+    assert [_ids(row) for row in quantized] == [_ids(row) for row in exact]
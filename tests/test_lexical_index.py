@@ -0,0 +1,59 @@
+"""Tests for src.lexical_index."""
+import pytest
+from langchain_core.documents import Document
+from src.lexical_index import BM25Index, build_lexical_index
+
+# BM25Index.search builds results with the legacy langchain Document import
+pytest.importorskip("langchain.schema")
+
+DOCS = [
+    Document(page_content="Eleven flips the van with her powers", metadata={"season": 1, "episode_num": 8}),
+    Document(page_content="Hopper searches the lab for Will", metadata={"season": 1, "episode_num": 3}),
+    Document(page_content="Eleven and Max go to the mall", metadata={"season": 3, "episode_num": 2}),
+    Document(page_content="The Mind Flayer possesses Billy", metadata={"season": 3, "episode_num": 4}),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return BM25Index.build(iter(DOCS), tmp_path / "bm25")
+
+
+def _contents(results):
+    return [doc.page_content for doc, _ in results]
+
+
+def test_matching_documents_rank_by_score(index):
+    results = index.search(["eleven powers"], k=5)
+    assert _contents(results) == [DOCS[0].page_content, DOCS[2].page_content]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_k_limits_the_results(index):
+    assert len(index.search(["eleven"], k=1)) == 1
+
+
+def test_season_and_episode_filters(index):
+    assert _contents(index.search(["eleven"], k=5, season=3)) == [DOCS[2].page_content]
+    assert _contents(index.search(["eleven"], k=5, season=1, episode=8)) == [DOCS[0].page_content]
+    assert index.search(["eleven"], k=5, season=2) == []
+
+
+def test_unknown_terms_return_nothing(index):
+    assert index.search(["demogorgon"], k=5) == []
+
+
+def test_results_keep_metadata(index):
+    doc, _ = index.search(["billy"], k=1)[0]
+    assert doc.metadata == {"season": 3, "episode_num": 4}
+
+
+def test_index_reopens_from_disk(index, tmp_path):
+    assert BM25Index.exists(tmp_path / "bm25")
+    reopened = BM25Index(tmp_path / "bm25")
+    assert _contents(reopened.search(["hopper"], k=5)) == [DOCS[1].page_content]
+
+
+def test_no_documents_builds_no_index(tmp_path):
+    assert build_lexical_index(iter([]), tmp_path / "empty") is None
+    assert not BM25Index.exists(tmp_path / "empty")
@@ -0,0 +1,121 @@
+"""Tests for src.preprocessing.merger against the previous bucket-scan implementation."""
+import copy
+import importlib.util
+import random
+from pathlib import Path
+import pytest
+from config.constants import NGRAM_SIZE, TIME_WINDOW_MS
+
+
+def _load_merger():
+    """Load merger.py by path: importing it through src.preprocessing also pulls in the parsers."""
+    path = Path(__file__).resolve().parent.parent / "src" / "preprocessing" / "merger.py"
+    spec = importlib.util.spec_from_file_location("merger", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+merger = _load_merger()
+normalize_text, build_ngrams = merger.normalize_text, merger.build_ngrams
+
+
+def _reference_merge(dialogues, actions):
+    """Previous implementation: probe 241 time buckets and re-normalize every candidate."""
+    dialogue_by_time = {}
+    for d in dialogues:
+        dialogue_by_time.setdefault(d.get('start_ms', 0) // TIME_WINDOW_MS, []).append(d)
+
+    def find_overlaps(action):
+        act_start, act_end = action.get('start_ms', 0), action.get('end_ms', 0)
+        time_bucket = act_start // TIME_WINDOW_MS
+        overlaps = []
+        for bucket_offset in range(-120, 121):
+            for d in dialogue_by_time.get(time_bucket + bucket_offset, []):
+                d_start, d_end = d.get('start_ms', 0), d.get('end_ms', 0)
+                if (d_start <= act_start and act_end <= d_end) or (act_start <= d_end and d_start <= act_end):
+                    overlaps.append(d)
+        return overlaps
+
+    def is_duplicate(action_text, overlaps):
+        act_words = action_text.split()
+        if len(act_words) < 5:
+            return any(action_text == normalize_text(po.get('text', '')) for po in overlaps)
+        for po in overlaps:
+            po_text = normalize_text(po.get('text', ''))
+            if not po_text:
+                continue
+            if action_text in po_text or merger._check_word_sequence_match(act_words, po_text.split()):
+                return True
+            act_ngrams, dia_ngrams = build_ngrams(action_text, NGRAM_SIZE), build_ngrams(po_text, NGRAM_SIZE)
+            if act_ngrams and dia_ngrams and len(act_ngrams & dia_ngrams) / len(act_ngrams) > 0.8:
+                return True
+        return False
+
+    merged_list, added, skipped = list(dialogues), 0, 0
+    for act in actions:
+        text = normalize_text(act.get('text', '').replace('[ACTION: ', '').replace(']', '').strip())
+        if not text:
+            continue
+        if len(text) >= 3 and is_duplicate(text, find_overlaps(act)):
+            skipped += 1
+            continue
+        act['type'] = "action"
+        merged_list.append(act)
+        added += 1
+    merged_list.sort(key=lambda x: x.get('start_ms', 0))
+    for i, item in enumerate(merged_list):
+        item['scene_id'] = i + 1
+    return merged_list, added, skipped
+
+
+def _synthetic_episode(rng, lines):
+    """Random dialogues plus actions, a share of which copy or paraphrase nearby dialogue."""
+    vocabulary = [f"w{i}" for i in range(300)]
+    dialogues, t = [], 0
+    for i in range(lines):
+        t += rng.randint(0, 4000)
+        text = " ".join(rng.choices(vocabulary, k=rng.randint(1, 14)))
+        dialogues.append({"scene_id": i + 1, "start_ms": t, "end_ms": t + rng.randint(-200, 6000),
+                          "text": text if rng.random() > 0.02 else "[music]"})
+    actions = []
+    for i in range(lines // 2):
+        source = rng.choice(dialogues)
+        start = rng.randint(0, t)
+        if rng.random() < 0.4:
+            start = max(0, source["start_ms"] + rng.randint(-1500, 1500))
+            words = source["text"].split()
+            if words and rng.random() < 0.5:
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        else:
+            words = rng.choices(vocabulary, k=rng.randint(1, 12))
+        actions.append({"scene_id": i + 1, "start_ms": start, "end_ms": start + rng.randint(0, 5000),
+                        "text": f"[ACTION: {' '.join(words)}]"})
+    return dialogues, actions
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_scenes_matches_reference(seed):
+    dialogues, actions = _synthetic_episode(random.Random(seed), 400)
+    expected = _reference_merge(copy.deepcopy(dialogues), copy.deepcopy(actions))
+    actual = merger.merge_scenes(copy.deepcopy(dialogues), copy.deepcopy(actions))
+    assert actual == expected
+    assert actual[2] > 0, "the synthetic episode should exercise duplicate detection"
+
+
+def test_merge_scenes_without_actions_renumbers_dialogues():
+    dialogues = [{"scene_id": 7, "start_ms": 2000, "end_ms": 3000, "text": "later"},
+                 {"scene_id": 3, "start_ms": 0, "end_ms": 1000, "text": "first"}]
+    merged, added, skipped = merger.merge_scenes(dialogues, [])
+    assert [(d["text"], d["scene_id"]) for d in merged] == [("first", 1), ("later", 2)]
+    assert (added, skipped) == (0, 0)
+
+
+def test_merge_scenes_skips_action_repeating_overlapping_dialogue():
+    dialogues = [{"scene_id": 1, "start_ms": 0, "end_ms": 4000, "text": "he opens the door slowly and looks"}]
+    actions = [{"scene_id": 1, "start_ms": 500, "end_ms": 1500,
+                "text": "[ACTION: he opens the door slowly and looks]"},
+               {"scene_id": 2, "start_ms": 5000, "end_ms": 6000, "text": "[ACTION: a dog barks outside]"}]
+    merged, added, skipped = merger.merge_scenes(dialogues, actions)
+    assert (added, skipped) == (1, 1)
+    assert [d.get("type") for d in merged] == [None, "action"]
@@ -0,0 +1,54 @@
+"""Tests for src.core.multi_series_service answer-cache handling."""
+import asyncio
+import threading
+import pytest
+from src.core import multi_series_service
+from src.core.multi_series_service import MultiSeriesService
+from src.core.query_analyzer import QueryAnalyzer
+
+
+@pytest.fixture(autouse=True)
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.setattr(multi_series_service, "query_analyzer", QueryAnalyzer(processed_root=tmp_path))
+
+
+def _constraints(query, season=None, episode=None):
+    return MultiSeriesService._cache_constraints(query, "stranger_things", season, episode, True)  # pylint: disable=protected-access
+
+
+def test_spelled_out_seasons_get_different_constraints():
+    assert _constraints("İkinci sezonda Will nerede?") != _constraints("Üçüncü sezonda Will nerede?")
+    assert _constraints("İkinci sezonda Will nerede?") != _constraints("Will nerede?")
+
+
+def test_request_season_and_episode_override_the_question():
+    assert _constraints("İkinci sezonda Will nerede?", season=3, episode=1) == _constraints("Will nerede?", 3, 1)
+
+
+def test_other_numbers_in_the_question_must_match():
+    assert _constraints("1983'te ne oldu?") != _constraints("1984'te ne oldu?")
+
+
+def test_index_freshness_is_checked_off_the_event_loop(monkeypatch):
+    checked = []
+
+    class FailingEmbeddings:
+        async def aembed_query(self, query):
+            raise RuntimeError("embedding backend down")
+
+    async def answer(self, query, *_):
+        return {"status": "success", "original_query": query, "source_count": 0}
+
+    monkeypatch.setattr(multi_series_service.registry, "ensure_fresh",
+                        lambda series_name: checked.append((series_name, threading.current_thread())))
+    monkeypatch.setattr(multi_series_service, "get_embeddings", FailingEmbeddings)
+    monkeypatch.setattr(MultiSeriesService, "_aanswer", answer)
+    service = MultiSeriesService()
+    try:
+        response = asyncio.run(service.aask("Will nerede?", "all"))
+    finally:
+        service.close()
+
+    assert response["status"] == "success"
+    assert sorted(name for name, _ in checked) == sorted(MultiSeriesService.AVAILABLE_SERIES)
+    assert all(thread is not threading.main_thread() for _, thread in checked)
@@ -0,0 +1,77 @@
+"""Tests for src.partition_index."""
+import numpy as np
+import pytest
+from src.partition_index import PartitionIndex, build_partition_index
+
+
+class InMemoryVectorStore:
+    """The part of the vector store API PartitionIndex.build reads from."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get(self, ids, include):
+        found = [chunk for chunk in ids if chunk in self.vectors]
+        return {"ids": found, "embeddings": [self.vectors[chunk] for chunk in found]}
+
+
+@pytest.fixture
+def episodes():
+    # (season, episode, chunk_ids), deliberately out of order
+    return [(2, 1, ["s2e1-0", "s2e1-1"]), (1, 2, ["s1e2-0", "s1e2-1", "s1e2-2"]), (1, 1, ["s1e1-0", "s1e1-1"])]
+
+
+@pytest.fixture
+def vectors(episodes):
+    rng = np.random.default_rng(0)
+    return {chunk: rng.normal(size=8).astype(np.float32).tolist() for _, _, ids in episodes for chunk in ids}
+
+
+@pytest.fixture
+def index(episodes, vectors, tmp_path):
+    return PartitionIndex.build(InMemoryVectorStore(vectors), episodes, tmp_path / "partitions", batch_size=3)
+
+
+def _exact(vectors, query, chunks, k):
+    distances = {chunk: float(((np.asarray(vectors[chunk]) - query) ** 2).sum()) for chunk in chunks}
+    return sorted(distances, key=distances.get)[:k]
+
+
+def test_row_ranges_merge_adjacent_partitions(index):
+    assert index.row_ranges(season=1) == [(0, 5)]
+    assert index.row_ranges(season=1, episode=2) == [(2, 5)]
+    assert index.row_ranges(episode=1) == [(0, 2), (5, 7)]
+    assert index.row_ranges(season=3) == []
+
+
+@pytest.mark.parametrize("season, episode", [(None, None), (1, None), (1, 2), (None, 1)])
+def test_search_matches_exact_search_within_the_filter(index, episodes, vectors, season, episode):
+    query = np.random.default_rng(1).normal(size=8).astype(np.float32)
+    chunks = [chunk for s, e, ids in episodes for chunk in ids
+              if (season is None or s == season) and (episode is None or e == episode)]
+    hits = index.search(query, 3, season=season, episode=episode)
+    assert [chunk for chunk, _ in hits] == _exact(vectors, query, chunks, 3)
+    distances = [distance for _, distance in hits]
+    assert distances == sorted(distances)
+    assert distances[0] == pytest.approx(((np.asarray(vectors[hits[0][0]]) - query) ** 2).sum(), rel=1e-4)
+
+
+def test_search_outside_every_partition_returns_nothing(index):
+    assert index.search(np.zeros(8), 3, season=9) == []
+
+
+def test_index_reopens_from_disk(index, tmp_path):
+    reopened = PartitionIndex(tmp_path / "partitions")
+    assert reopened.num_rows == 7 and reopened.dimension == 8
+    assert reopened.partitions == index.partitions
+
+
+def test_missing_chunks_fail_the_build(episodes, vectors, tmp_path):
+    del vectors["s1e2-1"]
+    with pytest.raises(ValueError, match="missing from the vector store"):
+        PartitionIndex.build(InMemoryVectorStore(vectors), episodes, tmp_path / "partitions")
+    assert not PartitionIndex.exists(tmp_path / "partitions")
+
+
+def test_episodes_without_chunks_build_no_index(vectors, tmp_path):
+    assert build_partition_index(InMemoryVectorStore(vectors), [(1, 1, [])], tmp_path / "empty") is None
@@ -0,0 +1,69 @@
+"""Tests for src.quantization."""
+import numpy as np
+import pytest
+from src.quantization import (
+    approximate_sq_distances,
+    check_quantization,
+    quantize_int8,
+    quantized_nbytes,
+    quantized_top_k
+)
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(500, 32)).astype(np.float32)
+
+
+def _exact_top_k(queries, vectors, k, rows=None):
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    distances = ((queries[:, None, :] - vectors[rows][None, :, :]) ** 2).sum(axis=2)
+    return rows[np.argsort(distances, axis=1, kind="stable")[:, :k]]
+
+
+def test_check_quantization_rejects_unknown_modes():
+    assert check_quantization("int8") == "int8"
+    with pytest.raises(ValueError):
+        check_quantization("int4")
+
+
+def test_codes_approximate_the_vectors(vectors):
+    quantized = quantize_int8(vectors)
+    decoded = quantized["offset"] + quantized["scale"] * quantized["codes"].astype(np.float32)
+    assert quantized["codes"].dtype == np.int8
+    assert np.abs(decoded - vectors).max() <= quantized["scale"].max()
+    assert quantized_nbytes(quantized) < vectors.nbytes / 3
+
+
+def test_approximate_distances_track_exact_distances(vectors):
+    queries = vectors[:4] + 0.1
+    approx = approximate_sq_distances(queries, quantize_int8(vectors))
+    exact = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    np.testing.assert_allclose(approx, exact, rtol=0.05, atol=0.5)
+
+
+def test_rescored_top_k_matches_exact_search(vectors):
+    queries = vectors[:10] + np.random.default_rng(1).normal(scale=0.3, size=(10, 32)).astype(np.float32)
+    rows, distances = quantized_top_k(queries, quantize_int8(vectors), vectors, k=5, rescore_factor=4)
+    np.testing.assert_array_equal(rows, _exact_top_k(queries, vectors, 5))
+    assert distances.shape == (10, 5)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+
+def test_top_k_restricted_to_rows(vectors):
+    queries = vectors[:3]
+    allowed = np.arange(100, 200)
+    rows, _ = quantized_top_k(queries, quantize_int8(vectors), vectors, k=4, rescore_factor=4, rows=allowed)
+    np.testing.assert_array_equal(rows, _exact_top_k(queries, vectors, 4, allowed))
+
+
+def test_k_larger_than_rows_returns_every_row(vectors):
+    rows, distances = quantized_top_k(vectors[:2], quantize_int8(vectors), vectors, k=10, rescore_factor=4,
+                                      rows=np.array([3, 7, 9]))
+    assert rows.shape == distances.shape == (2, 3)
+    assert sorted(rows[0].tolist()) == [3, 7, 9]
+
+
+def test_zero_k_returns_empty_results(vectors):
+    rows, distances = quantized_top_k(vectors[:2], quantize_int8(vectors), vectors, k=0, rescore_factor=4)
+    assert rows.shape == distances.shape == (2, 0)
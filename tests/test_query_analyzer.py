@@ -0,0 +1,55 @@
+"""Tests for src.core.query_analyzer."""
+import pytest
+from config.constants import FAST_PATH_MIN_CONFIDENCE
+from src.core.query_analyzer import QueryAnalyzer
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    # No processed gazetteer files: only the configured seeds
+    return QueryAnalyzer(processed_root=tmp_path)
+
+
+@pytest.mark.parametrize("query", [
+    "What will happen in season 2?",
+    "Who gets the max sentence?",
+    "Is Mike a good guy?",
+])
+def test_common_words_do_not_detect_a_series(analyzer, query):
+    analysis = analyzer.analyze(query)
+    assert analysis.entity_confidence() < FAST_PATH_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("query, series", [
+    ("Where does Will Byers hide?", "stranger_things"),
+    ("What did Eleven see in the Upside Down?", "stranger_things"),
+    ("Why does Jesse Pinkman leave?", "breaking_bad"),
+])
+def test_known_entities_detect_their_series(analyzer, query, series):
+    analysis = analyzer.analyze(query)
+    assert analysis.detected_series == series
+    assert analysis.entity_confidence() >= FAST_PATH_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("query, season, episode", [
+    ("S02E05'te ne oldu?", "2", "5"),
+    ("2. sezon 3. bölüm", "2", "3"),
+    ("ikinci sezonun üçüncü bölümünde", "2", "3"),
+    ("sezon 2 bölüm 3", "2", "3"),
+    ("3 bölüm 2 sezon", "2", "3"),
+    ("2. sezon 3 bölüm", "2", "3"),
+    ("season 2 episode 3", "2", "3"),
+    ("episode 4 of season two", "2", "4"),
+    ("İkinci sezonda ne oldu?", "2", ""),
+    ("bölüm 4", "", "4"),
+    ("Hopper öldü mü?", "", ""),
+])
+def test_season_and_episode_filters(analyzer, query, season, episode):
+    analysis = analyzer.analyze(query)
+    assert analysis.filters == {"season": season, "episode": episode}
+    assert analysis.filter_confidence == 1.0
+
+
+@pytest.mark.parametrize("query", ["Son bölümde ne oldu?", "Sezon finalinde Will nerede?"])
+def test_unresolved_temporal_hints_lower_confidence(analyzer, query):
+    assert analyzer.analyze(query).filter_confidence < FAST_PATH_MIN_CONFIDENCE
@@ -0,0 +1,65 @@
+"""Tests for src.core.rewrite_cache."""
+import pytest
+from src.core import rewrite_cache as rewrite_cache_module
+from src.core.rewrite_cache import RewriteCache
+
+RESULT = {"optimized_query": "eleven powers", "filters": {"season": "1"}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RewriteCache(tmp_path / "rewrites.db", max_entries=2, ttl_seconds=60)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rewrite_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_hit_after_put_ignores_case_punctuation_and_spacing(cache):
+    assert cache.get("What are Eleven's powers?", "model") is None
+    cache.put("What are Eleven's powers?", "model", RESULT)
+    assert cache.get("  what are elevens   powers ", "model") == RESULT
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_entries_are_kept_per_rewriter_model(cache):
+    cache.put("question", "local", RESULT)
+    assert cache.get("question", "google") is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("question", "model", RESULT)
+    clock[0] += 59
+    assert cache.get("question", "model") == RESULT
+    clock[0] += 2
+    assert cache.get("question", "model") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    for question in ("first", "second"):
+        cache.put(question, "model", RESULT)
+        clock[0] += 1
+    assert cache.get("first", "model") == RESULT
+    clock[0] += 1
+    cache.put("third", "model", RESULT)
+    assert cache.get("second", "model") is None
+    assert cache.get("first", "model") == RESULT
+    assert cache.get("third", "model") == RESULT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_persist_across_instances(tmp_path):
+    RewriteCache(tmp_path / "rewrites.db").put("question", "model", RESULT)
+    assert RewriteCache(tmp_path / "rewrites.db").get("question", "model") == RESULT
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = RewriteCache(tmp_path / "rewrites.db", enabled=False)
+    cache.put("question", "model", RESULT)
+    assert cache.get("question", "model") is None
+    assert not (tmp_path / "rewrites.db").exists()
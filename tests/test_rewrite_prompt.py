@@ -0,0 +1,49 @@
+"""Tests for the rule-based fast path of src.prompts.rewrite_prompt."""
+import pytest
+from src.core.query_analyzer import QueryAnalyzer
+from src.core.rewrite_cache import RewriteCache
+from src.prompts import rewrite_prompt
+from src.utils.text_processing import QUERY_TERMS_SEPARATOR
+
+
+class FakeChain:
+    """Records the questions it is asked and answers with a fixed result."""
+
+    def __init__(self, result):
+        self.result = result
+        self.questions = []
+
+    def invoke(self, inputs):
+        self.questions.append(inputs["question"])
+        return self.result
+
+
+@pytest.fixture
+def chains(tmp_path, monkeypatch):
+    expansion = FakeChain({"real_question": "What happened to Will in season two, episode three?",
+                           "search_terms": ["Will", "Will Byers", "Upside Down"]})
+    full = FakeChain({"real_question": "What happened in the finale?", "search_terms": ["finale"],
+                      "filters": {"season": "", "episode": "9"}, "detected_series": "stranger_things"})
+    monkeypatch.setattr(rewrite_prompt, "get_expansion_chain", lambda: expansion)
+    monkeypatch.setattr(rewrite_prompt, "get_rewriter_chain", lambda: full)
+    monkeypatch.setattr(rewrite_prompt, "rewrite_cache", RewriteCache(tmp_path / "rewrites.db", enabled=False))
+    monkeypatch.setattr(rewrite_prompt, "query_analyzer", QueryAnalyzer(processed_root=tmp_path))
+    return expansion, full
+
+
+def test_confident_rules_prefill_filters_and_the_llm_still_translates(chains):
+    expansion, full = chains
+    query = "3 bölüm 2 sezon Will Byers'a ne oldu?"
+    rewrite = rewrite_prompt.rewrite_query(query, "all")
+    assert expansion.questions == [query] and full.questions == []
+    assert rewrite.optimized_query == (
+        f"What happened to Will in season two, episode three?{QUERY_TERMS_SEPARATOR}Will, Will Byers, Upside Down")
+    assert rewrite.filters == {"season": "2", "episode": "3"}
+    assert rewrite.detected_series == "stranger_things"
+
+
+def test_unresolved_hints_use_the_full_rewrite(chains):
+    expansion, full = chains
+    rewrite = rewrite_prompt.rewrite_query("2. sezonun son bölümünde Will'e ne oldu?", "stranger_things")
+    assert full.questions and expansion.questions == []
+    assert rewrite.filters == {"season": "2", "episode": "9"}
@@ -0,0 +1,142 @@
+"""Tests for src.core.scheduler admission control."""
+import asyncio
+import time
+import pytest
+from src.core.scheduler import (
+    AdmissionController,
+    AdmissionRejected,
+    BackendLimiter,
+    PRIORITY_BATCH,
+    PRIORITY_EVALUATE,
+    PRIORITY_INTERACTIVE
+)
+
+
+def _limiter(max_concurrency=1, max_queue=4, max_wait_seconds=5.0):
+    return BackendLimiter("test", max_concurrency, max_queue, max_wait_seconds)
+
+
+def test_slots_are_granted_up_to_the_limit():
+    async def main():
+        limiter = _limiter(max_concurrency=2)
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        waiter = asyncio.ensure_future(limiter.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        assert limiter.stats()["active"] == 2 and limiter.stats()["queued"] == 1
+        limiter.release()
+        await waiter
+        return limiter.stats()
+
+    stats = asyncio.run(main())
+    assert stats["admitted"] == 3 and stats["active"] == 2 and stats["queued"] == 0
+
+
+def test_released_slot_goes_to_the_highest_priority_waiter():
+    async def main():
+        limiter = _limiter()
+        order = []
+
+        async def request(name, priority):
+            async with limiter.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        tasks = [asyncio.ensure_future(request("evaluate", PRIORITY_EVALUATE)),
+                 asyncio.ensure_future(request("batch", PRIORITY_BATCH))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.ensure_future(request("interactive", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0.01)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order, limiter.stats()["active"]
+
+    order, active = asyncio.run(main())
+    assert order == ["interactive", "batch", "evaluate"]
+    assert active == 0
+
+
+def test_full_queue_rejects_with_429():
+    async def main():
+        limiter = _limiter(max_queue=1)
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        waiter = asyncio.ensure_future(limiter.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.01)
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await limiter.acquire(PRIORITY_INTERACTIVE)
+            return rejected.value
+        finally:
+            waiter.cancel()
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+
+
+def test_wait_timeout_rejects_with_503():
+    async def main():
+        limiter = _limiter(max_wait_seconds=0.02)
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(PRIORITY_INTERACTIVE)
+        return rejected.value, limiter.stats()
+
+    rejected, stats = asyncio.run(main())
+    assert rejected.status_code == 503
+    assert stats["rejected_timeout"] == 1 and stats["queued"] == 0
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def main():
+        limiter = _limiter()
+        await limiter.acquire(PRIORITY_INTERACTIVE)
+        waiter = asyncio.ensure_future(limiter.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(main())
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_controller_picks_the_backend_limiter():
+    controller = AdmissionController({
+        "local": {"max_concurrency": 1, "max_queue": 1, "max_wait_seconds": 1},
+        "google": {"max_concurrency": 3, "max_queue": 1, "max_wait_seconds": 1}
+    })
+    assert controller.limiter(True).name == "local"
+    assert controller.limiter(False).name == "google"
+    assert set(controller.stats()) == {"local", "google"}
+
+
+def test_blocking_slot_lets_interactive_requests_in_between_worker_calls():
+    controller = AdmissionController({
+        "local": {"max_concurrency": 1, "max_queue": 4, "max_wait_seconds": 5},
+        "google": {"max_concurrency": 1, "max_queue": 4, "max_wait_seconds": 5}
+    })
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        order = []
+
+        def evaluate():
+            for i in range(3):
+                with controller.blocking_slot(loop, True, PRIORITY_EVALUATE):
+                    order.append(f"evaluate {i}")
+                    time.sleep(0.03)
+
+        worker = loop.run_in_executor(None, evaluate)
+        await asyncio.sleep(0.01)
+        async with controller.slot(True, PRIORITY_INTERACTIVE):
+            order.append("interactive")
+        await worker
+        await asyncio.sleep(0)
+        return order
+
+    order = asyncio.run(main())
+    assert order == ["evaluate 0", "interactive", "evaluate 1", "evaluate 2"]
+    assert controller.stats()["local"]["active"] == 0
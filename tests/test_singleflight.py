@@ -0,0 +1,76 @@
+"""Tests for src.core.singleflight."""
+import asyncio
+import pytest
+from src.core.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    calls = []
+    
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+    
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return results, flight.stats()
+    
+    results, stats = asyncio.run(main())
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert stats["leaders"] == 1 and stats["followers"] == 4 and stats["in_flight"] == 0
+
+
+def test_exception_reaches_every_waiter():
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+    
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_follower_does_not_cancel_shared_call():
+    async def work():
+        await asyncio.sleep(0.02)
+        return 42
+    
+    async def main():
+        flight = SingleFlight()
+        leader = asyncio.ensure_future(flight.do("key", work))
+        follower = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+    
+    assert asyncio.run(main()) == 42
+
+
+def test_caller_after_last_waiter_cancelled_starts_fresh_call():
+    started = []
+    
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.02)
+        return len(started)
+    
+    async def main():
+        flight = SingleFlight()
+        leader = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        # Let the leader's finally block run, but not the task's done callback
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await flight.do("key", work)
+        return result, flight.stats()
+    
+    result, stats = asyncio.run(main())
+    assert result == 2
+    assert stats["leaders"] == 2 and stats["in_flight"] == 0